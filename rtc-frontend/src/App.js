@@ -11,6 +11,7 @@ import LoginPage from './components/LoginPage';
 import InstructionsPage from './components/InstructionsPage';
 import QuizPage from './components/QuizPage';
 import CompletePage from './components/CompletePage';
+import { startLandmarkStream } from './landmarks';
 import './App.css';
 
 // Global MediaStream object for the video across components
@@ -26,12 +27,18 @@ function App() {
   const [imageData, setImageData] = useState(null);
   const [quizScore, setQuizScore] = useState(0);
   const [handDown, sethandDown] = useState(0);            // Time hands were not detected
+  const [queuePosition, setQueuePosition] = useState(null); // Position in the server's join queue
 
   // ----------- Connection & signaling refs -----------
   const [dataChannel, setDataChannel] = useState(null);   // RTCDataChannel instance
   const peerConnection = useRef(null);                    // RTCPeerConnection instance
   const websocket = useRef(null);                         // WebSocket signaling channel
   const connectionInitiated = useRef(false);              // Prevent multiple connections
+  const answerApplied = useRef(Promise.resolve());        // Trickled candidates wait for the answer
+  const admitted = useRef(false);                         // Server has a session slot for us
+  const loggedIn = useRef(false);                         // Login accepted, waiting for admission
+  const localStream = useRef(null);                       // Local camera stream
+  const stopLandmarks = useRef(null);                     // Stops client-side hand tracking, if running
   let component_int = useRef(1);                          // Track ICE component type
 
   
@@ -91,6 +98,7 @@ function App() {
       // Capture local webcamera video and add to the rtc track stream
       await navigator.mediaDevices.getUserMedia({ video: true, audio: false })
       .then((stream) => {
+        localStream.current = stream;
         stream.getTracks().forEach(track => pc.addTrack(track, stream));
       }, (err) => alert('Could not acquire media: ' + err));
       
@@ -138,6 +146,14 @@ function App() {
             handleQuizComplete();
             setQuizScore(quizData.score);
             sethandDown(quizData.hands_unseen.toFixed(2))
+          } else if (quizData.message === 'capture_constraints') {
+            applyCaptureConstraints(pc, quizData);
+          } else if (quizData.message === 'landmark_mode' && !stopLandmarks.current) {
+            // Track hands here and stream the landmarks on our own data channel
+            startLandmarkStream(localStream.current, dc, quizData.rate).then(
+              (stop) => { stopLandmarks.current = stop; },
+              (err) => console.error('Hand tracking could not start:', err)
+            );
           }
         };
       };
@@ -179,21 +195,61 @@ function App() {
   };
 
 
+  /**
+   * Apply the capture size and frame rate the server asks for to the local camera track.
+   * The server measures what arrives, so a camera that cannot comply is only logged here.
+   */
+  const applyCaptureConstraints = (pc, { width, height, frameRate }) => {
+    const sender = pc.getSenders().find((s) => s.track && s.track.kind === 'video');
+    if (!sender) return;
+    sender.track.applyConstraints({
+      width: { ideal: width, max: width },
+      height: { ideal: height, max: height },
+      frameRate: { ideal: frameRate, max: frameRate },
+    }).then(
+      () => console.log('Capture constraints applied:', sender.track.getSettings()),
+      (err) => console.warn('Capture constraints not applied:', err)
+    );
+  };
+
   /**
    * Handle signaling messages received over WebSocket channel.
    */
   const handleSignalingData = async (data) => {
     switch (data.type) {
       case 'answer':
-        await handleAnswer(data.answer);
+        answerApplied.current = handleAnswer(data.answer);
+        await answerApplied.current;
         break;
       case 'ice_candidate':
+        await answerApplied.current;
         handleRemoteICECandidate(data.candidate);
         break;
-      case 'login':
-        if (data.valid == '1') {
+      case 'queue':
+        setQueuePosition(data.position);
+        break;
+      case 'admitted':
+        admitted.current = true;
+        setQueuePosition(null);
+        if (loggedIn.current) {
           setCurrentPage('instructions');
           setupPeerConnection();
+        }
+        break;
+      case 'error':
+        console.error('Server error:', data.message);
+        break;
+      case 'admin':
+        alert(data.text);
+        break;
+      case 'login':
+        if (data.valid == '1') {
+          loggedIn.current = true;
+          // Peer connection is only set up once the server admitted the session
+          if (admitted.current) {
+            setCurrentPage('instructions');
+            setupPeerConnection();
+          }
         } else {
           alert('Invalid ID or Passcode!');
         }
@@ -227,15 +283,10 @@ function App() {
     try {
       if (candidate) {
         console.log('Received ICE candidate from server');
+        // An empty candidate string marks the end of candidates for that media section
         await peerConnection.current.addIceCandidate(
           new RTCIceCandidate({
-            component: candidate.component,
-            foundation: candidate.foundation,
-            ip: candidate.ip,
-            port: candidate.port,
-            priority: candidate.priority,
-            protocol: candidate.protocol,
-            type: candidate.type,
+            candidate: candidate.candidate,
             sdpMid: candidate.sdpMid,
             sdpMLineIndex: candidate.sdpMLineIndex,
           })
@@ -283,6 +334,7 @@ function App() {
 
   // Display completion page
   const handleQuizComplete = () => {
+    if (stopLandmarks.current) stopLandmarks.current();
     setCurrentPage('complete');
   };
 
@@ -298,7 +350,7 @@ function App() {
   const renderPage = () => {
     switch(currentPage) {
       case 'login':
-        return <LoginPage onLogin={handleLogin} />;
+        return <LoginPage onLogin={handleLogin} queuePosition={queuePosition} />;
       case 'instructions':
         return <InstructionsPage onStart={handleStartQuiz} />;
       case 'quiz':
@@ -1,6 +1,6 @@
 import React, { useState } from 'react';
 
-function LoginPage({ onLogin }) {
+function LoginPage({ onLogin, queuePosition }) {
   const [passcode, setPasscode] = useState('');
   const [userId, setUserId] = useState('');
 
@@ -36,6 +36,11 @@ function LoginPage({ onLogin }) {
         </div>
         <button type="submit" className="button">Login</button>
       </form>
+      {queuePosition && (
+        <div className="completion-message">
+          Waiting for a free seat, position in queue: {queuePosition}
+        </div>
+      )}
     </div>
   );
 }
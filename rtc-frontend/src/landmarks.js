@@ -0,0 +1,52 @@
+/**
+ * Client-side hand tracking for landmark-ingest sessions.
+ *
+ * When the server sends {message: 'landmark_mode', rate}, the hands in the local
+ * camera stream are tracked here with MediaPipe's HandLandmarker and streamed to
+ * the server over the data channel at that rate. Coordinates are normalized and
+ * refer to the unmirrored camera image; the server maps them onto its own frame
+ * and spot-checks them against the video.
+ */
+import { FilesetResolver, HandLandmarker } from '@mediapipe/tasks-vision';
+
+const WASM_URL = 'https://cdn.jsdelivr.net/npm/@mediapipe/tasks-vision@0.10.21/wasm';
+const MODEL_URL =
+  'https://storage.googleapis.com/mediapipe-models/hand_landmarker/hand_landmarker/float16/1/hand_landmarker.task';
+
+/**
+ * Start streaming landmarks of the camera stream over channel.
+ * Returns a function that stops it.
+ */
+export async function startLandmarkStream(stream, channel, rate) {
+  const vision = await FilesetResolver.forVisionTasks(WASM_URL);
+  const landmarker = await HandLandmarker.createFromOptions(vision, {
+    baseOptions: { modelAssetPath: MODEL_URL, delegate: 'GPU' },
+    runningMode: 'VIDEO',
+    numHands: 2,
+  });
+
+  // Detached video element playing the local camera, only used as the detector input
+  const video = document.createElement('video');
+  video.muted = true;
+  video.playsInline = true;
+  video.srcObject = stream;
+  await video.play();
+
+  const timer = setInterval(() => {
+    if (channel.readyState !== 'open' || video.readyState < 2) return;
+    const result = landmarker.detectForVideo(video, performance.now());
+    channel.send(JSON.stringify({
+      type: 'landmarks',
+      hands: result.landmarks.map((points, i) => ({
+        type: result.handedness[i][0].categoryName,
+        landmarks: points.map((p) => [p.x, p.y, p.z]),
+      })),
+    }));
+  }, 1000 / rate);
+
+  return () => {
+    clearInterval(timer);
+    landmarker.close();
+    video.srcObject = null;
+  };
+}
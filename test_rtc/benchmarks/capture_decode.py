@@ -0,0 +1,74 @@
+"""
+capture_decode.py
+Server decode CPU per session by client capture profile.
+
+Encodes a few seconds of synthetic video with aiortc's VP8 encoder at each
+capture setting, as a browser would send it, then times the server-side
+decode of those packets. Prints decode CPU per second of video, for the
+webcam default against the profiles in rtc/capture.py.
+
+Usage (from test_rtc/):
+    python -m benchmarks.capture_decode [--seconds 5]
+"""
+
+import argparse
+import fractions
+import os
+import time
+
+import cv2
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+import django
+django.setup()
+
+from aiortc.codecs import depayload, get_decoder, get_encoder
+from aiortc.jitterbuffer import JitterFrame
+from aiortc.rtcrtpparameters import RTCRtpCodecParameters
+from av import VideoFrame
+
+from rtc.capture import PROFILES
+
+CODEC = RTCRtpCodecParameters(mimeType='video/VP8', clockRate=90000, payloadType=96)
+
+
+def encoded_frames(width, height, fps, seconds):
+    """VP8 frames of a moving synthetic image, as the decoder receives them."""
+    encoder = get_encoder(CODEC)
+    # Smooth random content, closer to a webcam than pixel noise
+    base = cv2.resize(np.random.randint(0, 255, (height // 16, width // 16, 3), np.uint8), (width, height))
+    frames = []
+    for i in range(int(fps * seconds)):
+        frame = VideoFrame.from_ndarray(np.roll(base, i * 4, axis=1), format='bgr24')
+        frame.pts = int(i * 90000 / fps)
+        frame.time_base = fractions.Fraction(1, 90000)
+        payloads, timestamp = encoder.encode(frame)
+        data = b''.join(depayload(CODEC, payload) for payload in payloads)
+        frames.append(JitterFrame(data=data, timestamp=timestamp))
+    return frames
+
+
+def decode_cpu(frames):
+    decoder = get_decoder(CODEC)
+    start = time.thread_time()
+    for frame in frames:
+        decoder.decode(frame)
+    return time.thread_time() - start
+
+
+def main(seconds):
+    settings = [('webcam default', {"width": 1920, "height": 1080, "frameRate": 30})] + list(PROFILES.items())
+    print(f"{'profile':16s} {'capture':>14s} {'decode ms/s':>12s}")
+    for name, constraints in settings:
+        frames = encoded_frames(constraints["width"], constraints["height"], constraints["frameRate"], seconds)
+        cpu = decode_cpu(frames)
+        capture = f"{constraints['width']}x{constraints['height']}@{constraints['frameRate']}"
+        print(f"{name:16s} {capture:>14s} {cpu / seconds * 1000:12.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+    main(args.seconds)
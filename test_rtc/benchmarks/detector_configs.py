@@ -0,0 +1,228 @@
+"""
+detector_configs.py
+HandDetector settings against latency, throughput, memory and finger states.
+
+Runs findHands and tipsUp over the same frames once per configuration,
+each in a fresh process with a one-thread budget (rtc/threads.py), and
+reports per call latency percentiles, calls per second of wall and of CPU
+time (throughput per core), memory the detector added, and how often the
+finger states agree with the reference configuration (the one the
+detector pool serves): whole frames (same hands, same fingers) and single
+fingers of the hands both found.
+
+The frames are consecutive frames of recorded session segments
+(RTC_RECORDING_DIR, .mkv) or image files given on the command line,
+mirrored as in VideoTransformTrack. Without any, drawn hands are used:
+MediaPipe finds them only now and then, so only latency and memory mean
+much there.
+
+--json writes the results with library versions, for tracking regressions
+across releases.
+
+Usage (from test_rtc/):
+    python -m benchmarks.detector_configs [recordings/<exam>/<session>/*.mkv | frames/*.png]
+        [--frames 150] [--only reference,complexity-0] [--json detector_configs.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+import django
+django.setup()
+
+from rtc.threads import ThreadBudget, available_cpus, worker_env
+
+REFERENCE = 'reference'
+# name -> HandDetector arguments and input width (0 = as recorded)
+CONFIGS = {
+    REFERENCE: {"modelComplexity": 1, "maxHands": 2, "detectionCon": 0.5, "minTrackCon": 0.5,
+                "staticMode": False, "width": 0},
+    'complexity-0': {"modelComplexity": 0},
+    'max-hands-1': {"maxHands": 1},
+    'confidence-0.3': {"detectionCon": 0.3, "minTrackCon": 0.3},
+    'confidence-0.7': {"detectionCon": 0.7, "minTrackCon": 0.7},
+    'static': {"staticMode": True},
+    'width-480': {"width": 480},
+    'width-320': {"width": 320},
+    'complexity-0-width-320': {"modelComplexity": 0, "width": 320},
+}
+
+
+def rss_bytes():
+    with open('/proc/self/statm') as file:
+        return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def drawn_hands(count, width=640, height=480):
+    """A hand drawn over the landmarks of simulator.hand_pose, moving and changing gesture."""
+    import cv2
+    import numpy as np
+    from rtc.simulator import ANSWER_FINGERS, REST_FINGERS, hand_pose
+
+    rng = random.Random(0)
+    gestures = list(ANSWER_FINGERS.values()) + [REST_FINGERS]
+    chains = [[0, 1, 2, 3, 4], [0, 5, 6, 7, 8], [5, 9, 10, 11, 12], [9, 13, 14, 15, 16], [13, 17, 18, 19, 20]]
+    frames = []
+    for i in range(count):
+        img = np.full((height, width, 3), (90, 110, 130), np.uint8)
+        hand = hand_pose(gestures[i // 15 % len(gestures)], 0, 0, "Right", rng, 0.5)
+        points = (np.array(hand["lmList"])[:, :2] * 3 + (width * 0.6 + 20 * np.sin(i / 10), height * 0.55)).astype(int)
+        cv2.fillConvexPoly(img, cv2.convexHull(points[[0, 1, 2, 5, 9, 13, 17]]), (140, 170, 215))
+        for chain in chains:
+            for a, b in zip(chain, chain[1:]):
+                cv2.line(img, tuple(map(int, points[a])), tuple(map(int, points[b])), (140, 170, 215), 26)
+        frames.append(cv2.GaussianBlur(img, (7, 7), 0))
+    return frames
+
+
+def load_frames(paths, count):
+    """Up to count BGR frames of the recordings or images in paths, mirrored; drawn hands without paths."""
+    import av
+    import cv2
+
+    if not paths:
+        return drawn_hands(count)
+    frames = []
+    for path in paths:
+        if os.path.splitext(path)[1].lower() in ('.png', '.jpg', '.jpeg', '.bmp'):
+            frames.append(cv2.flip(cv2.imread(path), 1))
+        else:
+            with av.open(path) as container:
+                for frame in container.decode(video=0):
+                    frames.append(cv2.flip(frame.to_ndarray(format='bgr24'), 1))
+                    if len(frames) >= count:
+                        break
+        if len(frames) >= count:
+            break
+    return frames[:count]
+
+
+def worker(params, paths, count, results):
+    """One configuration in a fresh process: per-frame fingers and the measurements."""
+    os.environ.update(worker_env(1, threads=1)[0])
+    budget = ThreadBudget()
+    budget.apply()
+
+    import cv2
+    import numpy as np
+    budget.configure_opencv()
+    from rtc.HandTrackingModule import HandDetector
+
+    frames = load_frames(paths, count)
+    width = params["width"]
+    if width:
+        frames = [cv2.resize(img, (width, int(img.shape[0] * width / img.shape[1])), interpolation=cv2.INTER_AREA)
+                  for img in frames]
+    baseline = rss_bytes()
+    detector = HandDetector(staticMode=params["staticMode"], maxHands=params["maxHands"],
+                            modelComplexity=params["modelComplexity"],
+                            detectionCon=params["detectionCon"], minTrackCon=params["minTrackCon"])
+    for img in frames[:5]:
+        detector.findHands(img, draw=False)     # Graph start-up and first allocations
+
+    latencies, fingers = [], []
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for img in frames:
+        start = time.perf_counter()
+        hands, _ = detector.findHands(img, draw=False)
+        states = sorted((hand["type"], detector.tipsUp(hand)) for hand in hands)
+        latencies.append(time.perf_counter() - start)
+        fingers.append(states)
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    detector.close()
+
+    latencies = np.array(latencies) * 1000
+    results.put({"latency_ms": {"p50": float(np.percentile(latencies, 50)),
+                                "p90": float(np.percentile(latencies, 90)),
+                                "p99": float(np.percentile(latencies, 99)),
+                                "mean": float(latencies.mean())},
+                 "calls_per_second": len(frames) / wall,
+                 "calls_per_cpu_second": len(frames) / cpu if cpu else None,
+                 "memory_mb": (max(peak, rss_bytes()) - baseline) / 2 ** 20,
+                 "hands_per_frame": sum(map(len, fingers)) / len(frames),
+                 "frames": len(frames),
+                 "fingers": fingers})
+
+
+def run(params, paths, count):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=worker, args=(params, paths, count, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def agreement(fingers, reference):
+    """(share of frames with the reference's hands and fingers, share of fingers of hands both found)."""
+    frames = sum(a == b for a, b in zip(fingers, reference)) / len(reference)
+    same = total = 0
+    for hands, reference_hands in zip(fingers, reference):
+        reference_states = dict(reference_hands)
+        for hand_type, states in hands:
+            if hand_type in reference_states:
+                same += sum(a == b for a, b in zip(states, reference_states[hand_type]))
+                total += len(states)
+    return frames, same / total if total else None
+
+
+def versions():
+    import cv2
+    import mediapipe
+    import numpy
+    return {"python": platform.python_version(), "mediapipe": mediapipe.__version__,
+            "opencv": cv2.__version__, "numpy": numpy.__version__,
+            "machine": platform.machine(), "cores": len(available_cpus())}
+
+
+def main(paths, count, only, json_path):
+    names = only or list(CONFIGS)
+    if REFERENCE not in names:
+        names.insert(0, REFERENCE)
+    print(f"{'recorded' if paths else 'drawn'} frames, up to {count}, one thread per detector")
+    print(f"{'':24s} {'p50 ms':>7s} {'p90 ms':>7s} {'p99 ms':>7s} {'calls/s':>8s} {'/cpu-s':>7s} "
+          f"{'mem MB':>7s} {'hands':>6s} {'frames=':>8s} {'fingers=':>9s}")
+    results = {}
+    for name in names:
+        params = {**CONFIGS[REFERENCE], **CONFIGS[name]}
+        result = run(params, paths, count)
+        fingers = result.pop("fingers")
+        if name == REFERENCE:
+            reference = fingers
+        result["frame_agreement"], result["finger_agreement"] = agreement(fingers, reference)
+        results[name] = {"params": params, **result}
+        latency = result["latency_ms"]
+        finger_agreement = f"{result['finger_agreement']:9.1%}" if result["finger_agreement"] is not None \
+            else f"{'-':>9s}"
+        print(f"{name:24s} {latency['p50']:7.1f} {latency['p90']:7.1f} {latency['p99']:7.1f} "
+              f"{result['calls_per_second']:8.1f} {result['calls_per_cpu_second']:7.1f} "
+              f"{result['memory_mb']:7.1f} {result['hands_per_frame']:6.2f} "
+              f"{result['frame_agreement']:8.1%} {finger_agreement}")
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as file:
+            json.dump({"versions": versions(), "source": paths or 'drawn', "reference": REFERENCE,
+                       "configs": results}, file, indent=2)
+        print(f"results written to {json_path}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='*', help='Recorded segments or image files')
+    parser.add_argument('--frames', type=int, default=150)
+    parser.add_argument('--only', type=lambda names: names.split(','),
+                        help=f"Comma separated configurations of {', '.join(CONFIGS)}")
+    parser.add_argument('--json', metavar='FILE', help='Write the results as JSON')
+    args = parser.parse_args()
+    unknown = set(args.only or ()) - set(CONFIGS)
+    if unknown:
+        parser.error(f"unknown configurations: {', '.join(sorted(unknown))}")
+    main(args.inputs, args.frames, args.only, args.json)
@@ -0,0 +1,64 @@
+"""
+detector_pool.py
+Time from join to first annotated frame, cold detectors against the pool.
+
+Each session builds a VideoTransformTrack on a synthetic camera, waits for
+its detector checkout and pulls its first frame, which runs hand detection. "cold" empties the pool so every
+session builds and warms its own graph, "pooled" checks out warm detectors.
+Sessions arrive --gap seconds apart, which gives the refill thread time to
+keep up like it would between real joins.
+
+Usage (from test_rtc/):
+    python -m benchmarks.detector_pool [--sessions 20] [--gap 0.3]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+import django
+django.setup()
+
+from rtc.media import VideoTransformTrack, relay
+from rtc.detector_pool import detector_pool
+from rtc.tracing import percentile
+
+from .session_soak import NullChannel, SyntheticCamera
+
+
+async def run(sessions, gap):
+    samples = []
+    for _ in range(sessions):
+        camera = SyntheticCamera()
+        start = time.perf_counter()
+        track = VideoTransformTrack(relay.subscribe(camera), NullChannel(), 'Electrical.csv')
+        await track.detector_checkout
+        await track.recv()
+        samples.append(time.perf_counter() - start)
+        track.stop()
+        camera.stop()
+        await asyncio.sleep(gap)
+    return samples
+
+
+async def main(sessions, gap):
+    target = detector_pool.target
+    print(f"{'mode':>7s} {'p50 ms':>8s} {'p90 ms':>8s} {'max ms':>8s}")
+    for mode in ('cold', 'pooled'):
+        detector_pool.target = target if mode == 'pooled' else 0
+        detector_pool.max_idle = detector_pool.target
+        while detector_pool.idle:
+            detector_pool.close(detector_pool.idle.popleft())
+        await detector_pool.fill()
+        samples = [s * 1000 for s in await run(sessions, gap)]
+        print(f"{mode:>7s} {percentile(samples, 50):8.1f} {percentile(samples, 90):8.1f} {max(samples):8.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--gap', type=float, default=0.3)
+    args = parser.parse_args()
+    asyncio.run(main(args.sessions, args.gap))
@@ -0,0 +1,114 @@
+"""
+frame_latency.py
+End-to-end frame latency on a slow server: in-order against drain-to-latest.
+
+A synthetic 30 fps camera that pushes frames into a queue on its own clock,
+like a remote track's jitter buffer, feeds one session whose every returned frame
+costs an extra --work ms of blocking work (a loaded node), more than the
+frame interval. The old consumption pulls frames from the relay in order,
+so the backlog and the latency grow for as long as the load lasts; the
+track now processes only the newest frame and counts the ones it drops.
+Prints latency (capture to self-view frame out) per second of session, the
+frames dropped, and how far durations since the first frame are off when
+timed by arrival, as gestures were, and by media_time, as they are now.
+
+Usage (from test_rtc/):
+    python -m benchmarks.frame_latency [--seconds 6] [--work 50]
+"""
+
+import argparse
+import asyncio
+import fractions
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+import django
+django.setup()
+
+from rtc.media import VideoTransformTrack, relay
+
+from av import VideoFrame
+
+from .session_soak import NullChannel, SyntheticCamera
+
+
+class PushCamera(SyntheticCamera):
+    """Queues every frame when it is due, whether or not anyone reads it yet."""
+
+    def __init__(self, fps=30):
+        super().__init__()
+        self.fps = fps
+        self.queue = asyncio.Queue()
+        self.start = time.monotonic()
+        self.producer = asyncio.ensure_future(self.produce())
+
+    async def produce(self):
+        count = 0
+        while self.readyState == "live":
+            # After a blocked loop, catch up with every frame that fell due meanwhile
+            while count <= (time.monotonic() - self.start) * self.fps:
+                frame = VideoFrame.from_ndarray(self.image, format="bgr24")
+                frame.pts = count * 90000 // self.fps
+                frame.time_base = fractions.Fraction(1, 90000)
+                self.queue.put_nowait(frame)
+                count += 1
+            await asyncio.sleep(self.start + count / self.fps - time.monotonic())
+
+    async def recv(self):
+        return await self.queue.get()
+
+    def stop(self):
+        super().stop()
+        self.producer.cancel()
+
+
+class InOrderTrack(VideoTransformTrack):
+    """The track as it consumed frames before: every frame, oldest first."""
+
+    async def next_frame(self):
+        frame = await self.track.recv()
+        self.capture.update(frame)
+        return frame
+
+
+async def run(track_class, seconds, work):
+    camera = PushCamera()
+    track = track_class(relay.subscribe(camera), NullChannel(), 'Electrical.csv', preview=(320, 30))
+    await track.quiz_start()
+    latencies, wall_error, media_error = [[]], 0.0, 0.0
+    start = time.monotonic()
+    first = None
+    while time.monotonic() - start < seconds:
+        frame = await track.recv()
+        now = time.monotonic()
+        captured = camera.start + float(frame.pts * frame.time_base)
+        if now - start > len(latencies):
+            latencies.append([])
+        latencies[-1].append(now - captured)
+        # How far durations since the first frame are off, timed by arrival (the old
+        # gesture clock) and by media_time, against the capture clock
+        first = first or (now, track.media_time(frame), captured)
+        wall_error = max(wall_error, abs((now - first[0]) - (captured - first[2])))
+        media_error = max(media_error, abs((track.media_time(frame) - first[1]) - (captured - first[2])))
+        time.sleep(work / 1000)
+    dropped = track.frames_dropped
+    track.stop()
+    camera.stop()
+    return [sum(second) / len(second) for second in latencies if second], dropped, wall_error, media_error
+
+
+async def main(seconds, work):
+    for name, track_class in (('in order', InOrderTrack), ('drain to latest', VideoTransformTrack)):
+        latencies, dropped, wall_error, media_error = await run(track_class, seconds, work)
+        print(f"{name}: dropped {dropped} frames, duration error by arrival time "
+              f"{wall_error * 1000:.0f} ms, by media time {media_error * 1000:.0f} ms")
+        print("  latency ms per second: " + " ".join(f"{latency * 1000:.0f}" for latency in latencies))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=6)
+    parser.add_argument('--work', type=float, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.seconds, args.work))
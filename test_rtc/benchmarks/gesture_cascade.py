@@ -0,0 +1,122 @@
+"""
+gesture_cascade.py
+Gesture accuracy, classifier escalation and latency: rules, classifier, cascade.
+
+The rules are the quiz's own (landmarks.tips_up, see gestures.rule_gesture),
+so they need landmark positions; model/data only has the classifier's angle
+features. Two parts then:
+- recorded: the Keras classifier alone over model/data (real MediaPipe hands,
+  labelled).
+- synthetic: one session of simulator hands (simulator.hand_pose) with
+  --noise pixels of landmark noise, in runs of --segment frames of one
+  gesture, in shuffled order, so gestures change the way they do in an exam.
+  Every frame goes through the rules alone, the classifier alone, and the
+  cascade (rules, classifier when the margin is under --margin or the rules
+  disagree with the previous decision). "rules >= m" is the rules' accuracy
+  on the frames whose margin is at least m, which is what calibrates the
+  margin; simulator hands are not drawn to real proportions, so the
+  classifier's accuracy on them understates it.
+Prints accuracy, the share of frames sent to the classifier, and per-frame
+latency. Needs TensorFlow.
+
+Usage (from test_rtc/):
+    python -m benchmarks.gesture_cascade [--model 6] [--margin 0.1 0.2 0.3] [--noise 2] [--segment 30]
+"""
+
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+import django
+django.setup()
+
+from rtc.gestures import (CLASS_ANSWERS, CLASS_NAMES, GestureCascade, GestureClassifier, angle_features, load_dataset,
+                          rule_gesture)
+from rtc.simulator import ANSWER_FINGERS, REST_FINGERS, hand_pose
+
+MODEL_DIR = 'model'
+WIDTH, HEIGHT = 640, 480
+
+
+def session_order(labels, segment, rng):
+    runs = [np.arange(start, min(start + segment, len(labels))) for start in range(0, len(labels), segment)]
+    rng.shuffle(runs)
+    return np.concatenate(runs)
+
+
+def synthetic_session(frames, segment, noise, seed=0):
+    """(hands, answers): runs of segment frames showing one gesture, rest included, drawn at random."""
+    rng = random.Random(seed)
+    hands, answers = [], []
+    while len(hands) < frames:
+        answer = rng.choice(CLASS_ANSWERS)
+        fingers = ANSWER_FINGERS[answer] if answer else REST_FINGERS
+        cx, cy = rng.uniform(150, 490), rng.uniform(150, 330)
+        for _ in range(segment):
+            hands.append(hand_pose(fingers, cx, cy, "Right", rng, noise))
+            answers.append(answer)
+    return hands[:frames], answers[:frames]
+
+
+def timed(classify, items):
+    answers, latencies = [], []
+    for item in items:
+        start = time.perf_counter()
+        answers.append(classify(item))
+        latencies.append(time.perf_counter() - start)
+    return answers, np.array(latencies) * 1e6
+
+
+def report(name, answers, truth, latencies, escalated=None):
+    accuracy = np.mean([answer == expected for answer, expected in zip(answers, truth)])
+    escalation = f"{escalated:10.1%}" if escalated is not None else f"{'-':>10s}"
+    print(f"{name:18s} {accuracy:9.1%} {escalation} {latencies.mean():9.1f} {np.percentile(latencies, 99):9.1f}")
+
+
+def main(model, margins, noise, segment):
+    classifier = GestureClassifier(os.path.join(MODEL_DIR, f'gesture_quiz{model}.h5'),
+                                   os.path.join(MODEL_DIR, f'normalization_mean{model}.npy'),
+                                   os.path.join(MODEL_DIR, f'normalization_std{model}.npy'),
+                                   CLASS_NAMES[1:] if model == '5' else CLASS_NAMES)  # Generation 5 has no 'no'
+    features, labels = load_dataset(os.path.join(MODEL_DIR, 'data'))
+    order = session_order(labels, segment, np.random.default_rng(0))
+    features, truth = features[order], [CLASS_ANSWERS[label] for label in labels[order]]
+    classifier.classify(features[0])    # First call builds the graph
+
+    hands, hand_truth = synthetic_session(len(features), segment, noise)
+    _, feature_times = timed(lambda hand: angle_features(hand["lmList"], WIDTH, HEIGHT), hands[:1000])
+    print(f"model {model}; angle features from landmarks: {feature_times.mean():.1f} us")
+    print(f"{'':18s} {'accuracy':>9s} {'escalated':>10s} {'mean us':>9s} {'p99 us':>9s}")
+
+    print(f"recorded, {len(features)} frames")
+    answers, latencies = timed(lambda row: classifier.classify(row)[0], features)
+    report('classifier', answers, truth, latencies, 1.0)
+
+    print(f"synthetic, {len(hands)} frames, {noise:g} px noise")
+    rules, rule_latencies = timed(rule_gesture, hands)
+    report('rules', [answer for answer, _ in rules], hand_truth, rule_latencies)
+    answers, latencies = timed(lambda hand: classifier.classify(angle_features(hand["lmList"], WIDTH, HEIGHT))[0],
+                               hands)
+    report('classifier', answers, hand_truth, latencies, 1.0)
+    for margin in margins:
+        sure = [(answer, expected) for (answer, rule_margin), expected in zip(rules, hand_truth)
+                if rule_margin >= margin]
+        report(f'rules >= {margin:g}', *zip(*sure), rule_latencies, 1 - len(sure) / len(hands))
+    for margin in margins:
+        cascade = GestureCascade(classifier, margin)
+        answers, latencies = timed(lambda hand: cascade.classify(hand, WIDTH, HEIGHT), hands)
+        report(f'cascade {margin:g}', answers, hand_truth, latencies, cascade.stats()["escalation_rate"])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='6', help='Generation: model/gesture_quiz<N>.h5 and its normalization')
+    parser.add_argument('--margin', type=float, nargs='+', default=[0.1, 0.2, 0.3])
+    parser.add_argument('--noise', type=float, default=2.0, help='Landmark noise of the synthetic hands, pixels')
+    parser.add_argument('--segment', type=int, default=30)
+    args = parser.parse_args()
+    main(args.model, args.margin, args.noise, args.segment)
@@ -0,0 +1,105 @@
+"""
+ice_setup.py
+Time from offer to connected for the old and the new ICE path.
+
+Runs an in-process client/server pair of aiortc peers against a local
+STUN stand-in that answers Binding requests after an artificial delay.
+
+- before: setLocalDescription, then a second RTCIceGatherer gather per offer.
+- after:  one gather inside setLocalDescription, configured by IceServerCache.
+
+Each is measured with the stand-in as the first STUN server, and with an
+unreachable first STUN server (where aioice waits for its timeout).
+
+Usage (from test_rtc/):
+    python -m benchmarks.ice_setup [--runs 5] [--delay 0.05]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from aioice import stun
+from aioice.ice import get_host_addresses
+from aiortc import RTCConfiguration, RTCIceGatherer, RTCIceServer, RTCPeerConnection
+
+from rtc.ice import IceServerCache
+
+
+class StunStandIn(asyncio.DatagramProtocol):
+    """Answers STUN Binding requests with the sender address after delay seconds."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            request = stun.parse_message(data)
+        except ValueError:
+            return
+        response = stun.Message(message_method=stun.Method.BINDING,
+                                message_class=stun.Class.RESPONSE,
+                                transaction_id=request.transaction_id)
+        response.attributes['XOR-MAPPED-ADDRESS'] = addr
+        asyncio.get_running_loop().call_later(self.delay, self.transport.sendto, bytes(response), addr)
+
+
+async def connect_once(server_config, second_gather):
+    client = RTCPeerConnection()
+    server = RTCPeerConnection(configuration=server_config)
+    client.createDataChannel('message')
+    connected = asyncio.Event()
+
+    @server.on("connectionstatechange")
+    def on_state():
+        if server.connectionState == "connected":
+            connected.set()
+
+    await client.setLocalDescription(await client.createOffer())
+    start = time.perf_counter()
+    await server.setRemoteDescription(client.localDescription)
+    await server.setLocalDescription(await server.createAnswer())
+    if second_gather:
+        gatherer = RTCIceGatherer(iceServers=server_config.iceServers)
+        await gatherer.gather()
+        await gatherer._connection.close()
+    await client.setRemoteDescription(server.localDescription)
+    await asyncio.wait_for(connected.wait(), 30)
+    elapsed = time.perf_counter() - start
+
+    await client.close()
+    await server.close()
+    return elapsed
+
+
+async def main(runs, delay):
+    host = get_host_addresses(use_ipv4=True, use_ipv6=False)[0]
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(lambda: StunStandIn(delay), local_addr=('0.0.0.0', 0))
+    port = transport.get_extra_info('sockname')[1]
+
+    stand_in = RTCIceServer(f"stun:{host}:{port}")
+    unreachable = RTCIceServer("stun:192.0.2.1:3478")     # TEST-NET-1, never answers
+    scenarios = {"stand-in first": [stand_in], "unreachable first": [unreachable, stand_in]}
+
+    for name, servers in scenarios.items():
+        cache = IceServerCache(servers)
+        await cache.refresh()
+        before = [await connect_once(RTCConfiguration(iceServers=servers), True) for _ in range(runs)]
+        after = [await connect_once(cache.configuration(), False) for _ in range(runs)]
+        print(f"{name:18s} before: median {statistics.median(before) * 1000:7.1f} ms   "
+              f"after: median {statistics.median(after) * 1000:7.1f} ms")
+    transport.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--delay', type=float, default=0.05, help='STUN stand-in response delay (s)')
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.delay))
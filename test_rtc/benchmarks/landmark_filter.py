@@ -0,0 +1,101 @@
+"""
+landmark_filter.py
+Landmark accuracy and finger-state stability against detection interval.
+
+A synthetic hand on a 30 fps frame cycles through the answer gestures,
+moving to a new spot for each and then holding still. Every detection sees
+it with Gaussian landmark noise, like MediaPipe's jitter. For detection on
+every 1st, 3rd, 5th and 6th frame it compares holding the last raw detection
+against HandFilter (smoothed on detection frames, extrapolated in between):
+
+- error: mean landmark distance to the true hand over all frames, in pixels
+  (what the overlay shows)
+- fingers: share of detection frames where tips_up matches the true gesture
+- flips: tips_up changes per second, the true gestures change 0.4 times per second
+
+Usage (from test_rtc/):
+    python -m benchmarks.landmark_filter [--seconds 60] [--noise 3]
+"""
+
+import argparse
+import math
+import os
+
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+import django
+django.setup()
+
+from rtc.landmarks import HandFilter, hand_dict, tips_up
+
+FPS = 30
+GESTURES = [[0, 1, 0, 0, 0], [0, 1, 1, 0, 0], [0, 1, 1, 1, 0], [0, 1, 1, 1, 1], [1, 0, 0, 0, 0]]
+GESTURE_SECONDS = 2.5
+
+
+def true_hand(t):
+    """
+    A right hand at time t. Each gesture is held for GESTURE_SECONDS: the hand
+    travels to a new spot for the first second, then holds still.
+    """
+    period, phase = divmod(t, GESTURE_SECONDS)
+    fingers = GESTURES[int(period) % len(GESTURES)]
+    travel = min(phase, 1.0)
+    start, end = spot(period), spot(period + 1)
+    ease = (1 - math.cos(math.pi * travel)) / 2
+    cx, cy = start[0] + (end[0] - start[0]) * ease, start[1] + (end[1] - start[1]) * ease
+    points = [(0, 60)]                                  # Wrist
+    # Thumb: tip left of the IP joint when up (tips_up rule for a right hand), folded fingers only just
+    points += [(-25, 45), (-40, 30), (-50, 15), (-58, 8) if fingers[0] else (-44, 10)]
+    for i, x in enumerate((-20, 0, 20, 38)):
+        up = fingers[i + 1]
+        points += [(x, 20), (x, 0), (x, -18) if up else (x, -6), (x, -34) if up else (x, 6)]
+    return np.array([[cx + x, cy + y, 0] for x, y in points], dtype=float), fingers
+
+
+def spot(n):
+    """Where the hand rests during the n-th gesture."""
+    return 320 + 160 * math.sin(2.3 * n), 260 + 80 * math.cos(1.7 * n)
+
+
+def run(every, use_filter, seconds, noise, rng):
+    hand_filter = HandFilter()
+    shown = None
+    errors, correct, checked, flips, last_fingers = [], 0, 0, 0, None
+    for i in range(int(seconds * FPS)):
+        t = i / FPS
+        truth, fingers = true_hand(t)
+        if i % every == 0:
+            seen = truth + rng.normal(0, noise, truth.shape) * [1, 1, 0]
+            hand = hand_dict(np.rint(seen).astype(int).tolist(), "Right")
+            if use_filter:
+                hand = hand_filter.update([hand], t)[0]
+            shown = hand
+            detected = tips_up(hand)
+            checked += 1
+            correct += detected == fingers
+            flips += last_fingers is not None and detected != last_fingers
+            last_fingers = detected
+        elif use_filter:
+            shown = hand_filter.predict(t)[0]
+        errors.append(np.linalg.norm(np.asarray(shown["lmList"])[:, :2] - truth[:, :2], axis=1).mean())
+    return np.mean(errors), correct / checked, flips / seconds
+
+
+def main(seconds, noise):
+    rng = np.random.default_rng(0)
+    print(f"{'every':>5s} {'landmarks':10s} {'error px':>9s} {'fingers':>8s} {'flips/s':>8s}")
+    for every in (1, 3, 5, 6):
+        for use_filter in (False, True):
+            error, accuracy, flips = run(every, use_filter, seconds, noise, rng)
+            print(f"{every:5d} {'filtered' if use_filter else 'raw/held':10s} "
+                  f"{error:9.2f} {accuracy:8.1%} {flips:8.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--noise', type=float, default=3)
+    args = parser.parse_args()
+    main(args.seconds, args.noise)
@@ -0,0 +1,82 @@
+"""
+landmark_ingest.py
+Server CPU per session: server-side detection against landmark ingest.
+
+Runs one quiz session in real time on a paced synthetic 30 fps camera, once
+with the server detecting hands on every third frame, and once in
+landmark-ingest mode, fed a client landmark message at --rate per second
+while a sample of frames is spot-checked. Prints process CPU per second of
+session and, for ingest, the spot checks made.
+
+Usage (from test_rtc/):
+    python -m benchmarks.landmark_ingest [--seconds 10] [--rate 10]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+import django
+django.setup()
+
+from rtc.media import VideoTransformTrack, relay
+
+from .session_soak import NullChannel, SyntheticCamera
+
+# A flat open hand in normalized coordinates, as a client would report it
+HAND = {"type": "Right",
+        "landmarks": [[0.5 + 0.01 * (i % 5), 0.7 - 0.02 * i, 0.0] for i in range(21)]}
+
+
+class PacedCamera(SyntheticCamera):
+    """Delivers frames no faster than real time."""
+
+    async def recv(self):
+        frame = await super().recv()
+        if not hasattr(self, 'start'):
+            self.start = time.monotonic()
+        delay = self.start + float(frame.pts * frame.time_base) - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return frame
+
+
+async def feed(track, rate):
+    while track.readyState == "live":
+        await track.ingest_landmarks({"type": "landmarks", "hands": [HAND, HAND]})
+        await asyncio.sleep(1 / rate)
+
+
+async def run(seconds, landmark_rate):
+    camera = PacedCamera()
+    track = VideoTransformTrack(relay.subscribe(camera), NullChannel(), 'Electrical.csv',
+                                landmark_rate=landmark_rate)
+    await track.quiz_start()
+    feeder = asyncio.ensure_future(feed(track, landmark_rate)) if landmark_rate else None
+    cpu_start, start = time.process_time(), time.monotonic()
+    while time.monotonic() - start < seconds:
+        await track.recv()
+    cpu, elapsed = time.process_time() - cpu_start, time.monotonic() - start
+    checks = track.audit.checks if track.audit else None
+    track.stop()
+    camera.stop()
+    if feeder:
+        await feeder
+    return cpu / elapsed, checks
+
+
+async def main(seconds, rate):
+    print(f"{'mode':16s} {'cpu ms/s':>9s} {'spot checks':>12s}")
+    for name, landmark_rate in (('server detect', 0), ('landmark ingest', rate)):
+        cpu, checks = await run(seconds, landmark_rate)
+        print(f"{name:16s} {cpu * 1000:9.1f} {checks if checks is not None else '-':>12}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--rate', type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.seconds, args.rate))
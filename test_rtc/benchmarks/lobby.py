@@ -0,0 +1,95 @@
+"""
+lobby.py
+Session CPU of the lobby (before quiz_start) per profile, against the exam.
+
+Plays the synthetic exam video of motion_gate.py through one
+VideoTransformTrack as fast as it is processed and prints process CPU per
+second of video: in the lobby as it was (the exam's detection rate on full
+size frames), with the lobby profile, with the lobby profile and no overlay,
+and after quiz_start. Then checks that quiz_start switches profiles on the
+next frame.
+
+Usage (from test_rtc/):
+    python -m benchmarks.lobby [--seconds 30] [--rate 2] [--width 320]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+import django
+django.setup()
+
+from aiortc.mediastreams import MediaStreamError
+
+from rtc.media import VideoTransformTrack, relay
+
+from .motion_gate import FPS, Player, synthetic_exam
+from .session_soak import NullChannel
+
+
+async def run(frames, seconds, rate, width, exam=False):
+    player = Player(frames, int(seconds * FPS))
+    track = VideoTransformTrack(relay.subscribe(player, buffered=False), NullChannel(), 'Electrical.csv')
+    track.lobby_rate, track.lobby_width = rate, width
+    await track.detector_checkout        # Faster than real time, the lobby would not wait for it
+    if exam:
+        await track.quiz_start()
+    start = time.process_time()
+    try:
+        while True:
+            await track.recv()
+    except MediaStreamError:
+        pass
+    cpu = time.process_time() - start
+    stats = track.lobby_stats()
+    track.stop()
+    player.stop()
+    return cpu / seconds, stats
+
+
+async def switch(frames):
+    """Frames between quiz_start and the first exam detection."""
+    player = Player(frames, 4 * FPS)
+    track = VideoTransformTrack(relay.subscribe(player, buffered=False), NullChannel(), 'Electrical.csv')
+    await track.detector_checkout
+    for _ in range(FPS):
+        await track.recv()
+    await track.quiz_start()
+    detections = track.motion.checks if track.motion else None
+    first = None
+    for i in range(FPS):
+        await track.recv()
+        if track.motion and track.motion.checks > detections:
+            first = i
+            break
+    track.stop()
+    player.stop()
+    return first
+
+
+async def main(seconds, rate, width):
+    frames = synthetic_exam(seconds, 0.3)
+    print(f"synthetic video, {seconds:.0f} s")
+    print(f"{'':26s} {'cpu ms/s':>9s} {'lobby detections/s':>19s}")
+    for name, profile, exam in (('lobby, exam rate/size', (10, 0), False),
+                                (f'lobby profile ({rate}/s, {width})', (rate, width), False),
+                                (f'lobby, no overlay ({width})', (0, width), False),
+                                ('exam', (rate, width), True)):
+        cpu, stats = await run(frames, seconds, *profile, exam=exam)
+        detections = f"{stats['lobby_detections'] / stats['lobby_seconds']:19.1f}" \
+            if stats['lobby_seconds'] else f"{'-':>19s}"
+        print(f"{name:26s} {cpu * 1000:9.1f} {detections}")
+    first = await switch(frames)
+    print(f"first exam frame checked {first} frame(s) after quiz_start")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--rate', type=float, default=2, help='Lobby detections per second')
+    parser.add_argument('--width', type=int, default=320, help='Lobby frame width')
+    args = parser.parse_args()
+    asyncio.run(main(args.seconds, args.rate, args.width))
@@ -0,0 +1,87 @@
+"""
+login_throughput.py
+Login lookups per second during a login storm.
+
+Creates a throwaway SQLite database (or uses --mysql with the project
+settings), fills it with users and exams, then runs concurrent logins
+through the database thread pool like the consumer does:
+
+- two-query: Users.objects.get, then Exams.objects.get (the old lookup)
+- joined:    lookup_assignment, one query
+- cached:    authenticate_and_get_exam path with the assignment cache warm
+
+Usage (from test_rtc/):
+    python -m benchmarks.login_throughput [--users 500] [--exams 20] [--mysql]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import django
+from django.conf import settings
+
+
+def setup(use_mysql):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+    if not use_mysql:
+        settings.DATABASES['default'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(tempfile.mkdtemp(), 'bench.sqlite3'),
+            'CONN_MAX_AGE': 60,
+        }
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def populate(n_users, n_exams):
+    from rtc.models import Users, Exams
+    Users.objects.all().delete()
+    Exams.objects.all().delete()
+    Exams.objects.bulk_create([Exams(ExamId=f'E{i}', ExamFile='Electrical.csv') for i in range(n_exams)])
+    Users.objects.bulk_create([Users(Username=f'user{i}', Password='pw', UserExamId=f'E{i % n_exams}')
+                               for i in range(n_users)])
+
+
+def two_queries(username):
+    from rtc.models import Users, Exams
+    user = Users.objects.get(Username=username)
+    exam = Exams.objects.get(ExamId=user.UserExamId)
+    return exam.ExamFile
+
+
+async def storm(name, lookup, usernames):
+    start = time.perf_counter()
+    await asyncio.gather(*(lookup(username) for username in usernames))
+    elapsed = time.perf_counter() - start
+    print(f"{name:10s} {len(usernames) / elapsed:10.0f} logins/s   ({elapsed * 1000:.0f} ms for {len(usernames)})")
+
+
+async def main(n_users):
+    from channels.db import database_sync_to_async
+    from rtc.consumers import ServerConsumer
+    from rtc.logins import assignment_cache, lookup_assignment
+
+    usernames = [f'user{i}' for i in range(n_users)]
+    consumer = ServerConsumer()
+
+    await storm("two-query", database_sync_to_async(two_queries), usernames)
+    await storm("joined", database_sync_to_async(lookup_assignment), usernames)
+    # The first storm fills the cache, the second is served from it
+    assignment_cache.entries.clear()
+    await storm("cold cache", lambda u: consumer.authenticate_and_get_exam(u, 'pw'), usernames)
+    await storm("warm cache", lambda u: consumer.authenticate_and_get_exam(u, 'pw'), usernames)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--exams', type=int, default=20)
+    parser.add_argument('--mysql', action='store_true', help='Use the configured database instead of SQLite')
+    args = parser.parse_args()
+    setup(args.mysql)
+    populate(args.users, args.exams)
+    asyncio.run(main(args.users))
@@ -0,0 +1,134 @@
+"""
+motion_gate.py
+Session CPU and detection skip rate with and without the motion gate.
+
+Plays exam video through one VideoTransformTrack as fast as it is processed,
+once detecting on every third frame as before and once behind the motion
+gate of rtc/motion.py, and prints process CPU per second of video and the
+share of detections skipped.
+
+The video is either recorded session segments (RTC_RECORDING_DIR, .mkv) given
+on the command line, or a synthetic exam: a still, sensor-noisy scene where
+a hand-sized blob gestures for --active of every 10 seconds.
+
+Usage (from test_rtc/):
+    python -m benchmarks.motion_gate [recordings/<exam>/<session>/*.mkv] [--seconds 30] [--active 0.3]
+"""
+
+import argparse
+import asyncio
+import fractions
+import os
+import time
+
+import av
+import cv2
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+import django
+django.setup()
+
+from aiortc import MediaStreamTrack
+from aiortc.mediastreams import MediaStreamError
+from av import VideoFrame
+
+from rtc import motion
+from rtc.media import VideoTransformTrack, relay
+
+from .session_soak import NullChannel
+
+FPS = 30
+
+
+def synthetic_exam(seconds, active, width=640, height=480):
+    """Frames of a student reading, then gesturing, as yuv420p VideoFrames (10 s, looped)."""
+    rng = np.random.default_rng(0)
+    scene = cv2.resize(rng.integers(40, 200, (height // 20, width // 20, 3), dtype=np.uint8), (width, height))
+    frames = []
+    for i in range(min(int(seconds * FPS), 10 * FPS)):
+        t = i / FPS
+        img = scene.copy()
+        # Hands rest on the desk; while gesturing, one moves about
+        phase = min(t % 10, active * 10)
+        cx = int(width * 0.65 + 60 * np.sin(phase * 4))
+        cy = int(height * 0.6 + 40 * np.cos(phase * 3))
+        cv2.ellipse(img, (int(width * 0.3), int(height * 0.75)), (55, 70), 0, 0, 360, (120, 150, 200), -1)
+        cv2.ellipse(img, (cx, cy), (55, 70), 0, 0, 360, (120, 150, 200), -1)
+        noise = rng.normal(0, 2.5, img.shape)      # Webcam sensor noise
+        img = np.clip(img + noise, 0, 255).astype(np.uint8)
+        frames.append(VideoFrame.from_ndarray(img, format='bgr24').reformat(format='yuv420p'))
+    return frames
+
+
+def recorded(paths, seconds):
+    frames = []
+    for path in paths:
+        with av.open(path) as container:
+            for frame in container.decode(video=0):
+                frames.append(frame.reformat(format='yuv420p'))
+                if len(frames) >= seconds * FPS:
+                    return frames
+    return frames
+
+
+class Player(MediaStreamTrack):
+    """Plays prepared frames as a 30 fps source, looping, as fast as they are read."""
+    kind = "video"
+
+    def __init__(self, frames, count):
+        super().__init__()
+        self.frames = frames
+        self.count = count
+        self.index = 0
+
+    async def recv(self):
+        if self.readyState != "live" or self.index >= self.count:
+            raise MediaStreamError
+        await asyncio.sleep(0)
+        frame = self.frames[self.index % len(self.frames)]
+        frame.pts = self.index * 3000
+        frame.time_base = fractions.Fraction(1, 90000)
+        self.index += 1
+        return frame
+
+
+async def run(frames, seconds, gated):
+    player = Player(frames, int(seconds * FPS))
+    track = VideoTransformTrack(relay.subscribe(player, buffered=False), NullChannel(), 'Electrical.csv')
+    if not gated:
+        track.motion = None
+    await track.detector_checkout        # A cold build is not session CPU
+    await track.quiz_start()
+    start = time.process_time()
+    try:
+        while True:
+            await track.recv()
+    except MediaStreamError:
+        pass
+    cpu = time.process_time() - start
+    stats = track.motion.stats() if track.motion else None
+    track.stop()
+    player.stop()
+    return cpu / seconds, stats
+
+
+async def main(paths, seconds, active):
+    frames = recorded(paths, seconds) if paths else synthetic_exam(seconds, active)
+    seconds = min(seconds, len(frames) / FPS) if paths else seconds
+    print(f"{'recorded' if paths else 'synthetic'} video, {seconds:.0f} s")
+    print(f"{'':14s} {'cpu ms/s':>9s} {'skipped':>8s}")
+    for name, gated in (('every 3rd', False), ('motion gate', True)):
+        cpu, stats = await run(frames, seconds, gated)
+        skipped = f"{stats['motion_skip_rate']:8.1%}" if stats else f"{'-':>8s}"
+        print(f"{name:14s} {cpu * 1000:9.1f} {skipped}")
+    print(f"node totals: {motion.stats()}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recordings', nargs='*')
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--active', type=float, default=0.3, help='Share of the synthetic exam spent gesturing')
+    args = parser.parse_args()
+    asyncio.run(main(args.recordings, args.seconds, args.active))
@@ -0,0 +1,65 @@
+"""
+preview_encode.py
+Cost of the self-view returned to the student, by preview setting.
+
+A VideoTransformTrack reads a synthetic 30 fps camera and every frame it
+returns is encoded with aiortc's VP8 encoder, as the sender would. For each
+setting the encoder CPU and the whole pipeline CPU are printed per second of
+source video. Detection runs on the same full-size frames in every setting.
+
+Usage (from test_rtc/):
+    python -m benchmarks.preview_encode [--seconds 10] [--width 640] [--height 480]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+import django
+django.setup()
+
+from aiortc.codecs import get_encoder
+from aiortc.rtcrtpparameters import RTCRtpCodecParameters
+
+from rtc.media import VideoTransformTrack, relay
+
+from .session_soak import NullChannel, SyntheticCamera
+
+SETTINGS = [(0, 0), (640, 15), (320, 10), (160, 5)]     # (width, max fps), 0 = as received / uncapped
+
+
+async def run(preview, seconds, width, height):
+    camera = SyntheticCamera(width, height)
+    track = VideoTransformTrack(relay.subscribe(camera), NullChannel(), 'Electrical.csv', preview=preview)
+    encoder = get_encoder(RTCRtpCodecParameters(mimeType='video/VP8', clockRate=90000, payloadType=96))
+    encode_cpu = 0.0
+    cpu_start = time.process_time()
+    while camera.pts < seconds * 90000:
+        frame = await track.recv()
+        start = time.thread_time()
+        encoder.encode(frame)
+        encode_cpu += time.thread_time() - start
+    cpu = time.process_time() - cpu_start
+    sent = track.preview_sent
+    track.stop()
+    camera.stop()
+    return sent, encode_cpu, cpu
+
+
+async def main(seconds, width, height):
+    print(f"{'width':>6s} {'max fps':>8s} {'sent':>6s} {'encode ms/s':>12s} {'pipeline ms/s':>14s}")
+    for preview in SETTINGS:
+        sent, encode_cpu, cpu = await run(preview, seconds, width, height)
+        print(f"{preview[0] or width:6d} {preview[1] or 30:8d} {sent:6d} "
+              f"{encode_cpu / seconds * 1000:12.1f} {cpu / seconds * 1000:14.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    args = parser.parse_args()
+    asyncio.run(main(args.seconds, args.width, args.height))
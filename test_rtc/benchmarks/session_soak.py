@@ -0,0 +1,81 @@
+"""
+session_soak.py
+Join/leave soak test of the per-session media pipeline.
+
+Each cycle builds what a join builds: a relay subscription of a
+synthetic camera track and a VideoTransformTrack with its MediaPipe graph.
+It then pulls a few frames and tears the track down the way
+SessionManager does. RSS, open graphs and live relay proxies are printed
+every --every cycles and should stay flat.
+
+Usage (from test_rtc/):
+    python -m benchmarks.session_soak [--cycles 200] [--every 20] [--frames 6]
+"""
+
+import argparse
+import asyncio
+import fractions
+import os
+
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+import django
+django.setup()
+
+from aiortc import MediaStreamTrack
+from aiortc.mediastreams import MediaStreamError
+from av import VideoFrame
+
+from rtc.media import VideoTransformTrack, relay
+from rtc.sessions import session_manager, rss_bytes
+
+
+class SyntheticCamera(MediaStreamTrack):
+    kind = "video"
+
+    def __init__(self, width=640, height=480):
+        super().__init__()
+        self.image = np.random.randint(0, 255, (height, width, 3), np.uint8)
+        self.pts = 0
+
+    async def recv(self):
+        # A remote track ends like this when its peer connection closes
+        if self.readyState != "live":
+            raise MediaStreamError
+        await asyncio.sleep(0)
+        frame = VideoFrame.from_ndarray(self.image, format="bgr24")
+        frame.pts = self.pts
+        frame.time_base = fractions.Fraction(1, 90000)
+        self.pts += 3000
+        return frame
+
+
+class NullChannel():
+    def send(self, data):
+        pass
+
+
+async def main(cycles, every, frames):
+    print(f"{'cycle':>6s} {'rss MB':>8s} {'graphs':>7s} {'relay proxies':>14s}")
+    for cycle in range(1, cycles + 1):
+        camera = SyntheticCamera()
+        track = VideoTransformTrack(relay.subscribe(camera), NullChannel(), 'Electrical.csv')
+        for _ in range(frames):
+            await track.recv()
+        track.stop()
+        camera.stop()
+
+        if cycle % every == 0 or cycle == 1:
+            await asyncio.sleep(0.05)   # let the relay reader tasks finish
+            proxies = len(relay._MediaRelay__proxies)
+            print(f"{cycle:6d} {rss_bytes() / 2**20:8.1f} {session_manager.open_graphs:7d} {proxies:14d}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cycles', type=int, default=200)
+    parser.add_argument('--every', type=int, default=20)
+    parser.add_argument('--frames', type=int, default=6)
+    args = parser.parse_args()
+    asyncio.run(main(args.cycles, args.every, args.frames))
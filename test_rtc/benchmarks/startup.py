@@ -0,0 +1,134 @@
+"""
+startup.py
+Import-time report and server startup benchmark.
+
+The report imports Django and the ASGI application, then the WebSocket
+routing (aiortc), the media pipeline (OpenCV) and the hand detector
+(MediaPipe) under -X importtime, and prints each stage with the third-party
+packages it pulled in. Before imports were deferred, every stage was paid
+before Daphne could listen.
+
+The benchmark starts a Daphne process, lazy and with RTC_PRELOAD, and times
+the first answered GET /metrics/ (listening) and, when preloading, the end of
+the background imports and detector pool fill (warm).
+
+Usage (from test_rtc/):
+    python -m benchmarks.startup [--runs 3] [--top 5]
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from collections import defaultdict
+
+STAGES = ('test_rtc.asgi', 'rtc.routing', 'rtc.media', 'rtc.HandTrackingModule')
+PROJECT = ('rtc', 'test_rtc')
+MARKER = 'import-stage:'
+
+
+def import_report(top):
+    code = ("import sys, django; django.setup()\n"
+            + "".join(f"import {name}; print('{MARKER}{name}', file=sys.stderr, flush=True)\n"
+                      for name in STAGES))
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            env=env, capture_output=True, text=True).stderr
+
+    print(f"{'stage':22s} {'seconds':>8s}   top packages")
+    entries = []
+    for line in stderr.splitlines():
+        if line.startswith(MARKER):
+            report_stage(line[len(MARKER):], entries, top)
+            entries = []
+        elif line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                depth = (len(name) - len(name.lstrip()) - 1) // 2
+                entries.append((depth, name.strip().split('.')[0], int(cumulative) / 1e6))
+
+
+def report_stage(stage, entries, top):
+    """
+    entries are in -X importtime order, children before their parent.
+    A package is charged where it is entered from a different package.
+    """
+    seconds = sum(cumulative for depth, _, cumulative in entries if depth == 0)
+    packages = defaultdict(float)
+    parents = {}        # depth -> package of the latest parent seen at that depth
+    for depth, package, cumulative in reversed(entries):
+        parents[depth] = package
+        if (depth == 0 or parents.get(depth - 1) != package) and package not in PROJECT:
+            packages[package] += cumulative
+    ranked = sorted(packages.items(), key=lambda item: -item[1])[:top]
+    print(f"{stage:22s} {seconds:8.2f}   " + ", ".join(f"{name} {s:.2f}" for name, s in ranked))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get_metrics(port):
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics/', timeout=1) as response:
+            return json.loads(response.read())
+    except OSError:
+        return None
+
+
+def warmed(metrics):
+    """Heavy modules imported and the detector pool filled."""
+    return ('rtc.media' in metrics['imports']['import_seconds'] and not metrics['imports']['pending']
+            and metrics['detectors']['idle'] > 0 and metrics['detectors']['building'] == 0)
+
+
+def start_server(preload, timeout=60):
+    """Seconds to listening and to warm (None unless preloading)."""
+    port = free_port()
+    env = dict(os.environ, RTC_PRELOAD='1' if preload else '0')
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'daphne', '-b', '127.0.0.1', '-p', str(port),
+                                'test_rtc.asgi:application'],
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    listening = warm = None
+    try:
+        while time.perf_counter() - start < timeout:
+            metrics = get_metrics(port)
+            if metrics and listening is None:
+                listening = time.perf_counter() - start
+            if metrics and (not preload or warmed(metrics)):
+                warm = time.perf_counter() - start if preload else None
+                break
+            time.sleep(0.02)
+    finally:
+        process.terminate()
+        process.wait()
+    return listening, warm
+
+
+def main(runs, top):
+    import_report(top)
+    print()
+    print(f"{'mode':8s} {'listening s':>12s} {'warm s':>8s}")
+    for preload in (False, True):
+        for _ in range(runs):
+            listening, warm = start_server(preload)
+            print(f"{'preload' if preload else 'lazy':8s} {listening or float('nan'):12.2f} "
+                  f"{warm if warm is not None else float('nan'):8.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=5)
+    args = parser.parse_args()
+    main(args.runs, args.top)
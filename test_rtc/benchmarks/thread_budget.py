@@ -0,0 +1,83 @@
+"""
+thread_budget.py
+Aggregate detection throughput of a node's workers, library thread defaults
+against the thread budget of rtc/threads.py.
+
+Starts --workers processes that each run the per-frame work of a session
+(decode-sized colour conversion, flip, resize and findHands) on synthetic
+frames for --seconds: first with the libraries' default thread pools, then
+with the budget runworkers gives each worker (optionally pinned, --pin).
+Prints aggregate frames/s and the threads each worker actually ran.
+
+Usage (from test_rtc/):
+    python -m benchmarks.thread_budget [--workers N] [--seconds 10] [--pin]
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
+import django
+django.setup()
+
+from rtc.threads import ThreadBudget, available_cpus, worker_env
+
+
+def worker(plan, seconds, results):
+    """One worker process; plan is its budget environment, None for library defaults."""
+    if plan is not None:
+        os.environ.update(plan)
+    budget = ThreadBudget()
+    if plan is not None:
+        budget.apply()
+
+    import cv2
+    import numpy as np
+    if plan is not None:
+        budget.configure_opencv()
+    from rtc.HandTrackingModule import HandDetector
+
+    detector = HandDetector(maxHands=2)
+    rng = np.random.default_rng(os.getpid())
+    yuv = rng.integers(0, 255, (720, 640), np.uint8)    # I420 of a 640x480 frame
+    frames = 0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        img = cv2.flip(cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR_I420), 1)
+        detector.findHands(img, draw=False)
+        cv2.resize(img, (320, 240), interpolation=cv2.INTER_AREA)
+        frames += 1
+    results.put((frames / seconds, budget.report()))
+
+
+def run(workers, seconds, plans):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(plans[i] if plans else None, seconds, results))
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return sum(fps for fps, _ in reports), [report for _, report in reports]
+
+
+def main(workers, seconds, pin):
+    print(f"{len(available_cpus())} cores, {workers} workers, {seconds:.0f} s each")
+    for name, plans in (('library defaults', None), ('thread budget', worker_env(workers, pin=pin))):
+        fps, reports = run(workers, seconds, plans)
+        threads = [report["native"] for report in reports]
+        print(f"{name:16s} {fps:8.1f} frames/s  threads per worker {min(threads)}-{max(threads)}  "
+              f"{reports[0]['native_by_name']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=len(available_cpus()))
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--pin', action='store_true')
+    args = parser.parse_args()
+    main(args.workers, args.seconds, args.pin)
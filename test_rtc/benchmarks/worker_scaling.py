@@ -0,0 +1,112 @@
+"""
+worker_scaling.py
+Session throughput against the number of worker processes.
+
+Uses the real front Router from rtc/workers.py, with an in-process
+stand-in for each Daphne worker. Each stand-in is a separate process that
+answers every "frame" message after a fixed amount of CPU work, which
+stands in for one detection. Simulated sessions send frames at --fps.
+The script reports aggregate processed frames/s and the reply latency.
+
+Usage (from test_rtc/):
+    python -m benchmarks.worker_scaling [--workers 1 2 4] [--sessions 40] [--work-ms 8]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import statistics
+import time
+
+from rtc.workers import Router
+
+BASE_PORT = 18100
+ROUTER_PORT = 18000
+
+
+def stand_in_worker(port, work_ms):
+    """Worker process: one event loop, CPU-bound work per frame like a detector."""
+    buffer = os.urandom(1 << 16)
+
+    def detect():
+        deadline = time.thread_time() + work_ms / 1000
+        while time.thread_time() < deadline:
+            hashlib.sha256(buffer).digest()
+
+    async def handle(reader, writer):
+        while await reader.readline():
+            detect()
+            writer.write(b"ok\n")
+            await writer.drain()
+        writer.close()
+
+    async def serve():
+        server = await asyncio.start_server(handle, '127.0.0.1', port)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+async def session(fps, duration, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', ROUTER_PORT)
+    end = time.perf_counter() + duration
+    frames = 0
+    while time.perf_counter() < end:
+        sent = time.perf_counter()
+        writer.write(b"frame\n")
+        await writer.drain()
+        await reader.readline()
+        latencies.append(time.perf_counter() - sent)
+        frames += 1
+        await asyncio.sleep(max(0.0, 1 / fps - (time.perf_counter() - sent)))
+    writer.close()
+    return frames
+
+
+async def run(workers, sessions, fps, duration):
+    router = Router([('127.0.0.1', BASE_PORT + i) for i in range(workers)])
+    server = await router.start('127.0.0.1', ROUTER_PORT)
+    latencies = []
+    start = time.perf_counter()
+    frames = await asyncio.gather(*(session(fps, duration, latencies) for _ in range(sessions)))
+    elapsed = time.perf_counter() - start
+    # Let the router finish relaying the closing connections
+    for _ in range(100):
+        if not sum(router.connections):
+            break
+        await asyncio.sleep(0.02)
+    server.close()
+    await server.wait_closed()
+    latencies.sort()
+    return sum(frames) / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.95)]
+
+
+def main(args):
+    print(f"{os.cpu_count()} CPUs, {args.sessions} sessions at {args.fps} fps, {args.work_ms} ms work per frame")
+    baseline = None
+    for workers in args.workers:
+        processes = [multiprocessing.Process(target=stand_in_worker, args=(BASE_PORT + i, args.work_ms), daemon=True)
+                     for i in range(workers)]
+        for process in processes:
+            process.start()
+        time.sleep(0.5)
+        throughput, p50, p95 = asyncio.run(run(workers, args.sessions, args.fps, args.duration))
+        for process in processes:
+            process.terminate()
+            process.join()
+        baseline = baseline or throughput
+        print(f"workers {workers:2d}: {throughput:8.1f} frames/s  ({throughput / baseline:4.2f}x)  "
+              f"latency p50 {p50 * 1000:6.1f} ms  p95 {p95 * 1000:6.1f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--sessions', type=int, default=40)
+    parser.add_argument('--fps', type=float, default=10)
+    parser.add_argument('--work-ms', type=float, default=8)
+    parser.add_argument('--duration', type=float, default=5)
+    main(parser.parse_args())
@@ -43,6 +43,14 @@ class HandDetector:
         self.fingers = []
         self.lmList = []
 
+    def close(self):
+        """
+        Releases the MediaPipe graph. The detector cannot be used afterwards.
+        """
+        if self.hands is not None:
+            self.hands.close()
+            self.hands = None
+
     def findHands(self, img, draw=True, flipType=True, getLms=False):
         """
         Finds hands in a BGR image.
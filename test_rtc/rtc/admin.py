@@ -1,3 +1,9 @@
 from django.contrib import admin
 
 # Register your models here.
+from .models import Users, Exams, Results, AnswerSheets
+
+admin.site.register(Users)
+admin.site.register(Exams)
+admin.site.register(Results)
+admin.site.register(AnswerSheets)
@@ -0,0 +1,109 @@
+"""
+admission.py
+Capacity-aware admission of exam sessions on this node.
+
+- At most `capacity` sessions hold a slot (peer connection + detector) at a time.
+- Joins beyond that wait in a FIFO queue and are told their position.
+- Slots are handed to the head of the queue as sessions leave.
+- Admission wait times are kept for percentiles.
+"""
+
+import asyncio
+import os
+import time
+
+from collections import deque
+
+from django.conf import settings
+
+from .tracing import percentile
+
+
+class AdmissionController():
+    """
+    FIFO admission with a fixed number of session slots.
+    """
+
+    def __init__(self, capacity, max_queue=500, max_samples=2000):
+        self.capacity = capacity        # Sessions the node's inference can serve
+        self.max_queue = max_queue      # Joins beyond this are refused outright
+        self.active = 0                 # Sessions holding a slot
+        self.waiting = deque()          # (future, on_position) of queued joins
+        self.wait_times = deque(maxlen=max_samples)
+        self.rejected = 0
+
+    @property
+    def load(self):
+        """Fraction of slots in use, above 1 when joins are queued."""
+        return (self.active + len(self.waiting)) / self.capacity
+
+    async def acquire(self, on_position=None):
+        """
+        Wait for a slot.
+        :param on_position: async callback(position), awaited whenever the queue position changes
+        :return: True once admitted, False if the queue is full
+        """
+        start = time.monotonic()
+        if self.active < self.capacity and not self.waiting:
+            self.active += 1
+            self.wait_times.append(0.0)
+            return True
+        if len(self.waiting) >= self.max_queue:
+            self.rejected += 1
+            return False
+
+        entry = (asyncio.get_running_loop().create_future(), on_position)
+        self.waiting.append(entry)
+        admitted = False
+        try:
+            if on_position:
+                await on_position(len(self.waiting))
+            await entry[0]
+            admitted = True
+        finally:
+            if not admitted:
+                # Left while queued (WebSocket closed, even during the first notification),
+                # or the slot arrived just as we left: never leave a dead entry or a lost slot
+                if entry in self.waiting:
+                    self.waiting.remove(entry)
+                    asyncio.ensure_future(self._notify_positions())
+                elif entry[0].done() and not entry[0].cancelled():
+                    self.release()
+        self.wait_times.append(time.monotonic() - start)
+        return True
+
+    def release(self):
+        """Free a slot and hand it to the next queued join."""
+        while self.waiting:
+            future, _ = self.waiting.popleft()
+            if future.done():
+                continue                # Cancelled waiter, its entry was not removed yet
+            # The slot moves to the queued join, active stays the same
+            future.set_result(True)
+            asyncio.ensure_future(self._notify_positions())
+            return
+        self.active = max(self.active - 1, 0)
+
+    async def _notify_positions(self):
+        for position, (_, on_position) in enumerate(list(self.waiting), start=1):
+            if on_position:
+                try:
+                    await on_position(position)
+                except Exception:
+                    # The waiter's socket went away, it is removed on cancellation
+                    pass
+
+    def stats(self):
+        return {"capacity": self.capacity,
+                "active": self.active,
+                "queued": len(self.waiting),
+                "rejected": self.rejected,
+                "wait_p50": percentile(self.wait_times, 50),
+                "wait_p90": percentile(self.wait_times, 90),
+                "wait_p99": percentile(self.wait_times, 99)}
+
+
+# Under runworkers this process admits its share of the node's RTC_MAX_SESSIONS
+admission = AdmissionController(int(os.environ.get('RTC_WORKER_SESSIONS')
+                                    or getattr(settings, 'RTC_MAX_SESSIONS', 40)),
+                                getattr(settings, 'RTC_MAX_JOIN_QUEUE', 500))
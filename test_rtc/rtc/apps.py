@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete
 
 
 class RtcConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rtc'
+
+    def ready(self):
+        # Admin edits of users or exams invalidate cached login lookups
+        from .logins import assignment_cache
+        from .models import Users, Exams
+        for model in (Users, Exams):
+            post_save.connect(assignment_cache.clear, sender=model, dispatch_uid=f'assignment_cache_{model.__name__}_save')
+            post_delete.connect(assignment_cache.clear, sender=model, dispatch_uid=f'assignment_cache_{model.__name__}_delete')
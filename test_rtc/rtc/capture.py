@@ -0,0 +1,137 @@
+"""
+capture.py
+Server-driven capture constraints for the student's camera.
+
+- Every session is asked over the data channel to capture at the width,
+  height and frame rate of the node's current profile: at session start, and
+  again whenever the admission load moves the node to another profile.
+- Detection only needs a small image a few times a second; what the browser
+  does not capture, the server does not have to decode.
+- CaptureMeter measures what actually arrives, so the effect is confirmed
+  on the server rather than assumed.
+"""
+
+import asyncio
+import json
+import logging
+
+from django.conf import settings
+
+from .admission import admission
+
+logger = logging.getLogger(__name__)
+
+PROFILES = {
+    'normal': {"width": 640, "height": 480, "frameRate": 15},
+    'loaded': {"width": 480, "height": 360, "frameRate": 10},
+}
+
+
+class CaptureMeter():
+    """
+    Incoming resolution and frame rate of one session, on the source clock.
+    """
+
+    def __init__(self, window=2.0):
+        self.window = window            # Seconds per frame-rate measurement
+        self.width = None
+        self.height = None
+        self.fps = None                 # Rate over the last complete window
+        self.window_start = None
+        self.window_frames = 0
+
+    def update(self, frame):
+        self.width, self.height = frame.width, frame.height
+        if frame.pts is None or frame.time_base is None:
+            return
+        frame_time = float(frame.pts * frame.time_base)
+        if self.window_start is None:
+            self.window_start = frame_time
+        elif frame_time - self.window_start >= self.window:
+            self.fps = round(self.window_frames / (frame_time - self.window_start), 1)
+            self.window_start = frame_time
+            self.window_frames = 0
+        self.window_frames += 1
+
+    def conforms(self, constraints, slack=0.15):
+        """Whether the measured capture is within the constraints (plus slack)."""
+        if self.width is None or self.fps is None:
+            return None
+        return (self.width <= constraints["width"] * (1 + slack)
+                and self.height <= constraints["height"] * (1 + slack)
+                and self.fps <= constraints["frameRate"] * (1 + slack))
+
+    def stats(self):
+        return {"width": self.width, "height": self.height, "fps": self.fps}
+
+
+class CaptureController():
+    """
+    Picks the node's capture profile from the admission load and sends it to
+    the sessions. A session is anything with a session_id, a data channel and
+    a video_track carrying a CaptureMeter once media flows.
+    """
+
+    def __init__(self, profiles, loaded_at=0.8, interval=5.0):
+        self.profiles = profiles        # Profile name -> constraints sent to the client
+        self.loaded_at = loaded_at      # Admission load from which 'loaded' applies
+        self.interval = interval        # Seconds between load checks
+        self.current = 'normal'
+        self.sessions = {}              # session_id -> session
+        self.task = None
+        self.sent = 0
+
+    def profile(self):
+        return 'loaded' if admission.load >= self.loaded_at else 'normal'
+
+    def add(self, session):
+        """Register a session once its data channel is open and send it the current profile."""
+        self.sessions[session.session_id] = session
+        if not self.update():
+            self.send(session)
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self._run())
+
+    def remove(self, session):
+        self.sessions.pop(session.session_id, None)
+
+    def send(self, session):
+        channel = session.channel
+        if channel is None or channel.readyState != "open":
+            return
+        channel.send(json.dumps(dict(self.profiles[self.current], message='capture_constraints')))
+        self.sent += 1
+
+    def update(self):
+        """Re-send constraints to every session if the profile changed, returns whether it did."""
+        profile = self.profile()
+        if profile == self.current:
+            return False
+        logger.info(f"Capture profile {self.current} -> {profile} (load {admission.load:.2f})")
+        self.current = profile
+        for session in list(self.sessions.values()):
+            self.send(session)
+        return True
+
+    async def _run(self):
+        while self.sessions:
+            await asyncio.sleep(self.interval)
+            self.update()
+
+    def stats(self):
+        constraints = self.profiles[self.current]
+        meters = [session.video_track.capture for session in self.sessions.values()
+                  if getattr(session, 'video_track', None) is not None]
+        conforming = [meter.conforms(constraints) for meter in meters]
+        return {"profile": self.current,
+                "constraints": constraints,
+                "sessions": len(self.sessions),
+                "conforming": conforming.count(True),
+                "not_conforming": conforming.count(False),
+                "sent": self.sent,
+                "incoming_pixels_per_second": sum(meter.width * meter.height * meter.fps
+                                                  for meter in meters if meter.fps)}
+
+
+capture_controller = CaptureController(getattr(settings, 'RTC_CAPTURE_PROFILES', PROFILES),
+                                       getattr(settings, 'RTC_CAPTURE_LOADED_AT', 0.8))
@@ -4,267 +4,44 @@ Django Channels + aiortc WebRTC quiz server.
 
 - Accepts WebSocket connections from clients.
 - Negotiates WebRTC video and data channels.
-- Tracks hand gestures in the incoming video stream to run an interactive quiz.
+- Hands the incoming video to the quiz media pipeline (media.py), loaded on the first session.
 """
 
 import argparse
+import asyncio
 import json
 import logging
 import os
-import time
-import csv
-import cv2
-import base64
+import uuid
 
 from asyncio import ensure_future
-from .HandTrackingModule import HandDetector # Custom CVZone module for hand detection
 from channels.generic.websocket import AsyncWebsocketConsumer
-from aiortc import (MediaStreamTrack, RTCPeerConnection, RTCSessionDescription, 
-                    RTCIceCandidate, RTCConfiguration, RTCIceServer, RTCIceGatherer,
-                    RTCDataChannel)
-from aiortc.contrib.media import MediaBlackhole, MediaPlayer, MediaRelay
-from av import VideoFrame
+from aiortc import (RTCPeerConnection, RTCSessionDescription, 
+                    RTCIceCandidate, RTCIceServer, RTCDataChannel)
 from channels.db import database_sync_to_async
+from .recording import SessionRecorder
+from .ice import IceServerCache, local_candidate_messages
+from .tracing import SessionTrace, trace_collector
+from .logins import assignment_cache, lookup_assignment
+from .admission import admission
+from .sessions import session_manager
+from .workers import SessionRegistry
+from .preload import import_async
+from .capture import capture_controller
+from django.conf import settings
 
 logger = logging.getLogger(__name__)
-relay = MediaRelay()
 
-
-# ----------------------------
-# Data class for each question and the answer it gets
-# ----------------------------
-class Data():
-    def __init__(self, data):
-        self.question_text = data["question_text"]
-        self.question_image = data["question_image"]
-        self.choice_type = data["choice_type"]
-        self.answer = int(data["answer"])
-        self.choice1 = data["choice1"]
-        self.choice2 = data["choice2"]
-        self.choice3 = data["choice3"]
-        self.choice4 = data["choice4"]
-
-        # Updated dynamically when user makes a selection
-        self.chosen_answer = None
-
-    def update(self, fingers):
-        """
-        Update chosen_answer based on finger pattern:
-        - Recognizes specific hand/finger combinations to map to answers 1–4 or 'undo' (5).
-        """
-        if fingers == [0, 1, 0, 0, 0]:
-            self.chosen_answer = 1
-        elif fingers == [0, 1, 1, 0, 0]:
-            self.chosen_answer = 2
-        elif fingers == [0, 1, 1, 1, 0]:
-            self.chosen_answer = 3
-        elif fingers == [0, 1, 1, 1, 1]:
-            self.chosen_answer = 4
-        elif fingers == [1, 0, 0, 0, 0]:
-            self.chosen_answer = 5
-        else:
-            self.chosen_answer = None
+ice_servers = [                 # STUN/TURN servers
+    RTCIceServer("stun:stun.l.google.com:19302"),
+    RTCIceServer("stun:stun1.l.google.com:19302"),
+    RTCIceServer("turn:relay1.expressturn.com:3478", "ef4D0W10T15FXPIADE", "q5aQSKhZ2swakoCM")
+]
+ice_cache = IceServerCache(ice_servers)     # Node-level view of which servers answer
+registry = SessionRegistry(settings.RTC_SESSION_REGISTRY)  # Shared by the worker processes of the node
+ADMIN_GROUP = 'rtc_admin'       # Channel layer group of all sessions, for admin messages
 
 
-# ----------------------------
-# Media track to process incoming video frames and detect gestures
-# ----------------------------
-class VideoTransformTrack(MediaStreamTrack):
-    """
-    A custom MediaStreamTrack from client,
-    processing the frames and drives quiz progression.
-    """
-    kind = "video"
-
-    def __init__(self, track, channel, exam_file):
-        super().__init__()
-        self.detector = HandDetector(maxHands=2) # CVZone hand detection utility
-        self.track = track          # Original incoming webrtc track
-        self.channel = channel      # Data channel for sending exam events and data to client
-        self.frames = 0             # Frame counter
-        self.data = []              # List of Data objects (exam questions)
-        self.qNo = 0                # Current question index
-        self.qTotal = 0             # Total number of questions
-        self.score = 0              # Exam score
-        
-        # Timing and state flags for gesture detection and cooldown
-        self.last_execution_time = time.time()  # Time last gesture validated
-        self.detection_time = time.time()       # Time of gesture detected first (need to validate)
-        self.hands_unseen = float()     # Total duration of time with hands visible != 2
-        self.handsin = []               # Timestamps when valid number of hands detected
-        self.handsout = []              # Timestamps when invalid number of hands detected
-        self.cooldown_period = 1        # Delay before next gesture is accepted (determined)
-        self.hands_seen = True          # Valid number of hands (state)
-        self.on_cooldown = True
-        self.detected_answer = None
-        self.double_detection = False   # Is a gesture being validated now?
-        self.only_show = True           # True = show video only (to client), no exam processing
-        
-        # Load quiz data from CSV file
-        self.import_quiz_data(exam_file)
-
-    async def recv(self):
-        """
-        Called for each incoming frame from the client.
-        Processes every third frame to reduce load and
-        optionally runs gesture detection.
-        """
-        frame = await self.track.recv()
-        img = frame.to_ndarray(format="bgr24")
-
-        # Mirror effect for user convenience
-        img = cv2.flip(img, 1)
-        
-        # Process every third frame for efficiency
-        if self.frames % 3 == 0:
-            hands, img= self.detector.findHands(img)
-            if not self.only_show:
-                await self.processing(hands, img)
-            self.frames = 0
-        self.frames += 1
-
-        # Return the annotated frame to the client
-        new_frame = VideoFrame.from_ndarray(img, format="bgr24")
-        new_frame.pts = frame.pts
-        new_frame.time_base = frame.time_base
-        return new_frame
-    
-    def import_quiz_data(self, quiz_name):
-        """
-        Load quiz questions from a CSV file and create Data objects.
-        """
-        with open(f'quiz/{quiz_name}', newline='') as file:
-            reader = csv.DictReader(file)
-            data = list(reader)
-        for question in data:
-            self.data.append(Data(question))
-        self.qTotal = len(data)
-    
-    async def quiz_start(self):
-        """
-        Start the quiz: toggle processing and show the first and question page to client.
-        """
-        self.only_show = not self.only_show
-        await self.show_question(self.qNo)
-        
-    async def show_question(self, qNo):
-        """
-        Send the current question (text + image) to the client over the webrtc data channel.
-        """
-        question = self.data[qNo]
-        if question.question_image:
-            image = cv2.imread(question.question_image)
-            _, buffer = cv2.imencode('.png', image)
-            b64_str = base64.b64encode(buffer).decode('utf-8')
-        else:
-            b64_str = None
-        
-        self.channel.send(json.dumps({"message": 'new_question',
-                                     "qNo": f'Question {qNo + 1}',
-                                     "question": question.question_text,
-                                     "image": b64_str,
-                                     "choice1": question.choice1,
-                                     "choice2": question.choice2,
-                                     "choice3": question.choice3,
-                                     "choice4": question.choice4}))
-    
-    async def processing(self, hands, img):
-        """
-        Main quiz logic:
-        - Detects finger gestures.
-        - Validates finger gesture class.
-        - Updates current question/answer.
-        - Tracks hand visibility for cheating detection.
-        - Sends exam progress or completion messages.
-        """
-        current_time = time.time()
-        
-        # Handle cooldown to avoid double-counting and accidental gestures
-        if self.on_cooldown:
-            if current_time - self.last_execution_time >= self.cooldown_period:
-                self.on_cooldown = False
-            
-        elif self.qNo < self.qTotal:
-            question = self.data[self.qNo]
-            if len(hands) > 0:
-                # Finger state (up/down) detection for the latest detected hand
-                fingers = self.detector.tipsUp(hands[-1])
-                question.update(fingers)
-                answer = question.chosen_answer
-                
-                if answer:
-                    # First detection of an answer gesture
-                    if not self.double_detection:
-                        self.detected_answer = answer
-                        self.detection_time = current_time
-                        self.double_detection = True
-                    
-                    # Require a second detection 1 second later for validation
-                    elif current_time > self.detection_time + 1:
-                        self.double_detection = False
-                        if answer == self.detected_answer:
-                            if answer == 5:
-                                # Undo gesture: go back one question
-                                self.data[self.qNo].chosen_answer = None
-                                self.qNo = max(self.qNo - 1, 0)
-                                self.data[self.qNo].chosen_answer = None
-                            else:
-                                # Advance to next question
-                                self.qNo += 1
-                            
-                            # Quiz completion
-                            if self.qNo == self.qTotal:
-                                # Calculate final score
-                                self.score = sum(
-                                    1 for data in self.data if data.answer == data.chosen_answer
-                                )
-                                self.score = round((self.score / self.qTotal) * 100, 2)
-                                
-                                # Update unseen-hand duration
-                                if self.hands_seen is False:
-                                    self.handsin.append(current_time)
-                                    self.hands_seen = True
-                                print(self.handsin)
-                                print(self.handsout)
-                                for i in range(len(self.handsin)):
-                                    self.hands_unseen -= self.handsout[i]
-                                    self.hands_unseen += self.handsin[i]
-                                
-                                # Signal client of completion
-                                self.channel.send(json.dumps({
-                                    "message": 'quiz_finished',
-                                    "score": self.score,
-                                    "hands_unseen": self.hands_unseen}))
-                            else:
-                                # Show next question
-                                await self.show_question(self.qNo)
-                            
-                            # Reset cooldown after valid gesture
-                            self.on_cooldown = True
-                            self.last_execution_time = current_time
-                else:
-                    self.detected_answer = None
-            else:
-                self.detected_answer = None
-            
-            # Track and signal client when number of hands (2) are not valid (possible cheating)
-            if len(hands) != 2:
-                if self.hands_seen is True:
-                    self.channel.send(json.dumps({
-                                    "message": 'hand_unseen',
-                                    "text": 'Show both hands!',
-                                    "color": 'yellow'}))
-                    self.handsout.append(current_time)
-                    self.hands_seen = False
-            else:
-                if self.hands_seen is False:
-                    self.channel.send(json.dumps({
-                                    "message": 'hand_seen',
-                                    "text": 'Hands detected',
-                                    "color": '#49ff34'}))
-                    self.handsin.append(current_time)
-                    self.hands_seen = True
-
 # ----------------------------
 # WebSocket Consumer: handles signaling and WebRTC setup
 # ----------------------------
@@ -281,28 +58,72 @@ class ServerConsumer(AsyncWebsocketConsumer):
         self.pc = None              # RTCPeerConnection instance
         self.channel = None         # RTCDataChannel to client
         self.video_track = None     # VideoTransformTrack instance
-        self.ice_gatherer = None    # For gathering ICE candidates
-        self.ice_servers = [        # STUN/TURN servers
-            RTCIceServer("stun:stun.l.google.com:19302"),
-            RTCIceServer("stun:stun1.l.google.com:19302"),
-            RTCIceServer("turn:relay1.expressturn.com:3478", "ef4D0W10T15FXPIADE", "q5aQSKhZ2swakoCM")
-        ]
+        self.session_id = uuid.uuid4().hex  # Unique id of this exam session
+        self.username = None        # Set on successful login
+        self.exam_id = None         # Set on successful login
+        self.record = False         # Record the incoming video (per exam option)
+        self.preview = (320, 10)    # Self-view width and frame-rate cap (per exam option)
+        self.landmark_rate = 0      # Client-side hand tracking at this rate, 0 = server detection (per exam option)
+        self.recorder = None        # SessionRecorder when recording
+        self.trace = SessionTrace(self.session_id)  # Connection-setup timeline
+        self.admission_task = None  # Waits for a session slot on this node
+        self.admitted = False       # Holds a session slot
+        self.released = False       # Resources released (see SessionManager)
         
         
     async def connect(self):
         """
         Called when a WebSocket connection is opened.
-        Initializes RTCPeerConnection and event handlers.
+        Accepts it and starts waiting for a session slot.
         """
-        from .models import Users, Exams
-        self.users = Users
-        self.exams = Exams
+        self.trace.mark('ws_connect')
         self.exam_file = 'Electrical.csv'
         await self.accept()
-        
-        self.pc = RTCPeerConnection(configuration=RTCConfiguration(iceServers=self.ice_servers))
+        self.trace.mark('ws_accept')
+        await self.channel_layer.group_add(ADMIN_GROUP, self.channel_name)
+
+        # Queue for a slot in the background so a disconnect while waiting is still handled
+        self.admission_task = ensure_future(self.admit())
+
+    async def admit(self):
+        """
+        Wait for a session slot, telling the client its queue position,
+        then create the peer connection.
+        """
+        async def on_position(position):
+            await self.send(text_data=json.dumps({"type": "queue", "position": position}))
+
+        if not await admission.acquire(on_position):
+            await self.send_error("Server is full, please try again later.")
+            await self.close()
+            return
+        self.admitted = True
+        self.trace.mark('admitted')
+        session_manager.open(self)
+        await asyncio.to_thread(registry.add, self.session_id)
+        # OpenCV/MediaPipe load off the event loop on the node's first session (unless preloaded)
+        await import_async('rtc.media')
+        self.setup_peer_connection()
+        await self.send(text_data=json.dumps({"type": "admitted"}))
+
+    def setup_peer_connection(self):
+        """
+        Create the RTCPeerConnection, data channel and event handlers.
+        """
+        from .media import EncodeMeter, VideoTransformTrack, relay
+
+        self.pc = RTCPeerConnection(configuration=ice_cache.configuration())
         
         self.channel = self.pc.createDataChannel('message')
+
+        # Ask the client for the node's capture profile as soon as it can hear us
+        @self.channel.on("open")
+        def on_channel_open():
+            capture_controller.add(self)
+            self.trace.mark('first_dc_sent')
+            if self.landmark_rate:
+                # The client tracks its own hands and streams the landmarks back
+                self.channel.send(json.dumps({"message": 'landmark_mode', "rate": self.landmark_rate}))
         
         # Handle incoming media tracks from client
         @self.pc.on("track")
@@ -310,12 +131,26 @@ class ServerConsumer(AsyncWebsocketConsumer):
             logger.info(f"Track received from client: {track.kind}")
             if track.kind == "video":
                 # Wrap incoming video track for processing
-                self.video_track = VideoTransformTrack(relay.subscribe(track), self.channel, self.exam_file)
-                self.pc.addTrack(self.video_track)
+                self.video_track = VideoTransformTrack(relay.subscribe(track), self.channel, self.exam_file,
+                                                       self.session_id, self.username, self.exam_id,
+                                                       trace=self.trace, preview=self.preview,
+                                                       landmark_rate=self.landmark_rate)
+                sender = self.pc.addTrack(self.video_track)
+                self.video_track.encode_meter = EncodeMeter(sender)
+
+                if self.record:
+                    # Second relay consumer, independent of the detection track
+                    self.recorder = SessionRecorder(
+                        relay.subscribe(track),
+                        os.path.join(settings.RTC_RECORDING_DIR, str(self.exam_id), self.session_id),
+                        segment_seconds=settings.RTC_RECORDING_SEGMENT_SECONDS)
+                    self.recorder.start()
 
             @track.on("ended")
             async def on_ended():
                 logger.info(f"Track: {track.kind} ended")
+                if track.kind == "video":
+                    await session_manager.close(self, 'track_ended')
         
         # Handle incoming data channel from client
         @self.pc.on("datachannel")
@@ -326,16 +161,46 @@ class ServerConsumer(AsyncWebsocketConsumer):
         @self.pc.on("connectionstatechange")
         async def on_connection_state_change():
             print(f"Connection state: {self.pc.connectionState}")
+            if self.pc.connectionState == "connected":
+                # aiortc reports connected once DTLS is up on every transport
+                self.trace.mark('dtls_connected')
+            elif self.pc.connectionState == "failed":
+                await session_manager.close(self, 'connection_failed')
             
         @self.pc.on("iceconnectionstatechange")
         def on_ice_connection_state_change():
             print(f"ICE connection state changed: {self.pc.iceConnectionState}")
+            if self.pc.iceConnectionState == "completed":
+                self.trace.mark('ice_connected')
     
-    async def disconnect(self):
+    async def disconnect(self, close_code):
         """Clean up on WebSocket disconnect."""
         logger.info(f"WebSocket disconnected for client")
-        if self.pc:
-            await self.pc.close()
+        if self.admission_task and not self.admission_task.done():
+            self.admission_task.cancel()
+        await session_manager.close(self, 'disconnect')
+        await self.channel_layer.group_discard(ADMIN_GROUP, self.channel_name)
+
+    async def release(self):
+        """
+        Free everything the session holds. Called once by the SessionManager.
+        The admission slot and the registry row are given back even if
+        tearing the media down fails, or they would leak for good.
+        """
+        try:
+            capture_controller.remove(self)
+            if self.video_track:
+                self.video_track.stop()
+            if self.recorder:
+                await self.recorder.stop()
+            if self.pc:
+                await self.pc.close()
+        finally:
+            trace_collector.export(self.trace)
+            if self.admitted:
+                self.admitted = False
+                admission.release()
+                await asyncio.to_thread(registry.remove, self.session_id)
     
     async def receive(self, text_data):
         """
@@ -345,46 +210,39 @@ class ServerConsumer(AsyncWebsocketConsumer):
         """
         data = json.loads(text_data)
         
-        if data['type'] == 'offer':
+        if data['type'] in ('offer', 'ice_candidate') and self.pc is None:
+            await self.send_error("Not admitted yet, wait for the 'admitted' message.")
+
+        elif data['type'] == 'offer' and self.username is None:
+            # A session without a login has no one to store the result for
+            await self.send_error("Log in before starting the exam.")
+
+        elif data['type'] == 'offer':
+            self.trace.mark('offer')
             # Set remote description and create/send answer
             offer = RTCSessionDescription(
                 sdp=data["offer"]["sdp"],
                 type=data["offer"]["type"]
             )
             await self.pc.setRemoteDescription(offer)
-            answer = await self.pc.createAnswer()
-            await self.pc.setLocalDescription(answer)
+            with self.trace.span('create_answer'):
+                answer = await self.pc.createAnswer()
             
+            # Send the answer before gathering, the candidates trickle after it
             await self.send(text_data=json.dumps({
                 "type": "answer",
                 "answer": {
-                    "sdp": answer.sdp, #localdesc
-                    "type": answer.type #localdesc
+                    "sdp": answer.sdp,
+                    "type": answer.type
                 }
             }))
             
-            # Gather and send local ICE candidates
-            self.ice_gatherer = RTCIceGatherer(iceServers=self.ice_servers)
-            await self.ice_gatherer.gather()
-            candidates = self.ice_gatherer.getLocalCandidates()
-            
-            if candidates:
-                for candidate in candidates:
-                    logger.info(f"SENT: {candidate}")
-                    await self.send(text_data=json.dumps({
-                        "type": "ice_candidate",
-                        "candidate": {
-                            "component": candidate.component,
-                            "foundation": candidate.foundation,
-                            "ip": candidate.ip,
-                            "port": candidate.port,
-                            "priority": candidate.priority,
-                            "protocol": candidate.protocol,
-                            "type": candidate.type,
-                            "sdpMid": 0,
-                            "sdpMLineIndex": 0,
-                        }
-                    }))
+            # setLocalDescription gathers the candidates of the peer connection itself
+            with self.trace.span('ice_gathering'):
+                await self.pc.setLocalDescription(answer)
+            for message in local_candidate_messages(self.pc):
+                logger.info(f"SENT: {message['candidate']}")
+                await self.send(text_data=json.dumps(message))
             
         elif data['type'] == 'ice_candidate':
             # Add ICE candidate sent from the client
@@ -400,12 +258,22 @@ class ServerConsumer(AsyncWebsocketConsumer):
                 
                 if not username or not password:
                     await self.send_error("Username and password are required.")
-                    validity = '0'
+                    exam = None
                 else:
-                    exam_file_path = await self.authenticate_and_get_exam(username, password)
+                    with self.trace.span('login_db'):
+                        exam = await self.authenticate_and_get_exam(username, password)
                     
-                if exam_file_path:
-                    self.exam_file = exam_file_path
+                if exam:
+                    self.exam_id = exam["exam_id"]
+                    self.exam_file = exam["exam_file"]
+                    self.record = exam["record"]
+                    self.preview = exam["preview"]
+                    self.landmark_rate = exam["landmark_rate"]
+                    if self.video_track:
+                        self.video_track.preview_width, self.video_track.preview_fps = self.preview
+                    self.username = username
+                    if self.admitted:
+                        await asyncio.to_thread(registry.update, self.session_id, username, self.exam_id)
                     validity = '1'
                 else:
                     validity = '0'
@@ -418,29 +286,33 @@ class ServerConsumer(AsyncWebsocketConsumer):
                 await self.send_error("Invalid JSON format.")
 
             
-    @database_sync_to_async
-    def authenticate_and_get_exam(self, username, password):
+    async def authenticate_and_get_exam(self, username, password):
         """
-        Synchronous database logic wrapped for async usage.
-        1. Finds the user.
+        1. Finds the user and the assigned exam, from the assignment cache
+           or with one joined query on the database thread pool.
         2. Checks the password.
-        3. Fetches the corresponding exam file.
-        Returns the exam file string on success, or None on failure.
+        Returns a dict of the exam settings on success, or None on failure.
         """
-        try:
-            user = self.users.objects.get(Username=username)
-            if user.Password == password:
-                try:
-                    exam = self.exams.objects.get(ExamId=user.UserExamId)
-                    return exam.ExamFile
-                except self.exams.DoesNotExist:
-                    return None
-            else:
+        assignment = assignment_cache.get(username)
+        if assignment is None:
+            assignment = await database_sync_to_async(lookup_assignment)(username)
+            if assignment is None:
                 return None
+            assignment_cache.put(username, assignment)
 
-        except self.users.DoesNotExist:
+        stored_password, exam = assignment
+        if stored_password != password:
             return None
+        return exam
             
+    async def admin_message(self, event):
+        """Admin message from the channel layer (see manage.py rtcbroadcast)."""
+        await self.send(text_data=json.dumps({"type": "admin", "text": event["text"]}))
+
+    async def send_error(self, message):
+        """Report a signaling error to the client."""
+        await self.send(text_data=json.dumps({"type": "error", "message": message}))
+
     def parse_ice_candidate(self, candidate_obj):
         """
         Parse ICE candidate information from client
@@ -485,9 +357,17 @@ class ServerConsumer(AsyncWebsocketConsumer):
     async def on_datachannel(self, channel: RTCDataChannel):
         """
         Handle messages from the client's data channel.
-        Currently supports starting the quiz.
+        Supports starting the quiz and, in landmark-ingest mode, hand landmarks.
         """
         @channel.on("message")
         async def on_message(message):
+            self.trace.mark('first_dc_received')
             if message == "quiz_start":
-                await self.video_track.quiz_start()
\ No newline at end of file
+                await self.video_track.quiz_start()
+            elif self.video_track and self.video_track.landmark_rate:
+                try:
+                    data = json.loads(message)
+                except (TypeError, ValueError):
+                    return
+                if isinstance(data, dict) and data.get('type') == 'landmarks':
+                    await self.video_track.ingest_landmarks(data)
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+detector_pool.py
+Node-level pool of pre-built, pre-warmed HandDetectors.
+
+- Building the MediaPipe graph and its first inference are paid in a
+  background thread, not in the first frames of a session.
+- Sessions check a detector out on join and back in on teardown; returned
+  detectors have their tracking state cleared before the next user gets them.
+  A checkout that finds the pool empty builds its detector on a worker
+  thread too, never on the event loop.
+- A refill task keeps `target` detectors idle, extra returned ones are closed.
+"""
+
+import asyncio
+import logging
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .sessions import session_manager
+
+logger = logging.getLogger(__name__)
+
+
+class DetectorPool():
+    """
+    Idle warm detectors. Building, warming and resetting run on the pool's
+    own thread; the idle detectors, the counters and the graph count are only
+    updated on the event loop, once that work is done.
+    """
+
+    def __init__(self, target=4, max_idle=8, warm_shape=(480, 640, 3), maxHands=2):
+        self.target = target            # Idle detectors the refill task aims for
+        self.max_idle = max_idle        # Returned detectors beyond this are closed
+        self.warm_shape = warm_shape    # Synthetic frame size, the usual camera resolution
+        self.maxHands = maxHands
+        self.idle = deque()             # Warm detectors
+        self.building = 0               # Detectors being built for the refill
+        self.resetting = 0              # Returned detectors waiting for their reset
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='detector-pool')
+        self.hits = 0                   # Checkouts served warm
+        self.misses = 0                 # Checkouts that had to build a cold detector
+
+    def _build(self):
+        # MediaPipe is imported with the first detector, not with the metrics view
+        from .HandTrackingModule import HandDetector
+        return HandDetector(maxHands=self.maxHands)
+
+    def _clear(self, detector):
+        """
+        Run one blank frame: warms the graph up and, since no hand is found,
+        drops the landmarks it would otherwise track into the next session.
+        """
+        import numpy as np
+        detector.findHands(np.zeros(self.warm_shape, np.uint8), draw=False)
+
+    def _build_warm(self):
+        detector = self._build()
+        self._clear(detector)
+        return detector
+
+    def _submit(self, done, work, *args):
+        """Run work(*args) on the pool's thread, then done(future) on the event loop."""
+        loop = asyncio.get_running_loop()
+        future = self.executor.submit(work, *args)
+        # Nothing to update once the loop is closed, e.g. refills finishing at exit
+        future.add_done_callback(lambda future: loop.is_closed() or loop.call_soon_threadsafe(done, future))
+
+    async def checkout(self):
+        """A warm detector if one is idle, else a cold one built off the event loop."""
+        if self.idle:
+            self.hits += 1
+            detector = self.idle.popleft()
+            self.refill()
+            return detector
+        self.misses += 1
+        self.refill()
+        # On a thread of its own, not queued behind the refill on the pool's thread
+        detector = await asyncio.get_running_loop().run_in_executor(None, self._build)
+        session_manager.graph_opened()
+        return detector
+
+    def release(self, checkout):
+        """checkin() the detector of a checkout() task, now or once it is built."""
+        def done(task):
+            if not task.cancelled() and task.exception() is None:
+                self.checkin(task.result())
+        checkout.add_done_callback(done)
+
+    def checkin(self, detector):
+        """Give a session's detector back, it is reset before reuse."""
+        if len(self.idle) + self.resetting >= self.max_idle:
+            self.close(detector)
+            return
+        self.resetting += 1
+        self._submit(lambda future: self._reset_done(detector, future), self._clear, detector)
+
+    def _reset_done(self, detector, future):
+        self.resetting -= 1
+        if future.exception() is None:
+            self.idle.append(detector)
+        else:
+            logger.error("Failed to reset a returned detector", exc_info=future.exception())
+            self.close(detector)
+
+    def close(self, detector):
+        detector.close()
+        session_manager.graph_closed()
+
+    def refill(self):
+        """Top the idle detectors up to target, off the event loop."""
+        while len(self.idle) + self.building + self.resetting < self.target:
+            self.building += 1
+            self._submit(self._built, self._build_warm)
+
+    def _built(self, future):
+        self.building -= 1
+        if future.exception() is not None:
+            logger.error("Failed to build a pool detector", exc_info=future.exception())
+            return
+        session_manager.graph_opened()
+        self.idle.append(future.result())
+
+    async def fill(self):
+        """Fill the pool and wait for it, e.g. during a preload phase."""
+        self.refill()
+        await asyncio.get_running_loop().run_in_executor(self.executor, lambda: None)
+
+    def stats(self):
+        return {"idle": len(self.idle),
+                "building": self.building,
+                "resetting": self.resetting,
+                "hits": self.hits,
+                "misses": self.misses}
+
+
+detector_pool = DetectorPool(getattr(settings, 'RTC_DETECTOR_POOL_SIZE', 4),
+                             getattr(settings, 'RTC_DETECTOR_POOL_MAX_IDLE', 8))
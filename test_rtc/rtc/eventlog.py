@@ -0,0 +1,224 @@
+"""
+eventlog.py
+Append-only binary proctoring event log per exam session.
+
+- Fixed-size, time-ordered records so any time range can be found by bisection.
+- Records are buffered in memory and written by a single writer thread,
+  never on the event loop.
+- Closing a session appends its summary to the exam's sidecar index,
+  so reviewer queries over a whole exam read one small file.
+
+Layout:
+    <root>/<exam_id>/<session_id>.log   records (see RECORD)
+    <root>/<exam_id>/index.jsonl        one summary line per closed session
+    <root>/<exam_id>/<session_id>/      evidence frames (see evidence.py)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import struct
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# timestamp (epoch seconds), event type, hand count, gesture decision (0 = none)
+RECORD = struct.Struct('<dBBB')
+
+# Event types
+QUIZ_START = 1
+QUIZ_END = 2
+HAND_UNSEEN = 3
+HAND_SEEN = 4
+GESTURE = 5
+LANDMARK_MISMATCH = 6   # Spot check disagreed with client landmarks: hands = detected, gesture = reported count
+
+EVENT_NAMES = {
+    QUIZ_START: 'quiz_start',
+    QUIZ_END: 'quiz_end',
+    HAND_UNSEEN: 'hand_unseen',
+    HAND_SEEN: 'hand_seen',
+    GESTURE: 'gesture',
+    LANDMARK_MISMATCH: 'landmark_mismatch',
+}
+
+
+class EventLog():
+    """
+    Writer side of one session's event log.
+    append() only packs into a buffer, flushing happens on the writer thread.
+    """
+
+    def __init__(self, store, exam_id, session_id, username):
+        self.store = store
+        self.exam_id = exam_id
+        self.session_id = session_id
+        self.username = username
+        self.path = store.log_path(exam_id, session_id)
+        self.buffer = bytearray()
+        self.flush_handle = None        # Pending call_later for a timed flush
+        self.start = None               # Timestamp of the first record
+        self.end = None                 # Timestamp of the last record
+        self.records = 0
+        self.closed = False
+
+    def evidence_dir(self):
+        """Directory for the session's evidence frames, next to its log."""
+        return os.path.join(os.path.dirname(self.path), self.session_id)
+
+    def append(self, timestamp, event, hands=0, gesture=0):
+        """
+        Buffer one record and schedule it for writing. Callers stamp records
+        with one clock (the session's media time); a timestamp before the
+        last one (the clock re-anchored) is raised to it, keeping the log in
+        the time order events() bisects.
+        """
+        if self.closed:
+            return
+        if self.end is not None and timestamp < self.end:
+            timestamp = self.end
+        self.buffer += RECORD.pack(timestamp, event, min(hands, 255), gesture or 0)
+        self.records += 1
+        if self.start is None:
+            self.start = timestamp
+        self.end = timestamp
+
+        if len(self.buffer) >= self.store.flush_bytes:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(
+                self.store.flush_interval, self.flush)
+
+    def flush(self):
+        """Hand the buffered records to the writer thread."""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if self.buffer:
+            data = bytes(self.buffer)
+            self.buffer.clear()
+            self.store.executor.submit(self.store.write_records, self.path, data)
+
+    def close(self, summary=None):
+        """
+        Flush the remaining records and add the session to the exam index.
+        :param summary: Extra fields for the index line (e.g. hands_unseen)
+        """
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        entry = {"session": self.session_id,
+                 "username": self.username,
+                 "start": self.start,
+                 "end": self.end,
+                 "records": self.records}
+        entry.update(summary or {})
+        self.store.executor.submit(self.store.write_index, self.exam_id, entry)
+
+
+class EventLogStore():
+    """
+    Root of all session event logs, with the reviewer query API.
+    """
+
+    def __init__(self, root, flush_bytes=4096, flush_interval=1.0):
+        self.root = str(root)
+        self.flush_bytes = flush_bytes          # Flush once this many bytes are buffered
+        self.flush_interval = flush_interval    # ...or this many seconds after the first append
+        # One writer thread keeps the records and index lines of a session in order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='eventlog')
+
+    def open(self, exam_id, session_id, username=None):
+        """Start the event log of a session."""
+        os.makedirs(os.path.join(self.root, str(exam_id)), exist_ok=True)
+        return EventLog(self, exam_id, session_id, username)
+
+    def log_path(self, exam_id, session_id):
+        return os.path.join(self.root, str(exam_id), f'{session_id}.log')
+
+    def index_path(self, exam_id):
+        return os.path.join(self.root, str(exam_id), 'index.jsonl')
+
+    def write_records(self, path, data):
+        try:
+            with open(path, 'ab') as file:
+                file.write(data)
+        except OSError:
+            logger.exception(f"Failed to write event log {path}")
+
+    def write_index(self, exam_id, entry):
+        try:
+            with open(self.index_path(exam_id), 'a', encoding='utf-8') as file:
+                file.write(json.dumps(entry) + "\n")
+        except OSError:
+            logger.exception(f"Failed to write event log index for exam {exam_id}")
+
+    # ----------------------------
+    # Reviewer queries
+    # ----------------------------
+    def sessions(self, exam_id, min_unseen=None):
+        """
+        Closed sessions of an exam from the sidecar index.
+        :param min_unseen: Only sessions with more than this many seconds of hands unseen
+        """
+        try:
+            file = open(self.index_path(exam_id), encoding='utf-8')
+        except FileNotFoundError:
+            return []
+        sessions = []
+        with file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if min_unseen is None or entry.get("hands_unseen", 0) > min_unseen:
+                    sessions.append(entry)
+        return sessions
+
+    def events(self, exam_id, session_id, t0=None, t1=None):
+        """
+        Events of one session with t0 <= timestamp <= t1.
+        Bisects the fixed-size records instead of reading the whole log.
+        """
+        path = self.log_path(exam_id, session_id)
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            return []
+
+        with file:
+            count = os.fstat(file.fileno()).st_size // RECORD.size
+
+            def timestamp_at(i):
+                file.seek(i * RECORD.size)
+                return RECORD.unpack(file.read(RECORD.size))[0]
+
+            lo, hi = 0, count
+            if t0 is not None:
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if timestamp_at(mid) < t0:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+
+            file.seek(lo * RECORD.size)
+            events = []
+            for _ in range(lo, count):
+                timestamp, event, hands, gesture = RECORD.unpack(file.read(RECORD.size))
+                if t1 is not None and timestamp > t1:
+                    break
+                events.append({"timestamp": timestamp,
+                               "event": EVENT_NAMES.get(event, event),
+                               "hands": hands,
+                               "gesture": gesture or None})
+        return events
+
+
+event_store = EventLogStore(getattr(settings, 'RTC_EVENT_LOG_DIR', 'eventlog'))
@@ -0,0 +1,105 @@
+"""
+evidence.py
+Evidence frames for proctoring violations.
+
+- Each session keeps a small ring buffer of recent downscaled frames.
+- When a violation starts, the frames around it are JPEG-encoded
+  in a shared worker pool and written next to the session's event log.
+- Memory, captures per session and queued encode jobs per node are capped.
+"""
+
+import logging
+import os
+import threading
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# Shared by all sessions of the node, cv2.imencode releases the GIL
+encoder_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='evidence')
+MAX_QUEUED_JOBS = 32
+_queued_jobs = 0
+_queued_lock = threading.Lock()
+
+
+def _encode_and_write(directory, prefix, frames, quality):
+    global _queued_jobs
+    try:
+        os.makedirs(directory, exist_ok=True)
+        for i, (timestamp, img) in enumerate(frames):
+            ok, buffer = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if ok:
+                with open(os.path.join(directory, f'{prefix}_{i:02d}_{timestamp:.3f}.jpg'), 'wb') as file:
+                    file.write(buffer.tobytes())
+    except Exception:
+        logger.exception(f"Failed to write evidence frames to {directory}")
+    finally:
+        with _queued_lock:
+            _queued_jobs -= 1
+
+
+class EvidenceRecorder():
+    """
+    Ring buffer of recent frames for one session.
+    add() is called on processed frames, trigger() when a violation starts.
+    """
+
+    def __init__(self, width=160, before=4, after=4, max_captures=20, quality=70):
+        self.width = width                  # Width of stored frames (aspect ratio kept)
+        self.after = after                  # Frames kept after the violation
+        self.max_captures = max_captures    # Captures per session
+        self.quality = quality              # JPEG quality
+        self.ring = deque(maxlen=before)    # (timestamp, small frame) before the violation
+        self.capture = None                 # Frames of the capture being collected
+        self.capture_size = 0               # Frames the capture is complete at
+        self.capture_dir = None
+        self.capture_prefix = None
+        self.captures = 0
+
+    def add(self, img, timestamp):
+        """Store a downscaled copy of a frame."""
+        h, w = img.shape[:2]
+        if w > self.width:
+            img = cv2.resize(img, (self.width, h * self.width // w), interpolation=cv2.INTER_AREA)
+        else:
+            img = img.copy()
+
+        if self.capture is not None:
+            self.capture.append((timestamp, img))
+            if len(self.capture) >= self.capture_size:
+                self._submit()
+        self.ring.append((timestamp, img))
+
+    def trigger(self, timestamp, directory):
+        """
+        Start collecting evidence for a violation at timestamp.
+        Ignored while a capture is in progress or the session's budget is spent.
+        """
+        if self.capture is not None or self.captures >= self.max_captures:
+            return False
+        self.captures += 1
+        self.capture = list(self.ring)
+        self.capture_size = len(self.capture) + self.after
+        self.capture_dir = directory
+        self.capture_prefix = f'{timestamp:.3f}'
+        return True
+
+    def _submit(self):
+        global _queued_jobs
+        frames, self.capture = self.capture, None
+        with _queued_lock:
+            if _queued_jobs >= MAX_QUEUED_JOBS:
+                logger.warning("Evidence encoder saturated, dropping capture")
+                return
+            _queued_jobs += 1
+        encoder_pool.submit(_encode_and_write, self.capture_dir, self.capture_prefix, frames, self.quality)
+
+    def flush(self):
+        """Encode a capture that is still collecting frames (e.g. session ended)."""
+        if self.capture:
+            self._submit()
+        self.capture = None
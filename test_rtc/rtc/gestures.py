@@ -0,0 +1,187 @@
+"""
+gestures.py
+Answer gestures: cheap geometric rules first, the Keras classifier only when they are unsure.
+
+- angle_features() computes the 18 joint-angle cosines the classifier was
+  trained on (model/angle_collection.py), from a hand in HandDetector format.
+- rule_gesture() is the quiz's own rule, landmarks.tips_up, with a margin:
+  how close the least clear finger is to flipping, as a share of the hand's
+  size. With or without a classifier, a clear hand reads the same.
+- GestureCascade escalates to the classifier only when the margin is small
+  or the rules disagree with the previous decision. TensorFlow is optional:
+  without it (or without RTC_GESTURE_MODEL) the rules decide alone.
+"""
+
+import logging
+import math
+import os
+import time
+
+import numpy as np
+
+from django.conf import settings
+
+from . import landmarks
+from .threads import thread_budget
+
+logger = logging.getLogger(__name__)
+
+# Output order of the classifier (model/train.ipynb) and the answer of each class
+CLASS_NAMES = ('no', 'one', 'two', 'three', 'four', 'undo')
+CLASS_ANSWERS = (None, 1, 2, 3, 4, 5)
+GESTURE_ANSWERS = {(0, 1, 0, 0, 0): 1, (0, 1, 1, 0, 0): 2, (0, 1, 1, 1, 0): 3, (0, 1, 1, 1, 1): 4,
+                   (1, 0, 0, 0, 0): 5}
+
+# Landmark triples (a, b, c) of each angle, the angle being at b
+_FINGERS = [[0, 1, 2, 3, 4], [0, 5, 6, 7, 8], [0, 9, 10, 11, 12], [0, 13, 14, 15, 16], [0, 17, 18, 19, 20]]
+_TRIPLES = [finger[i - 1:i + 2] for finger in _FINGERS for i in range(1, 4)]
+_TRIPLES += [[_FINGERS[i - 1][4], _FINGERS[i][4], _FINGERS[i + 1][4]] for i in range(1, 4)]
+_A, _B, _C = np.array(_TRIPLES).T
+
+
+def answer_for(fingers):
+    """Answer of a finger pattern [thumb, index, middle, ring, pinky], 5 = undo, None = no answer."""
+    return GESTURE_ANSWERS.get(tuple(fingers))
+
+
+def angle_features(lmList, width, height):
+    """
+    The classifier's 18 features of one hand: cosines of the angles at each
+    finger joint, then between neighbouring fingertips. Pixel landmarks are
+    normalized as in the training data, on the frame padded to 16:9.
+    """
+    padded_width, padded_height = max(width, height * 16 / 9), max(height, width * 9 / 16)
+    points = np.asarray(lmList, dtype=float) / (padded_width, padded_height, padded_width)
+    v1, v2 = points[_A] - points[_B], points[_C] - points[_B]
+    norms = np.linalg.norm(v1, axis=1) * np.linalg.norm(v2, axis=1)
+    return np.clip(np.einsum('ij,ij->i', v1, v2) / np.maximum(norms, 1e-9), -1.0, 1.0)
+
+
+def load_dataset(directory):
+    """
+    The recorded angle features, data/<class>.npy per class: (features, labels),
+    labels being indices into CLASS_NAMES. Rows stay in recording order.
+    """
+    features, labels = [], []
+    for index, name in enumerate(CLASS_NAMES):
+        rows = np.load(os.path.join(directory, f'{name}.npy'))
+        features.append(rows)
+        labels.append(np.full(len(rows), index))
+    return np.concatenate(features), np.concatenate(labels)
+
+
+def rule_gesture(hand):
+    """
+    (answer, margin) of a hand in HandDetector format by tips_up, the rule the
+    quiz uses without a classifier. tips_up compares each fingertip with one
+    joint (thumb: x of the tip and the joint below, fingers: y of the tip and
+    the middle joint); the margin is the smallest of those distances, over the
+    hand's size (wrist to middle finger knuckle).
+    """
+    lmList = hand["lmList"]
+    tip, ids = landmarks.TIP_IDS[0], landmarks.TIP_IDS[1:]
+    distances = [abs(lmList[tip][0] - lmList[tip - 1][0])]
+    distances += [abs(lmList[tip][1] - lmList[tip - 2][1]) for tip in ids]
+    size = max(math.dist(lmList[0][:2], lmList[9][:2]), 1.0)
+    return answer_for(landmarks.tips_up(hand)), min(distances) / size
+
+
+class GestureClassifier():
+    """
+    The angle-feature Keras model with its normalization, shared by the sessions of a process.
+    :param classes: Names of the model's outputs, in order, from CLASS_NAMES
+        (gesture_quiz5.h5 has no 'no' output: one, two, three, four, undo)
+    """
+
+    def __init__(self, model_path, mean_path, std_path, classes=CLASS_NAMES):
+        import tensorflow as tf
+        thread_budget.configure_tensorflow(tf)
+        self.model = tf.keras.models.load_model(model_path, compile=False)
+        if self.model.output_shape[-1] != len(classes):
+            raise ValueError(f"{model_path} has {self.model.output_shape[-1]} outputs, "
+                             f"{len(classes)} classes given ({', '.join(classes)})")
+        self.classes = tuple(classes)
+        self.answers = [CLASS_ANSWERS[CLASS_NAMES.index(name)] for name in classes]
+        # One traced graph for any batch size: a fraction of the per-call cost of eager or predict()
+        self.infer = tf.function(lambda x: self.model(x, training=False),
+                                 input_signature=[tf.TensorSpec([None, 18, 1], tf.float32)])
+        self.mean = np.load(mean_path)
+        self.std = np.load(std_path)
+        self.calls = 0
+        self.seconds = 0.0              # Inference time of all calls
+
+    def predict(self, features):
+        """Class probabilities of a batch of feature rows, shape (n, len(classes))."""
+        x = ((np.asarray(features, dtype=float).reshape(-1, 18) - self.mean) / self.std).astype(np.float32)
+        start = time.perf_counter()
+        probabilities = self.infer(x.reshape(-1, 18, 1)).numpy()
+        self.seconds += time.perf_counter() - start
+        self.calls += 1
+        return probabilities
+
+    def classify(self, features):
+        """(answer, confidence) of one hand."""
+        probabilities = self.predict(features)[0]
+        index = int(np.argmax(probabilities))
+        return self.answers[index], float(probabilities[index])
+
+    def stats(self):
+        return {"calls": self.calls,
+                "mean_ms": self.seconds / self.calls * 1000 if self.calls else None}
+
+
+_classifier = None
+_classifier_loaded = False
+
+
+def gesture_classifier():
+    """
+    The process' GestureClassifier, loaded on first use from RTC_GESTURE_MODEL
+    and RTC_GESTURE_NORMALIZATION (outputs RTC_GESTURE_CLASSES, default CLASS_NAMES);
+    None when not configured or TensorFlow is missing.
+    """
+    global _classifier, _classifier_loaded
+    if not _classifier_loaded:
+        _classifier_loaded = True
+        model = getattr(settings, 'RTC_GESTURE_MODEL', None)
+        if model:
+            mean, std = settings.RTC_GESTURE_NORMALIZATION
+            try:
+                _classifier = GestureClassifier(os.fspath(model), mean, std,
+                                                getattr(settings, 'RTC_GESTURE_CLASSES', CLASS_NAMES))
+            except ImportError:
+                logger.warning("RTC_GESTURE_MODEL is set but TensorFlow is not installed, gestures use the rules only")
+    return _classifier
+
+
+def classifier_stats():
+    """Stats of the loaded classifier, None if there is none (never loads it)."""
+    return _classifier.stats() if _classifier else None
+
+
+class GestureCascade():
+    """
+    Gesture decisions of one session: rules first, the classifier on ambiguity.
+    """
+
+    def __init__(self, classifier=None, margin=0.05):
+        self.classifier = classifier    # GestureClassifier, None = rules only
+        self.margin = margin            # Rule margins below this escalate
+        self.previous = None            # Last decision
+        self.frames = 0
+        self.escalated = 0
+
+    def classify(self, hand, width, height):
+        """Answer of a hand in HandDetector format on a width x height frame, or None."""
+        answer, margin = rule_gesture(hand)
+        self.frames += 1
+        if self.classifier and (margin < self.margin or answer != self.previous):
+            self.escalated += 1
+            answer, _ = self.classifier.classify(angle_features(hand["lmList"], width, height))
+        self.previous = answer
+        return answer
+
+    def stats(self):
+        return {"frames": self.frames,
+                "escalated": self.escalated,
+                "escalation_rate": self.escalated / self.frames if self.frames else None}
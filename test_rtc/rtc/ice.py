@@ -0,0 +1,126 @@
+"""
+ice.py
+ICE helpers for the signaling consumer.
+
+- Trickles the candidates gathered by the peer connection itself,
+  with the right sdpMid/sdpMLineIndex, instead of running a second gather.
+- Node-level cache of which configured STUN servers produce server-reflexive
+  candidates for this host. While it is fresh, peer connections are
+  configured with the STUN servers that actually answered, so an
+  unreachable one never costs its timeout per login. TURN servers are
+  always kept: a relay is the last resort of clients behind symmetric NATs,
+  and one slow probe must not take it away for a whole ttl.
+"""
+
+import asyncio
+import logging
+import time
+
+from aiortc import RTCConfiguration, RTCIceGatherer, RTCIceTransport
+from aiortc.sdp import SessionDescription, candidate_to_sdp
+
+logger = logging.getLogger(__name__)
+
+
+def is_turn(server):
+    """Whether an RTCIceServer is a TURN server (any turn: or turns: url)."""
+    urls = [server.urls] if isinstance(server.urls, str) else server.urls
+    return any(url.startswith(('turn:', 'turns:')) for url in urls)
+
+
+def local_candidate_messages(pc):
+    """
+    Signaling messages for the candidates in pc's local description,
+    one per candidate and an end-of-candidates marker per media section.
+    Call after setLocalDescription, which gathers them.
+    """
+    messages = []
+    description = SessionDescription.parse(pc.localDescription.sdp)
+    for index, media in enumerate(description.media):
+        mid = media.rtp.muxId
+        for candidate in media.ice_candidates:
+            messages.append({
+                "type": "ice_candidate",
+                "candidate": {
+                    "candidate": "candidate:" + candidate_to_sdp(candidate),
+                    "component": candidate.component,
+                    "foundation": candidate.foundation,
+                    "ip": candidate.ip,
+                    "port": candidate.port,
+                    "priority": candidate.priority,
+                    "protocol": candidate.protocol,
+                    "type": candidate.type,
+                    "sdpMid": mid,
+                    "sdpMLineIndex": index,
+                }
+            })
+        messages.append({
+            "type": "ice_candidate",
+            "candidate": {"candidate": "", "sdpMid": mid, "sdpMLineIndex": index}
+        })
+    return messages
+
+
+class IceServerCache():
+    """
+    Remembers, for ttl seconds, which STUN servers produce candidates for this host.
+    """
+
+    def __init__(self, ice_servers, ttl=300, probe_timeout=6):
+        self.ice_servers = ice_servers          # Configured STUN/TURN servers, in order of preference
+        self.ttl = ttl
+        self.probe_timeout = probe_timeout
+        self.working = None                     # TURN servers and the STUN servers that answered, in order
+        self.expires = 0.0
+        self.refresh_task = None
+
+    def configuration(self):
+        """
+        RTCConfiguration for a new peer connection.
+        Uses all servers until the first probe finished, and starts a probe when stale.
+        """
+        if time.monotonic() >= self.expires:
+            self.schedule_refresh()
+        servers = self.ice_servers if self.working is None else self.working
+        return RTCConfiguration(iceServers=servers)
+
+    def schedule_refresh(self):
+        if self.refresh_task is None or self.refresh_task.done():
+            self.refresh_task = asyncio.ensure_future(self.refresh())
+
+    async def refresh(self):
+        """
+        Probe every STUN server once, in parallel, off the signaling path.
+        A round where none answers keeps the previous set (the host's network,
+        not every server, is the likelier culprit) and is retried after a
+        tenth of the ttl instead of being cached.
+        """
+        stun = [server for server in self.ice_servers if not is_turn(server)]
+        results = await asyncio.gather(*(self._probe(server) for server in stun))
+        answered = [server for server, ok in zip(stun, results) if ok]
+        if answered or not stun:
+            self.working = [server for server in self.ice_servers if is_turn(server) or server in answered]
+            self.expires = time.monotonic() + self.ttl
+            logger.info(f"STUN servers answering: {[server.urls for server in answered]}")
+        else:
+            self.expires = time.monotonic() + self.ttl / 10
+            logger.warning("No STUN server answered the probe, keeping the previous set")
+
+    async def _probe(self, server):
+        """Whether server yields a server-reflexive candidate; never raises."""
+        gatherer = RTCIceGatherer(iceServers=[server])
+        try:
+            await asyncio.wait_for(gatherer.gather(), self.probe_timeout)
+            candidates = gatherer.getLocalCandidates()
+        except asyncio.TimeoutError:
+            return False
+        except Exception:
+            logger.exception(f"Probing ICE server {server.urls} failed")
+            return False
+        finally:
+            try:
+                # Closes the gatherer's connection through the public API
+                await RTCIceTransport(gatherer).stop()
+            except Exception:
+                logger.exception(f"Closing the probe of {server.urls} failed")
+        return any(candidate.type == 'srflx' for candidate in candidates)
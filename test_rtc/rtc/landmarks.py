@@ -0,0 +1,194 @@
+"""
+landmarks.py
+Hand landmarks in the HandDetector format, wherever they were computed.
+
+- hands_from_client() turns the landmarks a client streams (normalized, on its
+  unmirrored camera image) into the hand dicts findHands returns on the
+  server's mirrored frame, so processing() cannot tell them apart.
+- tips_up() is HandDetector.tipsUp without the detector, for hands the
+  session's own detector did not produce.
+- disagreement() compares two sets of hands of the same moment, for spot checks.
+- HandFilter smooths each hand's landmarks with a One-Euro filter on
+  detection frames and extrapolates them on the frames in between, and
+  draw_hands() draws them the way findHands does.
+"""
+
+import math
+
+import cv2
+import numpy as np
+
+TIP_IDS = [4, 8, 12, 16, 20]
+LANDMARKS_PER_HAND = 21
+MAX_CLIENT_HANDS = 2                # The detector's maxHands
+CLIENT_RANGE = (-1.0, 2.0)          # Normalized coordinates a client may send, off-frame margin included
+# mediapipe.solutions.hands.HAND_CONNECTIONS, without importing MediaPipe
+HAND_CONNECTIONS = [(0, 1), (0, 5), (0, 17), (1, 2), (2, 3), (3, 4), (5, 6), (5, 9), (6, 7), (7, 8),
+                    (9, 10), (9, 13), (10, 11), (11, 12), (13, 14), (13, 17), (14, 15), (15, 16),
+                    (17, 18), (18, 19), (19, 20)]
+
+
+def hand_dict(lmList, hand_type):
+    """A hand as HandDetector.findHands builds it from pixel landmarks."""
+    xList = [lm[0] for lm in lmList]
+    yList = [lm[1] for lm in lmList]
+    xmin, ymin = min(xList), min(yList)
+    bbox = xmin, ymin, max(xList) - xmin, max(yList) - ymin
+    return {"lmList": lmList,
+            "bbox": bbox,
+            "center": (bbox[0] + bbox[2] // 2, bbox[1] + bbox[3] // 2),
+            "type": hand_type}
+
+
+def hands_from_client(hands, width, height):
+    """
+    :param hands: [{"type": "Left"|"Right", "landmarks": [[x, y, z] * 21]}], normalized
+                  coordinates and handedness as MediaPipe reports them on the unmirrored image
+    :param width, height: Size of the video frames the server receives
+    :raises ValueError: on a malformed hand, or one the pipeline could not draw or compare
+    """
+    if not isinstance(hands, list) or len(hands) > MAX_CLIENT_HANDS:
+        raise ValueError(f"Expected a list of at most {MAX_CLIENT_HANDS} hands")
+    result = []
+    for hand in hands:
+        if hand["type"] not in ("Left", "Right"):
+            raise ValueError(f"Unknown hand type {hand['type']!r}")
+        points = hand["landmarks"]
+        if not isinstance(points, list) or len(points) != LANDMARKS_PER_HAND:
+            raise ValueError(f"Expected {LANDMARKS_PER_HAND} landmarks")
+        if not all(isinstance(point, list) and len(point) == 3 for point in points):
+            raise ValueError("Expected [x, y, z] landmarks")
+        values = [float(value) for point in points for value in point]
+        # Also rejects NaN and Infinity, which JSON parsing lets through
+        if not all(CLIENT_RANGE[0] <= value <= CLIENT_RANGE[1] for value in values):
+            raise ValueError(f"Landmark coordinates outside {CLIENT_RANGE}")
+        # The server works on the mirrored image: x flips, and so does handedness
+        lmList = [[int((1 - x) * width), int(y * height), int(z * width)]
+                  for x, y, z in zip(values[0::3], values[1::3], values[2::3])]
+        result.append(hand_dict(lmList, "Left" if hand["type"] == "Right" else "Right"))
+    return result
+
+
+def tips_up(hand):
+    """Which fingers are up, [thumb, index, middle, ring, pinky], same rules as HandDetector.tipsUp."""
+    lmList = hand["lmList"]
+    if hand["type"] == "Left":
+        fingers = [1 if lmList[TIP_IDS[0]][0] > lmList[TIP_IDS[0] - 1][0] else 0]
+    else:
+        fingers = [1 if lmList[TIP_IDS[0]][0] < lmList[TIP_IDS[0] - 1][0] else 0]
+    for id in range(1, 5):
+        fingers.append(1 if lmList[TIP_IDS[id]][1] < lmList[TIP_IDS[id] - 2][1] else 0)
+    return fingers
+
+
+def disagreement(reported, detected, tolerance=0.35):
+    """
+    Why two sets of hands of the same moment disagree, or None if they agree.
+    Hands are paired by nearest center; landmarks may be off by tolerance
+    times the detected hand's size, which leaves room for motion between
+    the two observations.
+    """
+    if len(reported) != len(detected):
+        return 'hand_count'
+    unpaired = list(reported)
+    for hand in detected:
+        other = min(unpaired, key=lambda r: math.dist(r["center"], hand["center"]))
+        unpaired.remove(other)
+        size = max(math.hypot(hand["bbox"][2], hand["bbox"][3]), 1)
+        error = sum(math.dist(a[:2], b[:2]) for a, b in zip(hand["lmList"], other["lmList"])) / len(hand["lmList"])
+        if error > tolerance * size:
+            return 'landmarks'
+    return None
+
+
+def draw_hands(img, hands):
+    """Draw hands on img in place, like findHands(draw=True) does."""
+    for hand in hands:
+        points = [tuple(lm[:2]) for lm in hand["lmList"]]
+        for a, b in HAND_CONNECTIONS:
+            cv2.line(img, points[a], points[b], (224, 224, 224), 2)
+        for point in points:
+            cv2.circle(img, point, 2, (0, 0, 255), 2)
+        x, y, w, h = hand["bbox"]
+        cv2.rectangle(img, (x - 20, y - 20), (x + w + 20, y + h + 20), (255, 255, 255), 2)
+        cv2.putText(img, hand["type"], (x - 30, y - 30), cv2.FONT_HERSHEY_PLAIN, 2, (255, 255, 255), 2)
+    return img
+
+
+class OneEuroFilter():
+    """
+    One-Euro filter (Casiez et al., CHI 2012) over an array of coordinates:
+    a low-pass filter whose cutoff rises with speed, so slow hands are
+    steady and fast ones do not lag. Keeps the filtered velocity, used
+    to extrapolate.
+    """
+
+    def __init__(self, min_cutoff=0.5, beta=0.05, d_cutoff=5.0):
+        self.min_cutoff = min_cutoff    # Hz, smoothing at rest
+        self.beta = beta                # Cutoff increase per pixel/s of speed
+        self.d_cutoff = d_cutoff        # Hz, smoothing of the velocity (high: extrapolation follows turns)
+        self.x = None                   # Filtered coordinates
+        self.dx = None                  # Filtered velocity, per second
+        self.t = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1 / (2 * math.pi * cutoff)
+        return 1 / (1 + tau / dt)
+
+    def __call__(self, x, t):
+        if self.x is None:
+            self.x, self.dx, self.t = x, np.zeros_like(x), t
+            return x
+        dt = max(t - self.t, 1e-3)
+        a_d = self._alpha(self.d_cutoff, dt)
+        self.dx = a_d * (x - self.x) / dt + (1 - a_d) * self.dx
+        a = self._alpha(self.min_cutoff + self.beta * np.abs(self.dx), dt)
+        self.x = a * x + (1 - a) * self.x
+        self.t = t
+        return self.x
+
+    def predict(self, t):
+        return self.x + self.dx * (t - self.t)
+
+
+class HandFilter():
+    """
+    Filtered hands of one session. update() takes the hands of a detection
+    frame, predict() extrapolates them to a frame in between. Hands are
+    told apart by type; a hand that goes unseen starts a fresh filter.
+    """
+
+    def __init__(self, max_gap=0.5, **params):
+        self.max_gap = max_gap          # Seconds a hand is extrapolated without a detection
+        self.params = params            # OneEuroFilter parameters
+        self.filters = {}               # Hand key -> (OneEuroFilter, hand type)
+
+    def _keys(self, hands):
+        keys = []
+        for hand in hands:
+            key = hand["type"]
+            while key in keys:
+                key += '+'              # Two hands reported with the same type
+            keys.append(key)
+        return keys
+
+    def update(self, hands, t):
+        filtered = []
+        keys = self._keys(hands)
+        for key, hand in zip(keys, hands):
+            one_euro = self.filters.get(key, (None,))[0] or OneEuroFilter(**self.params)
+            self.filters[key] = (one_euro, hand["type"])
+            points = one_euro(np.asarray(hand["lmList"], dtype=float), t)
+            filtered.append(hand_dict(np.rint(points).astype(int).tolist(), hand["type"]))
+        for key in set(self.filters) - set(keys):
+            del self.filters[key]
+        return filtered
+
+    def predict(self, t):
+        predicted = []
+        for one_euro, hand_type in self.filters.values():
+            if t - one_euro.t <= self.max_gap:
+                points = one_euro.predict(t)
+                predicted.append(hand_dict(np.rint(points).astype(int).tolist(), hand_type))
+        return predicted
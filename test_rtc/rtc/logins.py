@@ -0,0 +1,76 @@
+"""
+logins.py
+Exam-assignment lookup for logins.
+
+- One joined query resolves username -> password and exam settings.
+- A short-TTL in-process cache absorbs login storms at exam start.
+- Saving or deleting a user or an exam (e.g. in the admin) clears the cache.
+"""
+
+import time
+
+from django.db import connection
+
+
+def lookup_assignment(username):
+    """
+    Fetch the user's password and assigned exam in a single joined query.
+    Returns (password, exam dict or None), or None for an unknown user.
+    """
+    from .models import Users, Exams
+
+    qn = connection.ops.quote_name
+    users, exams = qn(Users._meta.db_table), qn(Exams._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT u.{qn('Password')}, u.{qn('UserExamId')}, e.{qn('ExamFile')}, e.{qn('RecordSessions')}, "
+            f"e.{qn('PreviewWidth')}, e.{qn('PreviewMaxFps')}, e.{qn('ClientLandmarkRate')} "
+            f"FROM {users} u LEFT JOIN {exams} e ON e.{qn('ExamId')} = u.{qn('UserExamId')} "
+            f"WHERE u.{qn('Username')} = %s LIMIT 1",
+            [username])
+        row = cursor.fetchone()
+    if row is None:
+        return None
+
+    password, exam_id, exam_file, record, preview_width, preview_fps, landmark_rate = row
+    if exam_file is None:
+        return password, None
+    return password, {"exam_id": exam_id,
+                      "exam_file": exam_file,
+                      "record": bool(record),
+                      "preview": (preview_width, preview_fps),
+                      "landmark_rate": landmark_rate}
+
+
+class AssignmentCache():
+    """
+    username -> (password, exam) for ttl seconds.
+    Unknown usernames are not cached, so a new user can log in right away.
+    """
+
+    def __init__(self, ttl=30, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = {}               # username -> (expires, assignment)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username):
+        entry = self.entries.get(username)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(self, username, assignment):
+        if len(self.entries) >= self.max_entries:
+            self.entries.clear()
+        self.entries[username] = (time.monotonic() + self.ttl, assignment)
+
+    def clear(self, **kwargs):
+        """Signal receiver for admin edits of Users/Exams."""
+        self.entries.clear()
+
+
+assignment_cache = AssignmentCache()
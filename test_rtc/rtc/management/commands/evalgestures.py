@@ -0,0 +1,131 @@
+"""
+Evaluate gesture classifier generations on the recorded angle features.
+
+    python manage.py evalgestures [model/gesture_quiz5.h5 model/gesture_quiz6.h5]
+        [--classes one,two,three,four,undo --classes no,one,two,three,four,undo] [--batch 256]
+
+Each model is read with its normalization files (normalization_meanN.npy /
+normalization_stdN.npy next to gesture_quizN.h5, or --normalization) and
+run in batches over model/data. Reports per-class precision and recall,
+the confusion matrix (rows: recorded class, columns: predicted), and the
+latency of single-sample and batched inference, the way sessions call it.
+Needs TensorFlow.
+
+model/data is also what the models were trained on, and training.ipynb
+shuffles without a seed, so the scores are upper bounds: use them to
+compare generations, not as field accuracy.
+"""
+
+import os
+import re
+import time
+
+import numpy as np
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rtc.gestures import CLASS_NAMES, GestureClassifier, load_dataset
+
+
+def normalization_of(model_path):
+    """(mean, std) paths of gesture_quizN.h5: normalization_meanN.npy and normalization_stdN.npy beside it."""
+    directory, name = os.path.split(model_path)
+    generation = re.sub(r'^\D*|\.h5$', '', name)
+    return (os.path.join(directory, f'normalization_mean{generation}.npy'),
+            os.path.join(directory, f'normalization_std{generation}.npy'))
+
+
+class Command(BaseCommand):
+    help = "Per-class precision/recall, confusion matrix and latency of gesture classifiers on model/data"
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', default=['model/gesture_quiz5.h5', 'model/gesture_quiz6.h5'],
+                            help='Keras models (.h5)')
+        parser.add_argument('--normalization', nargs=2, metavar=('MEAN', 'STD'),
+                            help='Normalization files, for a single model not named gesture_quizN.h5')
+        parser.add_argument('--classes', action='append', type=lambda names: tuple(names.split(',')),
+                            help="Output classes of a model, in order, once per model "
+                                 f"(default {','.join(CLASS_NAMES)}; gesture_quiz5.h5 has no 'no')")
+        parser.add_argument('--data', default='model/data', help='Directory of <class>.npy feature files')
+        parser.add_argument('--batch', type=int, default=256, help='Batch size of the batched inference')
+        parser.add_argument('--latency-samples', type=int, default=300,
+                            help='Single-sample calls timed, and rows per batched run')
+
+    def handle(self, *args, **options):
+        models = options['models']
+        classes = options['classes'] or []
+        if options['normalization'] and len(models) > 1:
+            raise CommandError("--normalization applies to a single model")
+        if len(classes) not in (0, 1, len(models)):
+            raise CommandError("give --classes once, or once per model")
+        for names in classes:
+            unknown = set(names) - set(CLASS_NAMES)
+            if unknown:
+                raise CommandError(f"unknown classes {', '.join(sorted(unknown))}, known: {', '.join(CLASS_NAMES)}")
+
+        features, labels = load_dataset(options['data'])
+        counts = np.bincount(labels, minlength=len(CLASS_NAMES))
+        self.stdout.write(f"{len(labels)} samples: " + ', '.join(f"{name} {count}"
+                                                                 for name, count in zip(CLASS_NAMES, counts)))
+        for i, model in enumerate(models):
+            names = classes[i if len(classes) > 1 else 0] if classes else CLASS_NAMES
+            mean, std = options['normalization'] or normalization_of(model)
+            try:
+                classifier = GestureClassifier(model, mean, std, names)
+            except ImportError:
+                raise CommandError("TensorFlow is not installed")
+            except ValueError as error:
+                raise CommandError(f"{error}; set the model's classes with --classes")
+            self.stdout.write(f"\n{model} ({os.path.basename(mean)}, {os.path.basename(std)})")
+            self.evaluate(classifier, features, labels, options['batch'])
+            self.latency(classifier, features, options['batch'], options['latency_samples'])
+
+    def evaluate(self, classifier, features, labels, batch):
+        """Batched predictions over the dataset: accuracy, confusion matrix, precision and recall."""
+        predicted = np.concatenate([classifier.predict(features[start:start + batch]).argmax(axis=1)
+                                    for start in range(0, len(features), batch)])
+        # Model output index -> dataset class index
+        predicted = np.array([CLASS_NAMES.index(name) for name in classifier.classes])[predicted]
+        confusion = np.zeros((len(CLASS_NAMES), len(CLASS_NAMES)), dtype=int)
+        np.add.at(confusion, (labels, predicted), 1)
+
+        known = np.isin(labels, [CLASS_NAMES.index(name) for name in classifier.classes])
+        accuracy = (predicted == labels)[known].mean()
+        missing = [name for name in CLASS_NAMES if name not in classifier.classes]
+        self.stdout.write(f"accuracy {accuracy:.1%} on the model's classes"
+                          + (f", {', '.join(missing)} not a class of the model: "
+                             f"their samples count against precision only" if missing else ''))
+
+        width = max(map(len, CLASS_NAMES)) + 2
+        self.stdout.write(f"{'':{width}s}" + ''.join(f"{name:>{width}s}" for name in CLASS_NAMES)
+                          + f"{'precision':>11s}{'recall':>8s}")
+        for index, name in enumerate(CLASS_NAMES):
+            row = confusion[index]
+            column = confusion[:, index]
+            precision = f"{column[index] / column.sum():11.1%}" if column.sum() else f"{'-':>11s}"
+            recall = f"{row[index] / row.sum():8.1%}" if name in classifier.classes and row.sum() else f"{'-':>8s}"
+            self.stdout.write(f"{name:{width}s}" + ''.join(f"{count:{width}d}" for count in row)
+                              + precision + recall)
+
+    def latency(self, classifier, features, batch, samples):
+        """Single-sample inference as a session calls it, against batches of batch rows."""
+        rows = features[:samples]
+        classifier.classify(rows[0])                    # Traces the graph
+        single = []
+        for row in rows:
+            start = time.perf_counter()
+            classifier.classify(row)
+            single.append(time.perf_counter() - start)
+        single = np.array(single) * 1e6
+
+        batches = [rows[start:start + batch] for start in range(0, len(rows), batch)]
+        classifier.predict(batches[0])
+        start = time.perf_counter()
+        for rows_batch in batches:
+            classifier.predict(rows_batch)
+        batched = (time.perf_counter() - start) / len(rows) * 1e6
+
+        self.stdout.write(f"single sample: p50 {np.percentile(single, 50):.0f} us, "
+                          f"p99 {np.percentile(single, 99):.0f} us, {1e6 / single.mean():.0f} samples/s; "
+                          f"batches of {min(batch, len(rows))}: {batched:.1f} us per sample, "
+                          f"{1e6 / batched:.0f} samples/s")
@@ -0,0 +1,24 @@
+"""
+Send an admin message to every connected student, on every worker.
+
+    python manage.py rtcbroadcast "The exam ends in 5 minutes"
+"""
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand
+
+from rtc.consumers import ADMIN_GROUP
+
+
+class Command(BaseCommand):
+    help = "Broadcast an admin message to all sessions through the channel layer"
+
+    def add_arguments(self, parser):
+        parser.add_argument('text')
+
+    def handle(self, *args, **options):
+        async_to_sync(get_channel_layer().group_send)(ADMIN_GROUP, {
+            "type": "admin.message",
+            "text": options['text'],
+        })
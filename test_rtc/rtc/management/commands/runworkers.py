@@ -0,0 +1,81 @@
+"""
+Serve the app with several Daphne worker processes behind a front router.
+
+    python manage.py runworkers --workers 4 --port 8000
+
+Each WebSocket session stays on the worker it was routed to. Set
+RTC_CHANNEL_LAYER=redis (and RTC_REDIS_URL) so admin messages reach every worker.
+With --preload, workers load OpenCV/MediaPipe and fill their detector pool in
+the background right after they start listening, instead of on the first session.
+Each worker gets its share of the cores as its thread budget (see rtc/threads.py);
+--pin also pins it to those cores. RTC_MAX_SESSIONS stays a node limit: each
+worker admits its share of it (RTC_WORKER_SESSIONS). Each worker spools results
+to a file of its own; spools no worker opens are handed to worker 0 on start.
+"""
+
+import asyncio
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from rtc.results import adopt_spools
+from rtc.threads import worker_env
+from rtc.workers import Router, SessionRegistry, session_shares, spawn_workers
+
+
+class Command(BaseCommand):
+    help = "Run N Daphne workers on this node behind a session-pinning front router"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--bind', default='0.0.0.0')
+        parser.add_argument('--port', type=int, default=8000)
+        parser.add_argument('--base-port', type=int, default=8100, help='Workers listen on base-port + i')
+        parser.add_argument('--preload', action='store_true',
+                            help='Import the media stack and warm detectors once each worker listens')
+        parser.add_argument('--threads', type=int, default=settings.RTC_THREADS_PER_WORKER,
+                            help='CPU threads per worker for OpenCV/BLAS/TensorFlow, 0 = cores / workers')
+        parser.add_argument('--pin', action='store_true', default=settings.RTC_PIN_WORKERS,
+                            help='Pin each worker to its own cores')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        base_port = options['base_port']
+        if workers > 1 and settings.CHANNEL_LAYERS['default']['BACKEND'].endswith('InMemoryChannelLayer'):
+            self.stderr.write("InMemoryChannelLayer: admin messages only reach the worker they are sent from")
+
+        registry = SessionRegistry(settings.RTC_SESSION_REGISTRY)
+        for worker in range(workers):
+            registry.clear_worker(str(worker))
+        adopted = adopt_spools(settings.RTC_RESULT_SPOOL, workers)
+        if adopted:
+            self.stdout.write(f"Handed {adopted} result spool(s) without a worker to worker 0")
+
+        plans = worker_env(workers, options['threads'], options['pin'])
+        for plan, sessions in zip(plans, session_shares(settings.RTC_MAX_SESSIONS, workers)):
+            plan['RTC_WORKER_SESSIONS'] = str(sessions)
+        processes = spawn_workers(workers, base_port,
+                                  extra_env={'RTC_PRELOAD': '1'} if options['preload'] else None,
+                                  worker_envs=plans)
+        router = Router([('127.0.0.1', base_port + i) for i in range(workers)])
+        self.stdout.write(f"Routing {options['bind']}:{options['port']} to {workers} workers "
+                          f"on ports {base_port}-{base_port + workers - 1}, "
+                          f"{plans[0]['RTC_WORKER_THREADS']} threads and "
+                          f"{plans[0]['RTC_WORKER_SESSIONS']} sessions each"
+                          + (", pinned" if options['pin'] else ""))
+
+        async def serve():
+            server = await router.start(options['bind'], options['port'])
+            async with server:
+                await server.serve_forever()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait()
@@ -0,0 +1,73 @@
+"""
+Replay landmark traces through the quiz state machine, for threshold tuning.
+
+    python manage.py simulatequiz [traces/*.jsonl] [--synthetic 500] [--hold 0.8 1.0 1.2] [--cooldown 1.0]
+
+Recorded traces come from sessions run with RTC_LANDMARK_TRACE_DIR set;
+synthetic ones (see rtc/simulator.py) also know the answers that were meant,
+so they report accuracy and the unseen-hands error too. Every combination
+of the given thresholds is replayed over the whole corpus.
+"""
+
+import itertools
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from rtc.quiz import load_questions
+from rtc.simulator import load_trace, replay, synthetic_trace
+
+
+class Command(BaseCommand):
+    help = "Replay recorded or synthetic landmark traces through the quiz logic with several thresholds"
+
+    def add_arguments(self, parser):
+        parser.add_argument('traces', nargs='*', help='Recorded landmark traces (.jsonl)')
+        parser.add_argument('--synthetic', type=int, default=0, help='Also replay N synthetic sessions')
+        parser.add_argument('--exam', default='Electrical.csv', help='Questions, from quiz/')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--fps', type=float, default=10, help='Processed frames per second of synthetic traces')
+        parser.add_argument('--noise', type=float, default=1.5, help='Landmark noise of synthetic traces, pixels')
+        parser.add_argument('--hold', type=float, nargs='+', default=[settings.RTC_GESTURE_HOLD])
+        parser.add_argument('--cooldown', type=float, nargs='+', default=[settings.RTC_GESTURE_COOLDOWN])
+        parser.add_argument('--debounce', type=float, nargs='+', default=[settings.RTC_HAND_DEBOUNCE])
+
+    def handle(self, *args, **options):
+        questions = load_questions(options['exam'])
+        corpus = [(load_trace(path), None) for path in options['traces']]
+        rng = random.Random(options['seed'])
+        for seed in range(options['synthetic']):
+            intended = [rng.randint(1, 4) for _ in questions]
+            corpus.append(synthetic_trace(intended, fps=options['fps'], noise=options['noise'],
+                                          seed=options['seed'] * 100003 + seed))
+        if not corpus:
+            self.stderr.write("No traces: give trace files and/or --synthetic N")
+            return
+        frames = sum(len(trace) for trace, _ in corpus)
+        seconds = sum(trace[-1][0] - trace[0][0] for trace, _ in corpus if trace)
+        known = sum(truth is not None for _, truth in corpus)
+        self.stdout.write(f"{len(corpus)} sessions ({known} synthetic), {frames} frames, "
+                          f"{seconds / 3600:.1f} h of exams, {len(questions)} questions each")
+        self.stdout.write(f"{'hold':>5s} {'cool':>5s} {'debnc':>5s} {'finished':>9s} {'accuracy':>9s} "
+                          f"{'gestures/q':>10s} {'duration s':>10s} {'unseen err s':>12s} {'speedup':>9s}")
+
+        for hold, cooldown, debounce in itertools.product(options['hold'], options['cooldown'], options['debounce']):
+            start = time.perf_counter()
+            results = [(replay(trace, questions, hold=hold, cooldown=cooldown, debounce=debounce), truth)
+                       for trace, truth in corpus]
+            elapsed = time.perf_counter() - start
+
+            finished = sum(result["finished"] for result, _ in results) / len(results)
+            gestures = sum(result["gestures"] for result, _ in results) / (len(results) * len(questions))
+            duration = sum(result["duration"] for result, _ in results) / len(results)
+            checked = [(result, truth) for result, truth in results if truth is not None]
+            if checked:
+                correct = sum(a == b for result, truth in checked for a, b in zip(result["answers"], truth["answers"]))
+                accuracy = f"{correct / (len(checked) * len(questions)):9.1%}"
+                unseen = f"{sum(abs(result['hands_unseen'] - truth['unseen']) for result, truth in checked) / len(checked):12.2f}"
+            else:
+                accuracy, unseen = f"{'-':>9s}", f"{'-':>12s}"
+            self.stdout.write(f"{hold:5.2f} {cooldown:5.2f} {debounce:5.2f} {finished:9.1%} {accuracy} "
+                              f"{gestures:10.2f} {duration:10.1f} {unseen} {seconds / elapsed:8.0f}x")
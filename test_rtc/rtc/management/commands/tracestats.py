@@ -0,0 +1,46 @@
+"""
+Per-phase percentiles of the exported connection-setup timelines.
+
+    python manage.py tracestats [--file traces.jsonl] [--last 500]
+"""
+
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from rtc.tracing import MILESTONES, percentile
+
+
+class Command(BaseCommand):
+    help = "Show p50/p90/p99 of every connection-setup phase from the trace file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=str(settings.RTC_TRACE_FILE))
+        parser.add_argument('--last', type=int, default=None, help='Only the last N sessions')
+
+    def handle(self, *args, **options):
+        with open(options['file'], encoding='utf-8') as file:
+            records = [json.loads(line) for line in file if line.strip()]
+        if options['last']:
+            records = records[-options['last']:]
+
+        samples = {}
+        for record in records:
+            for kind in ('marks', 'spans'):
+                for name, value in record[kind].items():
+                    samples.setdefault((kind, name), []).append(value)
+
+        # Milestones in timeline order, then the setup steps
+        order = [('marks', name) for name in MILESTONES]
+        order += sorted(key for key in samples if key not in order)
+
+        self.stdout.write(f"{len(records)} sessions (seconds; marks are offsets from ws_connect)")
+        self.stdout.write(f"{'phase':28s} {'n':>6s} {'p50':>8s} {'p90':>8s} {'p99':>8s}")
+        for kind, name in order:
+            values = samples.get((kind, name))
+            if not values:
+                continue
+            label = name if kind == 'marks' else f"{name} (span)"
+            self.stdout.write(f"{label:28s} {len(values):6d} "
+                              + " ".join(f"{percentile(values, q):8.3f}" for q in (50, 90, 99)))
@@ -0,0 +1,600 @@
+"""
+media.py
+Per-session media pipeline of the quiz server.
+
+- VideoTransformTrack runs hand detection on the student's video and drives
+  quiz progression over the data channel.
+- Holds the heavy CV/ML imports (OpenCV, MediaPipe through the detector pool),
+  consumers.py imports this module only once a session is admitted.
+"""
+
+import json
+import logging
+import os
+import time
+import cv2
+import base64
+import uuid
+import asyncio
+
+import aiortc
+from aiortc import MediaStreamTrack
+from aiortc.contrib.media import MediaRelay
+from aiortc.mediastreams import MediaStreamError
+from av import VideoFrame
+from .results import result_writer
+from .quiz import QuizMachine, load_questions
+from . import eventlog
+from .evidence import EvidenceRecorder
+from .tracing import SessionTrace
+from .detector_pool import detector_pool
+from .capture import CaptureMeter
+from . import landmarks
+from .spotcheck import LandmarkAudit, spot_checker
+from .threads import thread_budget
+from .gestures import GestureCascade, gesture_classifier
+from .motion import MotionGate
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+relay = MediaRelay()
+thread_budget.configure_opencv()
+gesture_classifier()    # Loads the gesture model, if configured, with the rest of the media stack
+
+
+# ----------------------------
+# CPU time of the encoder of the returned video
+# ----------------------------
+class EncodeMeter():
+    """
+    Thread CPU time spent encoding the frames of one RTCRtpSender.
+    aiortc creates the sender's encoder when it sends the first frame and keeps
+    it private, so attach() wraps it once it exists. Without that private
+    attribute (another aiortc) the encoder is left alone and not measured.
+    """
+    unavailable_logged = False          # The missing encoder is logged once per process
+
+    def __init__(self, sender):
+        self.sender = sender
+        self.cpu_time = 0.0             # Encoder CPU seconds, on the encoder threads
+        self.frames = 0
+        self.attached = False
+        self.unavailable = False        # aiortc does not expose the encoder, nothing is measured
+
+    def attach(self):
+        if self.attached or self.unavailable:
+            return
+        if not hasattr(self.sender, '_RTCRtpSender__encoder'):
+            self.give_up(f"{type(self.sender).__name__} has no private encoder")
+            return
+        encoder = self.sender._RTCRtpSender__encoder
+        if encoder is None:
+            return                      # Created with the first frame sent
+        if not callable(getattr(encoder, 'encode', None)):
+            self.give_up(f"{type(encoder).__name__} has no encode()")
+            return
+        encode = encoder.encode
+
+        def metered(frame, force_keyframe=False):
+            start = time.thread_time()
+            try:
+                return encode(frame, force_keyframe)
+            finally:
+                self.cpu_time += time.thread_time() - start
+                self.frames += 1
+
+        encoder.encode = metered
+        self.attached = True
+
+    def give_up(self, reason):
+        self.unavailable = True
+        if not EncodeMeter.unavailable_logged:
+            EncodeMeter.unavailable_logged = True
+            logger.warning(f"Encoder CPU is not measured: {reason} in aiortc {aiortc.__version__}")
+
+    @property
+    def measured(self):
+        """Encoder CPU seconds, None when the encoder could not be wrapped."""
+        return None if self.unavailable else self.cpu_time
+
+
+# ----------------------------
+# Media track to process incoming video frames and detect gestures
+# ----------------------------
+class VideoTransformTrack(MediaStreamTrack):
+    """
+    A custom MediaStreamTrack from client,
+    processing the frames and drives quiz progression.
+    """
+    kind = "video"
+
+    def __init__(self, track, channel, exam_file, session_id=None, username=None, exam_id=None, trace=None,
+                 preview=(320, 10), landmark_rate=0, detect_every=None):
+        super().__init__()
+        # Warm CVZone hand detection utility from the node pool, none when the client tracks its hands
+        self.detector = None            # Set by recv once detector_checkout is done
+        self.detector_checkout = None if landmark_rate else asyncio.ensure_future(detector_pool.checkout())
+        self.track = track          # Original incoming webrtc track
+        self.channel = channel      # Data channel for sending exam events and data to client
+        self.frames = 0             # Frame counter
+        self.detect_every = detect_every or getattr(settings, 'RTC_DETECT_EVERY', 3)  # Frames per detection
+        self.hand_filter = landmarks.HandFilter()  # Smoothed and extrapolated hands for overlay and gestures
+        self.motion = MotionGate(max_skip=getattr(settings, 'RTC_MOTION_MAX_SKIP', 1.0)) \
+            if getattr(settings, 'RTC_MOTION_GATE', True) else None  # Skips detection on unchanged frames
+        self.detected_hands = []        # Raw hands of the last real detection, reused while nothing moves
+        self.session_id = session_id or uuid.uuid4().hex  # Key of the persisted result
+        self.username = username
+        self.exam_id = exam_id
+        self.trace = trace or SessionTrace(self.session_id)  # Connection-setup timeline
+        self.event_log = None           # Append-only proctoring event log, opened on quiz start
+        self.evidence = EvidenceRecorder()  # Recent frames kept for violation evidence
+        self.only_show = True           # True = show video only (to client), no exam processing
+
+        # Lobby profile until quiz_start: a smaller self-view, hands detected a few times a second
+        self.lobby_rate = getattr(settings, 'RTC_LOBBY_DETECT_RATE', 2)  # Detections per second, 0 = no overlay
+        self.lobby_width = getattr(settings, 'RTC_LOBBY_WIDTH', 320)     # Width frames are converted at, 0 = as received
+        self.last_lobby_detection = None
+        self.lobby_detections = 0
+        self.lobby_cpu = 0.0            # Process CPU seconds of lobby frames (MediaPipe runs on its own threads)
+        self.lobby_time = 0.0           # Source seconds spent in the lobby
+        self.last_lobby_frame = None
+        self.lobby_encode_cpu = None    # Encoder CPU seconds when the quiz started
+
+        # Self-view sent back to the client, scaled down and frame-rate capped
+        self.preview_width, self.preview_fps = preview  # 0 = as received / uncapped
+        self.last_preview = None        # Source time of the last frame sent back
+        self.preview_sent = 0
+        self.preview_dropped = 0        # Frames not sent back, never encoded
+        self.preview_time = 0.0         # Source seconds covered by the frames sent back
+        self.encode_meter = None        # EncodeMeter of the sender of this track
+        self.capture = CaptureMeter()   # Resolution and frame rate the client actually sends
+
+        # Drain-to-latest consumption of the relay
+        self.reader = None              # Task keeping only the newest incoming frame
+        self.latest = None              # Newest frame not processed yet
+        self.new_frame = asyncio.Event()
+        self.source_ended = False
+        self.frames_dropped = 0         # Frames replaced by a newer one before recv got to them
+        self.clock_offset = None        # Epoch seconds minus frame time, see media_time
+        self.media_now = None           # Media time of the newest frame, see session_time
+
+        # Landmark-ingest mode: the client streams its hand landmarks, video is only spot-checked
+        self.landmark_rate = landmark_rate  # Landmark messages per second the client was asked for, 0 = off
+        self.client_hands = []          # Latest landmarks from the client, in HandDetector format
+        self.client_hands_time = None   # When they arrived
+        self.landmark_timeout = 3 / landmark_rate if landmark_rate else None  # Older landmarks = no hands
+        self.landmarks_stale = 0        # Exam frames processed without hands, the client had stopped sending
+        self.landmarks_received = 0
+        self.landmarks_dropped = 0      # Over the rate, or malformed
+        self.audit = LandmarkAudit(getattr(settings, 'RTC_SPOT_CHECK_RATE', 0.03)) if landmark_rate else None
+
+        # Hands of every processed frame, written out at the end when RTC_LANDMARK_TRACE_DIR is set
+        self.landmark_trace = [] if getattr(settings, 'RTC_LANDMARK_TRACE_DIR', None) else None
+
+        # Rules first, the gesture classifier on ambiguity, when a model is configured
+        classifier = gesture_classifier()
+        self.gestures = GestureCascade(classifier, getattr(settings, 'RTC_GESTURE_MARGIN', 0.05)) \
+            if classifier else None
+
+        # Load quiz data from CSV file; gesture, scoring and proctoring state lives in the quiz machine
+        self.data = load_questions(exam_file)
+        self.quiz = QuizMachine(self.data, time.time(),
+                                hold=getattr(settings, 'RTC_GESTURE_HOLD', 1.0),
+                                cooldown=getattr(settings, 'RTC_GESTURE_COOLDOWN', 1.0),
+                                debounce=getattr(settings, 'RTC_HAND_DEBOUNCE', 0.2),
+                                recognize=self.recognize_gesture if self.gestures else None)
+
+    async def recv(self):
+        """
+        Called by the sender whenever it can encode the next frame.
+        Runs gesture detection on every detect_every-th incoming frame and
+        returns the next frame due for the self-view; frames over its
+        frame-rate cap are consumed here and never reach the encoder.
+        Hands are smoothed on detection frames and extrapolated in between,
+        the overlay and finger states both use the filtered hands.
+        Only the newest frame is ever processed (see next_frame), and all
+        timing comes from its capture time (see media_time).
+        Before quiz_start, frames take the cheaper lobby profile (see lobby_frame).
+        """
+        while True:
+            if self.readyState != "live":
+                raise MediaStreamError
+            frame = await self.next_frame()
+            if self.detector is None and self.detector_checkout and (
+                    self.detector_checkout.done() or not self.only_show):
+                # The lobby shows the video while a cold detector is built, the exam waits for it
+                self.detector = await self.detector_checkout
+            if self.only_show:
+                new_frame = self.lobby_frame(frame)
+                if new_frame is not None:
+                    return new_frame
+                continue
+
+            # Process every detect_every-th frame for efficiency
+            detect = self.frames % self.detect_every == 0
+            self.frames = 1 if detect else self.frames + 1
+            send = self.preview_due(frame)
+            if not send:
+                self.preview_dropped += 1
+                if not detect:
+                    continue
+
+            img = frame.to_ndarray(format="bgr24")
+            # Mirror effect for user convenience
+            img = cv2.flip(img, 1)
+
+            # Filter clock: capture time for our detections, arrival time for the client's
+            now = self.media_time(frame)
+            frame_time = time.time() if self.landmark_rate else now
+            hands = None
+            if detect:
+                self.evidence.add(img, now)
+                if self.landmark_rate:
+                    # Hands come over the data channel (ingest_landmarks), video is only sampled
+                    if self.audit.due():
+                        asyncio.ensure_future(self.spot_check(img.copy()))
+                    if self.client_hands_time is None or frame_time - self.client_hands_time > self.landmark_timeout:
+                        # A client that stopped sending shows no hands, the quiz counts them as unseen
+                        self.landmarks_stale += 1
+                        hands = self.hand_filter.update([], frame_time)
+                        await self.processing(hands, None, now)
+                else:
+                    if self.motion is None or self.motion.needs_detection(
+                            img, [hand["bbox"] for hand in self.detected_hands], now):
+                        self.detected_hands, _ = self.detector.findHands(img, draw=False)
+                    # Reused hands are fed again at the new time, so the filter holds them still
+                    hands = self.hand_filter.update(self.detected_hands, frame_time)
+                    self.trace.mark('first_inference')
+                    await self.processing(hands, img, now)
+            if send:
+                landmarks.draw_hands(img, hands if hands is not None else self.hand_filter.predict(frame_time))
+                return self.preview_frame(img, frame)
+
+    def lobby_frame(self, frame):
+        """
+        Self-view before quiz_start, when nothing is at stake: the frame is
+        converted straight to lobby_width, hands are detected lobby_rate times
+        a second and drawn as last detected, without filtering.
+        Returns the outgoing frame, or None when the frame is not due.
+        """
+        start = time.process_time()
+        try:
+            now = self.media_time(frame)
+            if self.last_lobby_frame is not None:
+                self.lobby_time += max(now - self.last_lobby_frame, 0.0)
+            self.last_lobby_frame = now
+            # Due on the media clock, or when it jumped back (re-anchored, see media_time)
+            detect = bool(self.detector and self.lobby_rate) and (
+                self.last_lobby_detection is None or not 0 <= now - self.last_lobby_detection < 0.95 / self.lobby_rate)
+            send = self.preview_due(frame)
+            if not send:
+                self.preview_dropped += 1
+                if not detect:
+                    return None
+
+            if self.lobby_width and self.lobby_width < frame.width:
+                # Scaled during the YUV conversion, never converted at full size
+                img = frame.to_ndarray(format="bgr24", width=self.lobby_width & ~1,
+                                       height=int(frame.height * self.lobby_width / frame.width) & ~1)
+            else:
+                img = frame.to_ndarray(format="bgr24")
+            img = cv2.flip(img, 1)
+            if detect:
+                self.detected_hands, _ = self.detector.findHands(img, draw=False)
+                self.last_lobby_detection = now
+                self.lobby_detections += 1
+                self.trace.mark('first_inference')
+            if send:
+                if self.lobby_rate:
+                    landmarks.draw_hands(img, self.detected_hands)
+                return self.preview_frame(img, frame)
+            return None
+        finally:
+            self.lobby_cpu += time.process_time() - start
+
+    def lobby_stats(self):
+        return {"lobby_seconds": round(self.lobby_time, 1),
+                "lobby_detections": self.lobby_detections,
+                "lobby_cpu_seconds": round(self.lobby_cpu, 3),
+                "lobby_cpu_per_second": round(self.lobby_cpu / self.lobby_time, 4) if self.lobby_time else None,
+                "lobby_encode_cpu_seconds": round(self.lobby_encode_cpu, 3)
+                                            if self.lobby_encode_cpu is not None else None}
+
+    async def _read(self):
+        """
+        Reader task: drain the relay as fast as frames arrive and keep only
+        the newest one, so a slow recv never builds a backlog.
+        """
+        try:
+            while True:
+                frame = await self.track.recv()
+                self.trace.mark('first_frame')
+                self.capture.update(frame)
+                if self.latest is not None:
+                    self.frames_dropped += 1
+                self.latest = frame
+                self.new_frame.set()
+        except MediaStreamError:
+            pass
+        finally:
+            self.source_ended = True
+            self.new_frame.set()
+
+    async def next_frame(self):
+        """The newest frame not processed yet, waiting for one if needed."""
+        if self.reader is None:
+            self.reader = asyncio.ensure_future(self._read())
+        while self.latest is None:
+            if self.source_ended:
+                raise MediaStreamError
+            self.new_frame.clear()
+            await self.new_frame.wait()
+        frame, self.latest = self.latest, None
+        return frame
+
+    def media_time(self, frame):
+        """
+        Capture time of frame, in epoch seconds: its pts on the sender's clock,
+        anchored to our clock on the first frame. Durations measured with it
+        stay right however late the frame is processed.
+        """
+        now = time.time()
+        if frame.pts is None or frame.time_base is None:
+            self.media_now = now
+            return now
+        frame_time = float(frame.pts * frame.time_base)
+        # Re-anchor on the first frame, and if the sender's clock jumps (e.g. a track restart)
+        if self.clock_offset is None or abs(self.clock_offset + frame_time - now) > 10:
+            self.clock_offset = now - frame_time
+        self.media_now = self.clock_offset + frame_time
+        return self.media_now
+
+    def session_time(self):
+        """
+        The clock of the quiz and the event log between frames (data channel
+        messages, spot checks, teardown): the media time of the newest frame,
+        so these records fall in order with the ones of processed frames.
+        """
+        return self.media_now if self.media_now is not None else time.time()
+
+    def preview_due(self, frame):
+        """Whether frame is due for the self-view, on the source clock."""
+        if not self.preview_fps or frame.pts is None or frame.time_base is None:
+            return True
+        frame_time = float(frame.pts * frame.time_base)
+        if self.last_preview is not None:
+            # 5% slack, so 30 fps input halves to 15 fps rather than a third
+            if frame_time - self.last_preview < 0.95 / self.preview_fps:
+                return False
+            self.preview_time += frame_time - self.last_preview
+        self.last_preview = frame_time
+        return True
+
+    def preview_frame(self, img, frame):
+        """The annotated image as the outgoing frame, scaled once, here."""
+        height, width = img.shape[:2]
+        if self.preview_width and self.preview_width < width:
+            # Even dimensions for the encoder's 4:2:0 subsampling
+            size = (self.preview_width & ~1, int(height * self.preview_width / width) & ~1)
+            img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+        new_frame = VideoFrame.from_ndarray(img, format="bgr24")
+        new_frame.pts = frame.pts
+        new_frame.time_base = frame.time_base
+        self.preview_sent += 1
+        if self.encode_meter:
+            self.encode_meter.attach()
+        return new_frame
+
+    def preview_stats(self):
+        encode_cpu = self.encode_meter.measured if self.encode_meter else None
+        return {"sent": self.preview_sent,
+                "dropped": self.preview_dropped,
+                "width": self.preview_width,
+                "max_fps": self.preview_fps,
+                "encode_cpu_seconds": round(encode_cpu, 3) if encode_cpu is not None else None,
+                "encode_cpu_per_second": round(encode_cpu / self.preview_time, 4)
+                                         if encode_cpu is not None and self.preview_time else None}
+    
+    def stop(self):
+        """
+        End the track: close the event log, unsubscribe from the relay
+        and return the detector to the pool.
+        """
+        if self.readyState == "ended":
+            return
+        super().stop()
+        self.end_session()
+        if self.reader:
+            self.reader.cancel()
+        self.track.stop()
+        if self.detector_checkout:
+            detector_pool.release(self.detector_checkout)
+        logger.info(f"Self-view of session {self.session_id}: {self.preview_stats()}, "
+                    f"capture received: {self.capture.stats()}, frames dropped: {self.frames_dropped}")
+        if self.gestures:
+            logger.info(f"Gestures of session {self.session_id}: {self.gestures.stats()}")
+        if self.motion:
+            logger.info(f"Motion gate of session {self.session_id}: {self.motion.stats()}")
+        logger.info(f"Lobby of session {self.session_id}: {self.lobby_stats()}")
+
+    def recognize_gesture(self, hand):
+        """Answer of hand by the gesture cascade, on the frame size the client sends."""
+        return self.gestures.classify(hand, self.capture.width or 640, self.capture.height or 480)
+
+    async def ingest_landmarks(self, message):
+        """
+        Hand landmarks from the client, fed to the quiz and proctoring logic
+        in place of the server's own detection.
+        """
+        now = time.time()
+        if self.capture.width is None or (self.client_hands_time is not None
+                                          and now - self.client_hands_time < 0.5 / self.landmark_rate):
+            self.landmarks_dropped += 1
+            return
+        try:
+            hands = landmarks.hands_from_client(message["hands"], self.capture.width, self.capture.height)
+        except (KeyError, TypeError, ValueError, OverflowError):
+            self.landmarks_dropped += 1
+            return
+        self.client_hands, self.client_hands_time = hands, now
+        self.landmarks_received += 1
+        self.trace.mark('first_inference')
+        hands = self.hand_filter.update(hands, now)
+        if not self.only_show:
+            # Arrival time for the filter, the quiz runs on the media clock
+            await self.processing(hands, None, self.session_time())
+
+    async def spot_check(self, img):
+        """
+        Detect hands on one video frame and compare with what the client reports.
+        Landmarks older than a second count as no hands reported.
+        """
+        now = time.time()
+        fresh = self.client_hands_time is not None and now - self.client_hands_time < 1
+        reported = self.client_hands if fresh else []
+        detected = await spot_checker.detect(img)
+        if detected is None or self.readyState != "live":
+            return
+        flagged = self.audit.flagged
+        reason = self.audit.record(reported, detected)
+        if reason:
+            logger.info(f"Spot check of session {self.session_id}: {reason} "
+                        f"({len(reported)} reported, {len(detected)} detected)")
+            if self.event_log is not None and not self.event_log.closed:
+                self.event_log.append(self.session_time(), eventlog.LANDMARK_MISMATCH, len(detected), len(reported))
+        if self.audit.flagged and not flagged:
+            logger.warning(f"Landmark stream of session {self.session_id} flagged: {self.audit.summary()}")
+
+    async def quiz_start(self):
+        """
+        Start the quiz: toggle processing and show the first and question page to client.
+        """
+        self.only_show = not self.only_show
+        if not self.only_show:
+            # Exam profile from the very next frame: detect on it, hands of the lobby's small frames dropped
+            self.frames = 0
+            self.detected_hands = []
+            self.hand_filter = landmarks.HandFilter()
+            self.last_lobby_frame = None
+            if self.motion:
+                self.motion.reset()
+            if self.encode_meter and self.lobby_encode_cpu is None:
+                self.lobby_encode_cpu = self.encode_meter.measured
+        if self.event_log is None:
+            self.event_log = eventlog.event_store.open(self.exam_id or 'unassigned',
+                                                       self.session_id, self.username)
+            self.event_log.append(self.session_time(), eventlog.QUIZ_START)
+        await self.show_question(self.quiz.qNo)
+
+    def end_session(self, now=None):
+        """
+        Close the proctoring event log, with its summary, if it is still open.
+        """
+        if self.event_log is None or self.event_log.closed:
+            return
+        now = now or self.session_time()
+        self.evidence.flush()
+        self.event_log.append(now, eventlog.QUIZ_END)
+        summary = self.quiz.proctoring.snapshot(now)
+        summary["score"] = self.quiz.score if self.quiz.finished else None
+        summary["evidence"] = self.evidence.captures
+        if self.audit:
+            summary.update(self.audit.summary())
+            summary["landmark_frames_stale"] = self.landmarks_stale
+        if self.motion:
+            summary.update(self.motion.stats())
+        summary.update(self.lobby_stats())
+        self.event_log.close(summary)
+        if self.landmark_trace:
+            self.save_landmark_trace()
+
+    def save_landmark_trace(self):
+        """
+        Write the hands of every processed frame as a JSON-lines trace, one
+        {"t", "hands"} record per frame, for the quiz simulator.
+        """
+        directory = settings.RTC_LANDMARK_TRACE_DIR
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'{self.session_id}.jsonl'), 'w', encoding='utf-8') as file:
+            for t, hands in self.landmark_trace:
+                file.write(json.dumps({"t": t, "hands": hands}) + '\n')
+        self.landmark_trace = None
+        
+    async def show_question(self, qNo):
+        """
+        Send the current question (text + image) to the client over the webrtc data channel.
+        """
+        question = self.data[qNo]
+        if question.question_image:
+            image = cv2.imread(question.question_image)
+            _, buffer = cv2.imencode('.png', image)
+            b64_str = base64.b64encode(buffer).decode('utf-8')
+        else:
+            b64_str = None
+        
+        self.trace.mark('first_question')
+        self.channel.send(json.dumps({"message": 'new_question',
+                                     "qNo": f'Question {qNo + 1}',
+                                     "question": question.question_text,
+                                     "image": b64_str,
+                                     "choice1": question.choice1,
+                                     "choice2": question.choice2,
+                                     "choice3": question.choice3,
+                                     "choice4": question.choice4}))
+    
+    def save_result(self, finished_at):
+        """
+        Hand the finished session to the write-behind result writer.
+        Never touches the database itself, so it is safe on the frame path.
+        """
+        result_writer.submit({
+            "session": self.session_id,
+            "username": self.username,
+            "exam_id": self.exam_id,
+            "score": self.quiz.score,
+            "hands_unseen": self.quiz.hands_unseen,
+            "finished_at": finished_at,
+            "answers": self.quiz.answers()})
+
+    async def processing(self, hands, img, now=None):
+        """
+        Main quiz logic, run by the quiz machine; this turns its events into I/O:
+        - Logs validated gestures and hand visibility changes.
+        - Shows the next question, or sends the score and saves the result.
+        - Captures evidence and warns the student when hands go unseen.
+        :param now: When the hands were seen (capture time of the frame), defaults to session_time()
+        """
+        current_time = now or self.session_time()
+        if self.landmark_trace is not None:
+            self.landmark_trace.append((current_time, [{"type": hand["type"], "lmList": hand["lmList"]}
+                                                       for hand in hands]))
+
+        for event in self.quiz.step(current_time, hands):
+            name = event["event"]
+            if name == 'gesture':
+                self.event_log.append(current_time, eventlog.GESTURE, event["hands"], event["answer"])
+            elif name == 'question':
+                # Show next question
+                await self.show_question(event["qNo"])
+            elif name == 'finished':
+                # Signal client of completion
+                self.channel.send(json.dumps({
+                    "message": 'quiz_finished',
+                    "score": event["score"],
+                    "hands_unseen": event["hands_unseen"]}))
+                self.save_result(current_time)
+                self.end_session(current_time)
+            elif name == 'hand_unseen':
+                # Number of hands (2) not valid (possible cheating)
+                self.event_log.append(current_time, eventlog.HAND_UNSEEN, event["hands"])
+                self.evidence.trigger(current_time, self.event_log.evidence_dir())
+                self.channel.send(json.dumps({
+                                "message": 'hand_unseen',
+                                "text": 'Show both hands!',
+                                "color": 'yellow'}))
+            elif name == 'hand_seen':
+                self.event_log.append(current_time, eventlog.HAND_SEEN, event["hands"])
+                self.channel.send(json.dumps({
+                                "message": 'hand_seen',
+                                "text": 'Hands detected',
+                                "color": '#49ff34'}))
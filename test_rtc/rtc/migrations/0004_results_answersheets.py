@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rtc', '0003_exams_examfile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Results',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('SessionId', models.CharField(max_length=32, unique=True)),
+                ('Username', models.CharField(max_length=20)),
+                ('ResultExamId', models.CharField(max_length=6)),
+                ('Score', models.FloatField()),
+                ('HandsUnseen', models.FloatField()),
+                ('FinishedAt', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnswerSheets',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('SessionId', models.CharField(max_length=32)),
+                ('QuestionNo', models.IntegerField()),
+                ('ChosenAnswer', models.IntegerField(null=True)),
+                ('Correct', models.BooleanField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('SessionId', 'QuestionNo'), name='unique_answer_per_question')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rtc', '0004_results_answersheets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exams',
+            name='RecordSessions',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rtc', '0005_exams_recordsessions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='users',
+            name='Username',
+            field=models.CharField(db_index=True, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='exams',
+            name='ExamId',
+            field=models.CharField(db_index=True, max_length=6),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rtc', '0006_login_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exams',
+            name='PreviewMaxFps',
+            field=models.PositiveIntegerField(default=10),
+        ),
+        migrations.AddField(
+            model_name='exams',
+            name='PreviewWidth',
+            field=models.PositiveIntegerField(default=320),
+        ),
+    ]
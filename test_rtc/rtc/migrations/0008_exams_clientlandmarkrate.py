@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rtc', '0007_exams_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exams',
+            name='ClientLandmarkRate',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
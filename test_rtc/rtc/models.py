@@ -3,10 +3,35 @@ from django.db import models
 # Create your models here.
 
 class Users(models.Model):
-    Username = models.CharField(max_length=20)
+    Username = models.CharField(max_length=20, db_index=True)
     Password = models.CharField(max_length=30)
     UserExamId = models.CharField(max_length=6)
     
 class Exams(models.Model):
-    ExamId = models.CharField(max_length=6)
-    ExamFile = models.CharField(max_length=100)
\ No newline at end of file
+    ExamId = models.CharField(max_length=6, db_index=True)
+    ExamFile = models.CharField(max_length=100)
+    RecordSessions = models.BooleanField(default=False)  # Keep student video for disputes
+    PreviewWidth = models.PositiveIntegerField(default=320)  # Width of the self-view sent back, 0 = as received
+    PreviewMaxFps = models.PositiveIntegerField(default=10)  # Frame-rate cap of the self-view, 0 = uncapped
+    ClientLandmarkRate = models.PositiveIntegerField(default=0)  # Landmarks/s tracked by the client, 0 = server detection
+
+class Results(models.Model):
+    # One row per finished exam session, SessionId makes spool replays idempotent
+    SessionId = models.CharField(max_length=32, unique=True)
+    Username = models.CharField(max_length=20)
+    ResultExamId = models.CharField(max_length=6)
+    Score = models.FloatField()
+    HandsUnseen = models.FloatField()
+    FinishedAt = models.DateTimeField()
+
+class AnswerSheets(models.Model):
+    # One row per question of a finished exam session
+    SessionId = models.CharField(max_length=32)
+    QuestionNo = models.IntegerField()
+    ChosenAnswer = models.IntegerField(null=True)
+    Correct = models.BooleanField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['SessionId', 'QuestionNo'], name='unique_answer_per_question'),
+        ]
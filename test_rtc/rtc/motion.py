@@ -0,0 +1,91 @@
+"""
+motion.py
+Motion gate in front of hand detection.
+
+- Students sit still for long stretches while they read. Before each
+  detection, the frame is shrunk to a tiny grayscale image and compared
+  with the one of the last real detection, in and around the last hand
+  boxes and over the whole picture (hands coming into view).
+- Nothing changed: the previous hands are reused and findHands is skipped.
+- A detection is forced every max_skip seconds whatever the gate says, so
+  proctoring never runs on hands older than that.
+"""
+
+from collections import Counter
+
+# Node-wide totals of all gates, for the metrics
+totals = Counter()
+
+
+class MotionGate():
+    """
+    Change detector of one session's detection frames.
+    """
+
+    def __init__(self, size=(64, 48), pixel_threshold=12, changed_fraction=0.02, box_margin=0.5, max_skip=1.0):
+        self.size = size                        # Width, height of the compared images
+        self.pixel_threshold = pixel_threshold  # Gray level difference that counts a pixel as changed
+        self.changed_fraction = changed_fraction  # Share of changed pixels in a region that means motion
+        self.box_margin = box_margin            # Hand boxes grow by this fraction of their size on each side
+        self.max_skip = max_skip                # Seconds between forced detections
+        self.reference = None                   # Small image of the last real detection
+        self.reference_time = None
+        self.checks = 0
+        self.skipped = 0
+
+    def _small(self, img):
+        import cv2                              # Loaded by the media stack, kept off the metrics view
+        return cv2.cvtColor(cv2.resize(img, self.size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+
+    def _regions(self, boxes, scale_x, scale_y):
+        width, height = self.size
+        for x, y, w, h in boxes:
+            dx, dy = w * self.box_margin, h * self.box_margin
+            left, top = max(int((x - dx) * scale_x), 0), max(int((y - dy) * scale_y), 0)
+            right, bottom = min(int((x + w + dx) * scale_x) + 1, width), min(int((y + h + dy) * scale_y) + 1, height)
+            if right > left and bottom > top:
+                yield slice(top, bottom), slice(left, right)
+
+    def needs_detection(self, img, boxes, t):
+        """
+        Whether img (BGR, as given to findHands) must go through detection.
+        :param boxes: Boxes (x, y, w, h) of the hands of the last detection, on img
+        :param t: Capture time of img
+        """
+        self.checks += 1
+        totals["checks"] += 1
+        small = self._small(img)
+        # Forced after max_skip, and when the clock jumped back
+        if self.reference is None or not 0 <= t - self.reference_time < self.max_skip:
+            return self._detect(small, t)
+        import cv2
+        changed = cv2.absdiff(small, self.reference) > self.pixel_threshold
+        if changed.mean() >= self.changed_fraction:
+            return self._detect(small, t)
+        scale_x, scale_y = self.size[0] / img.shape[1], self.size[1] / img.shape[0]
+        for region in self._regions(boxes, scale_x, scale_y):
+            if changed[region].mean() >= self.changed_fraction:
+                return self._detect(small, t)
+        self.skipped += 1
+        totals["skipped"] += 1
+        return False
+
+    def reset(self):
+        """Forget the reference, so the next frame is detected (e.g. the image size changes)."""
+        self.reference = self.reference_time = None
+
+    def _detect(self, small, t):
+        self.reference, self.reference_time = small, t
+        return True
+
+    def stats(self):
+        return {"motion_checks": self.checks,
+                "motion_skipped": self.skipped,
+                "motion_skip_rate": self.skipped / self.checks if self.checks else None}
+
+
+def stats():
+    checks = totals["checks"]
+    return {"checks": checks,
+            "skipped": totals["skipped"],
+            "skip_rate": totals["skipped"] / checks if checks else None}
@@ -0,0 +1,112 @@
+"""
+preload.py
+Deferred loading of the heavy parts of the server.
+
+- The HTTP side answers as soon as Django is set up. The WebSocket consumer
+  (aiortc) and the media pipeline (OpenCV, MediaPipe) are imported on a loader
+  thread when first needed, never on the event loop.
+- With RTC_PRELOAD (runworkers --preload) they are imported, and the detector
+  pool filled, in the background once the server is listening.
+- Import durations are kept for the metrics.
+"""
+
+import asyncio
+import importlib
+import logging
+import sys
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+HEAVY_MODULES = ('rtc.routing', 'rtc.media')    # WebSocket consumer, then the media pipeline
+
+loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='preload')
+imports = {}        # Module name -> Future of the module
+import_times = {}   # Module name -> seconds its import took on the loader thread
+
+
+def _import(name):
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    import_times[name] = round(time.perf_counter() - start, 3)
+    logger.info(f"Imported {name} in {import_times[name]:.2f}s")
+    return module
+
+
+def import_background(name):
+    """Start importing a module on the loader thread, once. Returns its Future."""
+    future = imports.get(name)
+    if future is None:
+        future = imports[name] = loader.submit(_import, name)
+    return future
+
+
+async def import_async(name):
+    """The module, imported without blocking the event loop."""
+    return await asyncio.wrap_future(import_background(name))
+
+
+def _fill_detector_pool(loop):
+    from .detector_pool import detector_pool
+    # The pool keeps its books on the event loop
+    loop.call_soon_threadsafe(detector_pool.refill)
+
+
+def preload():
+    """
+    Import the heavy modules and warm the detector pool in the background.
+    Without a running event loop the pool fills with the first session.
+    """
+    for name in HEAVY_MODULES:
+        import_background(name)
+    try:
+        loader.submit(_fill_detector_pool, asyncio.get_running_loop())
+    except RuntimeError:
+        pass
+
+
+def when_serving(function):
+    """
+    Call function once the server runs: under Daphne on the event loop, after
+    the listening sockets are bound (its Twisted reactor starts after binding),
+    else right away.
+    """
+    reactor = sys.modules.get('twisted.internet.reactor')
+    if reactor is not None:
+        # Startup triggers fire before the asyncio loop runs, call on its first turn
+        reactor.callWhenRunning(reactor.callLater, 0, function)
+    else:
+        function()
+
+
+def schedule_preload():
+    """Preload if RTC_PRELOAD is set, once the server runs."""
+    if getattr(settings, 'RTC_PRELOAD', False):
+        when_serving(preload)
+
+
+class LazyApplication():
+    """
+    ASGI application built from a module on its first connection,
+    the module being imported off the event loop.
+    """
+
+    def __init__(self, module, build):
+        self.module = module            # Dotted name of the module to import
+        self.build = build              # build(module) -> ASGI application
+        self.application = None
+
+    async def __call__(self, scope, receive, send):
+        if self.application is None:
+            self.application = self.build(await import_async(self.module))
+        return await self.application(scope, receive, send)
+
+
+def stats():
+    return {"preload": bool(getattr(settings, 'RTC_PRELOAD', False)),
+            "pending": [name for name, future in imports.items() if not future.done()],
+            "import_seconds": dict(import_times)}
@@ -0,0 +1,83 @@
+"""
+proctoring.py
+Incremental hand-visibility accounting for proctoring.
+
+- O(1) work and constant memory per processed frame, however long the exam.
+- Debounces single-frame detection dropouts before reporting a transition.
+- Can be queried for the running totals at any moment.
+"""
+
+
+class ProctoringAccumulator():
+    """
+    Tracks the time the valid number of hands was not visible.
+    Feed it one sample per processed frame with update().
+    """
+
+    def __init__(self, debounce=0.2):
+        self.debounce = debounce        # Seconds a new state must persist before it counts
+        self.hands_seen = True          # Committed (debounced) visibility state
+        self.pending_since = None       # First timestamp of a not yet committed state change
+        self.gap_start = None           # Start of the open unseen gap, if any
+        self.total_unseen = 0.0         # Sum of all closed gaps
+        self.longest_gap = 0.0          # Longest closed gap
+        self.events = 0                 # Number of unseen gaps started
+        self.closed = False
+
+    def update(self, timestamp, hands_ok):
+        """
+        Record one visibility sample.
+        Returns 'hand_unseen' or 'hand_seen' when the debounced state flips, else None.
+        """
+        if self.closed:
+            return None
+
+        if hands_ok == self.hands_seen:
+            # Back to the committed state before the debounce elapsed: a dropout
+            self.pending_since = None
+            return None
+
+        if self.pending_since is None:
+            self.pending_since = timestamp
+        if timestamp - self.pending_since < self.debounce:
+            return None
+
+        # The change persisted, commit it from the moment it started
+        changed_at = self.pending_since
+        self.pending_since = None
+        self.hands_seen = hands_ok
+        if hands_ok:
+            self._close_gap(changed_at)
+            return 'hand_seen'
+        self.gap_start = changed_at
+        self.events += 1
+        return 'hand_unseen'
+
+    def _close_gap(self, timestamp):
+        gap = max(timestamp - self.gap_start, 0.0)
+        self.total_unseen += gap
+        self.longest_gap = max(self.longest_gap, gap)
+        self.gap_start = None
+
+    def unseen(self, now):
+        """Total unseen time so far, including a gap that is still open."""
+        if self.gap_start is None:
+            return self.total_unseen
+        return self.total_unseen + max(now - self.gap_start, 0.0)
+
+    def close(self, now):
+        """Close an open gap at the end of the exam and ignore further samples."""
+        if self.gap_start is not None:
+            # Hands that came back within the debounce window count from their return
+            self._close_gap(self.pending_since if self.pending_since is not None else now)
+            self.hands_seen = True
+            self.pending_since = None
+        self.closed = True
+
+    def snapshot(self, now):
+        """Current proctoring totals as a plain dict."""
+        current_gap = 0.0 if self.gap_start is None else max(now - self.gap_start, 0.0)
+        return {"hands_unseen": self.unseen(now),
+                "longest_gap": max(self.longest_gap, current_gap),
+                "events": self.events,
+                "hands_seen": self.hands_seen}
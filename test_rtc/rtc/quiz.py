@@ -0,0 +1,165 @@
+"""
+quiz.py
+Quiz progression as a sans-IO state machine.
+
+- QuizMachine.step() takes the hands seen at one moment and returns the
+  events that moment caused: gestures, question changes, the finish with
+  its score, and hand visibility changes.
+- It never reads a clock, sends a message or touches a file, so the same
+  logic runs live in VideoTransformTrack and, thousands of times faster
+  than real time, over landmark traces (see simulator.py).
+"""
+
+import csv
+
+from . import landmarks
+from .gestures import answer_for
+from .proctoring import ProctoringAccumulator
+
+
+# ----------------------------
+# Data class for each question and the answer it gets
+# ----------------------------
+class Data():
+    def __init__(self, data):
+        self.question_text = data["question_text"]
+        self.question_image = data["question_image"]
+        self.choice_type = data["choice_type"]
+        self.answer = int(data["answer"])
+        self.choice1 = data["choice1"]
+        self.choice2 = data["choice2"]
+        self.choice3 = data["choice3"]
+        self.choice4 = data["choice4"]
+
+        # Updated dynamically when user makes a selection
+        self.chosen_answer = None
+
+    def update(self, fingers):
+        """
+        Update chosen_answer based on finger pattern:
+        - Recognizes specific hand/finger combinations to map to answers 1–4 or 'undo' (5).
+        """
+        self.chosen_answer = answer_for(fingers)
+
+
+def load_questions(quiz_name):
+    """
+    Load quiz questions from a CSV file under quiz/ as Data objects.
+    """
+    with open(f'quiz/{quiz_name}', newline='') as file:
+        return [Data(question) for question in csv.DictReader(file)]
+
+
+class QuizMachine():
+    """
+    Gesture, cooldown, undo, scoring and hand-visibility logic of one session.
+    Feed it the hands of every processed frame with step(); timestamps are
+    seconds on any clock, as long as it is the same one throughout.
+    """
+
+    def __init__(self, questions, start=0.0, hold=1.0, cooldown=1.0, debounce=0.2, recognize=None):
+        self.data = questions           # List of Data objects (exam questions)
+        self.recognize = recognize      # hand -> answer (e.g. GestureCascade), None = tipsUp pattern match
+        self.qNo = 0                    # Current question index
+        self.qTotal = len(questions)    # Total number of questions
+        self.score = 0                  # Exam score
+        self.hold = hold                # Seconds between the two detections that validate a gesture
+        self.cooldown_period = cooldown # Delay before next gesture is accepted
+        self.hands_unseen = 0.0         # Total duration of time with hands visible != 2
+        self.proctoring = ProctoringAccumulator(debounce)  # Running hand visibility totals
+
+        # Timing and state flags for gesture detection and cooldown
+        self.last_execution_time = start    # Time last gesture validated
+        self.detection_time = start         # Time of gesture detected first (need to validate)
+        self.on_cooldown = True
+        self.detected_answer = None
+        self.double_detection = False       # Is a gesture being validated now?
+
+    @property
+    def finished(self):
+        return self.qNo == self.qTotal
+
+    def step(self, timestamp, hands):
+        """
+        Advance the quiz with the hands seen at timestamp.
+        Returns a list of event dicts, each with "event" and "time":
+        - gesture: a validated answer gesture, with "answer" (5 = undo) and "hands"
+        - question: the question "qNo" is now due
+        - finished: the last question was answered, with "score" and "hands_unseen"
+        - hand_unseen / hand_seen: the debounced hand visibility flipped, with "hands"
+        """
+        events = []
+
+        # Handle cooldown to avoid double-counting and accidental gestures
+        if self.on_cooldown:
+            if timestamp - self.last_execution_time >= self.cooldown_period:
+                self.on_cooldown = False
+            return events
+        if self.qNo >= self.qTotal:
+            return events
+
+        question = self.data[self.qNo]
+        if len(hands) > 0:
+            # Answer gesture of the latest detected hand
+            if self.recognize:
+                question.chosen_answer = self.recognize(hands[-1])
+            else:
+                question.update(landmarks.tips_up(hands[-1]))
+            answer = question.chosen_answer
+
+            if answer:
+                # First detection of an answer gesture
+                if not self.double_detection:
+                    self.detected_answer = answer
+                    self.detection_time = timestamp
+                    self.double_detection = True
+
+                # Require a second detection hold seconds later for validation
+                elif timestamp > self.detection_time + self.hold:
+                    self.double_detection = False
+                    if answer == self.detected_answer:
+                        events.append({"event": 'gesture', "time": timestamp, "answer": answer, "hands": len(hands)})
+                        self._execute(answer, timestamp, events)
+            else:
+                self.detected_answer = None
+        else:
+            self.detected_answer = None
+
+        # Track when number of hands (2) are not valid (possible cheating)
+        event = self.proctoring.update(timestamp, len(hands) == 2)
+        if event:
+            events.append({"event": event, "time": timestamp, "hands": len(hands)})
+        return events
+
+    def _execute(self, answer, timestamp, events):
+        """Apply a validated gesture: answer and advance, or undo."""
+        if answer == 5:
+            # Undo gesture: go back one question
+            self.data[self.qNo].chosen_answer = None
+            self.qNo = max(self.qNo - 1, 0)
+            self.data[self.qNo].chosen_answer = None
+        else:
+            # Advance to next question
+            self.qNo += 1
+
+        if self.finished:
+            # Calculate final score
+            self.score = sum(1 for data in self.data if data.answer == data.chosen_answer)
+            self.score = round((self.score / self.qTotal) * 100, 2)
+
+            # Close an open unseen-hand gap and take the total
+            self.proctoring.close(timestamp)
+            self.hands_unseen = self.proctoring.total_unseen
+            events.append({"event": 'finished', "time": timestamp,
+                           "score": self.score, "hands_unseen": self.hands_unseen})
+        else:
+            events.append({"event": 'question', "time": timestamp, "qNo": self.qNo})
+
+        # Reset cooldown after valid gesture
+        self.on_cooldown = True
+        self.last_execution_time = timestamp
+
+    def answers(self):
+        """[question number, chosen answer, correct] of every question."""
+        return [[i + 1, data.chosen_answer, data.answer == data.chosen_answer]
+                for i, data in enumerate(self.data)]
@@ -0,0 +1,176 @@
+"""
+recording.py
+Optional per-session recording of the student's incoming video.
+
+- Subscribes a second consumer to the shared MediaRelay, so the detection
+  track is never slowed down by recording.
+- Frames go through a bounded queue to one writer thread; when the writer
+  falls behind, frames are dropped and counted instead of back-pressuring.
+- Writes rolling, time-based Matroska segments that stay playable after a crash.
+
+MediaRelay hands out decoded frames, so the writer has to encode them again.
+libx264 ultrafast at a capped frame rate keeps that cost low, and the writer
+thread's CPU time is reported per recorded second when the session stops.
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+
+from fractions import Fraction
+
+import av
+from aiortc.mediastreams import MediaStreamError
+
+logger = logging.getLogger(__name__)
+
+
+class SessionRecorder():
+    """
+    Records one relay subscription into segment files under directory.
+    """
+
+    def __init__(self, track, directory, segment_seconds=60, max_fps=15, queue_size=30):
+        self.track = track                      # Relay subscription of the incoming video
+        self.directory = directory
+        self.segment_seconds = segment_seconds  # Length of each segment file
+        self.max_fps = max_fps                  # Frames above this rate are not recorded
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.task = None                        # Reader task on the event loop
+        self.thread = None                      # Writer thread
+        self.last_time = None                   # Source time of the last queued frame
+        self.written = 0                        # Frames encoded
+        self.dropped = 0                        # Frames dropped because the queue was full
+        self.segments = 0
+        self.cpu_time = 0.0                     # Writer thread CPU seconds
+        self.recorded_time = 0.0                # Seconds of video recorded
+        self.error = None                       # Why the writer stopped early, None = it did not
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.thread = threading.Thread(target=self._write, name='recorder', daemon=True)
+        self.thread.start()
+        self.task = asyncio.ensure_future(self._read())
+
+    async def _read(self):
+        """Pull frames from the relay and hand them to the writer without waiting."""
+        while True:
+            try:
+                frame = await self.track.recv()
+            except MediaStreamError:
+                break
+            if frame.pts is None or frame.time_base is None:
+                continue
+
+            # Frame-rate cap on the source clock
+            frame_time = float(frame.pts * frame.time_base)
+            if self.last_time is not None and frame_time - self.last_time < 1 / self.max_fps:
+                continue
+            self.last_time = frame_time
+
+            if not self.thread.is_alive():
+                # The writer failed (see error), nothing drains the queue any more
+                self.dropped += 1
+                continue
+            try:
+                self.frames.put_nowait(frame)
+            except queue.Full:
+                self.dropped += 1
+
+    def _write(self):
+        """Writer thread: encode frames into rolling segments."""
+        cpu_start = time.thread_time()
+        container = stream = None
+        segment_start = first_time = frame_time = None
+        try:
+            while True:
+                frame = self.frames.get()
+                if frame is None:
+                    break
+                frame_time = float(frame.pts * frame.time_base)
+                if first_time is None:
+                    first_time = frame_time
+
+                if container is None or frame_time - segment_start >= self.segment_seconds:
+                    if container is not None:
+                        self._close_segment(container, stream)
+                    container, stream = self._open_segment(frame)
+                    segment_start = frame_time
+
+                # Timestamps relative to the segment, in milliseconds
+                image = frame.reformat(width=stream.width, height=stream.height, format='yuv420p')
+                image.pts = int((frame_time - segment_start) * 1000)
+                image.time_base = stream.codec_context.time_base
+                for packet in stream.encode(image):
+                    container.mux(packet)
+                self.written += 1
+        except Exception as error:
+            self.error = repr(error)
+            logger.exception(f"Recording to {self.directory} failed")
+        finally:
+            if container is not None:
+                try:
+                    self._close_segment(container, stream)
+                except Exception as error:
+                    self.error = self.error or repr(error)
+                    logger.exception(f"Closing the last segment of {self.directory} failed")
+            if first_time is not None:
+                self.recorded_time = frame_time - first_time
+            self.cpu_time = time.thread_time() - cpu_start
+
+    def _open_segment(self, frame):
+        path = os.path.join(self.directory, f'{self.segments:04d}.mkv')
+        self.segments += 1
+        container = av.open(path, mode='w', format='matroska')
+        stream = container.add_stream('libx264', rate=self.max_fps)
+        stream.width = frame.width - frame.width % 2
+        stream.height = frame.height - frame.height % 2
+        stream.pix_fmt = 'yuv420p'
+        stream.codec_context.time_base = Fraction(1, 1000)
+        stream.options = {'preset': 'ultrafast', 'tune': 'zerolatency'}
+        return container, stream
+
+    def _close_segment(self, container, stream):
+        try:
+            for packet in stream.encode(None):
+                container.mux(packet)
+        finally:
+            container.close()
+
+    async def stop(self):
+        """Stop reading, let the writer finish its queue and report the cost."""
+        if self.task is None:
+            return
+        self.task.cancel()
+        self.track.stop()
+        if self.thread.is_alive():
+            # Never a blocking put: a writer that dies meanwhile would leave it waiting forever
+            while True:
+                try:
+                    self.frames.put_nowait(None)
+                    break
+                except queue.Full:
+                    try:
+                        self.frames.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+            await asyncio.get_running_loop().run_in_executor(None, self.thread.join)
+        self.task = None
+
+        stats = self.stats()
+        logger.info(f"Recording {self.directory}: {stats}")
+        return stats
+
+    def stats(self):
+        return {"segments": self.segments,
+                "written": self.written,
+                "dropped": self.dropped,
+                "recorded_seconds": round(self.recorded_time, 1),
+                "error": self.error,
+                "cpu_seconds": round(self.cpu_time, 2),
+                "cpu_per_recorded_second": round(self.cpu_time / self.recorded_time, 4)
+                                           if self.recorded_time else None}
@@ -0,0 +1,283 @@
+"""
+results.py
+Write-behind persistence of finished exam sessions.
+
+- Finished sessions are appended to a local spool file first and fsynced
+  (survives a crash), off the event loop.
+- A background task batches them into Results/AnswerSheets with bulk_create.
+- The spool is truncated once every spooled record reached the database,
+  and replayed into the queue on the next start (asgi.py starts the writer
+  with the server, not with the first finished exam).
+- Records that are malformed, or that the database keeps refusing, go to a
+  dead-letter file next to the spool instead of blocking the ones behind them.
+- Under runworkers each worker has a spool of its own, since a worker
+  truncates and replays its spool without regard for anyone else's.
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import re
+
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, transaction
+from channels.db import database_sync_to_async
+
+logger = logging.getLogger(__name__)
+
+# Connection problems: the database is away, the records are fine, retry them as long as it takes
+UNAVAILABLE = (OperationalError, InterfaceError)
+
+
+def invalid(record):
+    """Why record cannot become a Results row, None if it can."""
+    try:
+        for key in ("session", "username"):
+            if not isinstance(record[key], str) or not record[key]:
+                return f"{key} missing"
+        if record["exam_id"] is None:
+            return "exam_id missing"
+        for key in ("score", "hands_unseen", "finished_at"):
+            if not isinstance(record[key], (int, float)):
+                return f"{key} not a number"
+        if not all(len(answer) == 3 for answer in record["answers"]):
+            return "malformed answers"
+    except (KeyError, TypeError):
+        return "malformed record"
+    return None
+
+
+def worker_spool(path, worker=None):
+    """The spool of a worker under runworkers (<name>.worker<N><ext>), path itself in a single process."""
+    worker = os.environ.get('RTC_WORKER_ID') if worker is None else worker
+    if worker is None:
+        return str(path)
+    root, ext = os.path.splitext(str(path))
+    return f"{root}.worker{worker}{ext}"
+
+
+def adopt_spools(path, workers):
+    """
+    Called before the workers start: move the records of spools none of them
+    will open (the single-process spool, those of workers beyond the new count)
+    to worker 0's spool, which replays them. Returns the number of files adopted.
+    """
+    root, ext = os.path.splitext(str(path))
+    pattern = re.compile(re.escape(root) + r'\.worker(\d+)' + re.escape(ext) + '$')
+    orphans = [str(path)] + sorted(spool for spool in glob.glob(f"{glob.escape(root)}.worker*{ext}")
+                                   if (match := pattern.match(spool)) and int(match.group(1)) >= workers)
+    adopted = 0
+    for orphan in orphans:
+        try:
+            with open(orphan, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            continue
+        if data:
+            if not data.endswith(b"\n"):
+                data += b"\n"          # A torn last line stays a line of its own, skipped on replay
+            fd = os.open(worker_spool(path, 0), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            try:
+                ResultWriter._append(fd, data)
+            finally:
+                os.close(fd)
+            adopted += 1
+        os.unlink(orphan)
+    return adopted
+
+
+class ResultWriter():
+    """
+    Batches exam results into the database off the frame path.
+    submit() only validates and hands the record to the executor, which
+    appends and fsyncs it to the spool before it is queued; every database
+    round trip happens in the background flush task.
+    """
+
+    def __init__(self, spool_path, batch_size=200, flush_interval=0.5, retry_delay=5, max_attempts=3,
+                 dead_letter_path=None):
+        self.spool_path = str(spool_path)
+        # Rejected records, one {"record", "error"} line each, for manual recovery
+        self.dead_letter_path = str(dead_letter_path or os.path.splitext(self.spool_path)[0] + '.rejected.jsonl')
+        self.batch_size = batch_size            # Max records per bulk_create
+        self.flush_interval = flush_interval    # Time to wait for a batch to fill up
+        self.retry_delay = retry_delay          # Delay before retrying a failed insert
+        self.max_attempts = max_attempts        # Inserts of a batch the database refuses before isolating bad records
+        self.queue = None                       # asyncio.Queue of pending records
+        self.task = None                        # Background flush task
+        self.spool_fd = None                    # Append-only spool file descriptor
+        self.unflushed = 0                      # Records submitted but not yet in the database
+        self.rejected = 0                       # Records sent to the dead-letter file
+        self.spooling = set()                   # Spool writes in flight
+
+    def submit(self, record):
+        """
+        Queue one finished session for persistence; False if it is malformed
+        (it then goes to the dead-letter file). Must be called from the event loop.
+        """
+        self.start()
+        error = invalid(record)
+        if error:
+            logger.error(f"Rejecting result of session {record.get('session')}: {error}")
+            self._spawn(self._reject([record], error))
+            return False
+        # Counted at once, so the spool is never truncated under a pending write
+        self.unflushed += 1
+        self._spawn(self._spool(record))
+        return True
+
+    def _spawn(self, coroutine):
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self.spooling.add(task)
+        task.add_done_callback(self.spooling.discard)
+
+    async def _spool(self, record):
+        line = (json.dumps(record) + "\n").encode()
+        await asyncio.get_running_loop().run_in_executor(None, self._append, self.spool_fd, line)
+        self.queue.put_nowait(record)
+
+    @staticmethod
+    def _append(fd, line):
+        os.write(fd, line)
+        os.fsync(fd)
+
+    async def _reject(self, records, error):
+        """Append records to the dead-letter file, with the reason."""
+        lines = b''.join((json.dumps({"record": record, "error": error}) + "\n").encode() for record in records)
+        fd = os.open(self.dead_letter_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._append, fd, lines)
+        finally:
+            os.close(fd)
+        self.rejected += len(records)
+
+    def start(self):
+        """
+        Open the spool, replay what a previous run left in it and start the
+        flush task, once; needs the running event loop. Without a loop (not
+        yet serving) it is left to the first submit().
+        """
+        if self.task is not None:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        os.makedirs(os.path.dirname(self.spool_path) or '.', exist_ok=True)
+        self.spool_fd = os.open(self.spool_path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+        self.queue = asyncio.Queue()
+
+        # Replay records left over from a previous run (idempotent, see Results.SessionId)
+        for record in self._read_spool():
+            error = invalid(record)
+            if error:
+                self._spawn(self._reject([record], error))
+                continue
+            self.unflushed += 1
+            self.queue.put_nowait(record)
+        if self.unflushed:
+            logger.info(f"Replaying {self.unflushed} spooled results")
+
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def _read_spool(self):
+        records = []
+        with open(self.spool_path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Torn last line from a crash mid-write
+                    logger.warning("Skipping corrupt spool line")
+        return records
+
+    async def _run(self):
+        """
+        Collect batches and insert them. Retries as long as the database is
+        unreachable; a batch it refuses max_attempts times is inserted record
+        by record, and the records it still refuses are dead-lettered.
+        """
+        while True:
+            batch = [await self.queue.get()]
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            attempts = 0
+            while True:
+                try:
+                    await self._insert(batch)
+                    break
+                except UNAVAILABLE:
+                    logger.exception(f"Database unavailable, retrying {len(batch)} results")
+                except Exception:
+                    attempts += 1
+                    if attempts >= self.max_attempts:
+                        await self._isolate(batch)
+                        break
+                    logger.exception(f"Failed to persist {len(batch)} results, retrying")
+                await asyncio.sleep(self.retry_delay)
+
+            self.unflushed -= len(batch)
+            if self.unflushed == 0:
+                # Everything spooled is in the database, start a fresh spool
+                os.ftruncate(self.spool_fd, 0)
+
+    async def _isolate(self, batch):
+        """Insert batch one record at a time, dead-lettering the records the database refuses."""
+        for record in batch:
+            while True:
+                try:
+                    await self._insert([record])
+                    break
+                except UNAVAILABLE:
+                    logger.exception("Database unavailable, retrying")
+                    await asyncio.sleep(self.retry_delay)
+                except Exception as error:
+                    logger.exception(f"Result of session {record['session']} refused, dead-lettered")
+                    await self._reject([record], repr(error))
+                    break
+
+    async def flush(self):
+        """Wait until every submitted record has been persisted."""
+        while self.unflushed:
+            await asyncio.sleep(self.flush_interval)
+
+    @database_sync_to_async
+    def _insert(self, batch):
+        from .models import Results, AnswerSheets
+
+        results = []
+        answers = []
+        for record in batch:
+            results.append(Results(
+                SessionId=record["session"],
+                Username=record["username"],
+                ResultExamId=record["exam_id"],
+                Score=record["score"],
+                HandsUnseen=record["hands_unseen"],
+                FinishedAt=datetime.fromtimestamp(record["finished_at"], tz=timezone.utc)))
+            for qNo, chosen_answer, correct in record["answers"]:
+                answers.append(AnswerSheets(
+                    SessionId=record["session"],
+                    QuestionNo=qNo,
+                    ChosenAnswer=chosen_answer,
+                    Correct=correct))
+
+        with transaction.atomic():
+            Results.objects.bulk_create(results, ignore_conflicts=True)
+            AnswerSheets.objects.bulk_create(answers, ignore_conflicts=True)
+
+
+result_writer = ResultWriter(worker_spool(getattr(settings, 'RTC_RESULT_SPOOL', 'spool/results.jsonl')))
@@ -0,0 +1,88 @@
+"""
+sessions.py
+Session lifecycle and per-node resource accounting.
+
+- Every admitted session is registered, and released exactly once, whichever
+  of WebSocket disconnect, track end or peer connection failure comes first.
+- Counts live sessions and open MediaPipe graphs, and reads the process RSS,
+  so memory creep over an exam day shows up in the metrics.
+"""
+
+import logging
+import os
+import resource
+
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+def rss_bytes():
+    """Current resident set size of this process."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Peak instead of current where /proc is not available (kB on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def thread_count():
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('Threads:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class SessionManager():
+    """
+    Owns the teardown of sessions. A session is anything with a session_id,
+    a released flag and an async release() that frees its resources.
+    """
+
+    def __init__(self):
+        self.sessions = {}              # session_id -> live session
+        self.open_graphs = 0            # MediaPipe graphs currently allocated
+        self.opened = 0
+        self.closed = Counter()         # Teardown reason -> count
+
+    def open(self, session):
+        self.sessions[session.session_id] = session
+        self.opened += 1
+
+    async def close(self, session, reason):
+        """
+        Release a session's resources once, on the first of all teardown triggers.
+        """
+        if session.released:
+            return
+        session.released = True
+        self.sessions.pop(session.session_id, None)
+        self.closed[reason] += 1
+        try:
+            await session.release()
+        except Exception:
+            logger.exception(f"Teardown of session {session.session_id} failed")
+        finally:
+            logger.info(f"Session {session.session_id} closed ({reason}), {len(self.sessions)} live")
+
+    def graph_opened(self):
+        self.open_graphs += 1
+
+    def graph_closed(self):
+        self.open_graphs -= 1
+
+    def stats(self):
+        return {"live_sessions": len(self.sessions),
+                "open_graphs": self.open_graphs,
+                "opened": self.opened,
+                "closed": dict(self.closed),
+                "rss_bytes": rss_bytes(),
+                "threads": thread_count()}
+
+
+session_manager = SessionManager()
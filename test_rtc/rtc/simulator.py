@@ -0,0 +1,121 @@
+"""
+simulator.py
+Replays landmark traces through the quiz state machine, far faster than real time.
+
+- A trace is the hands of every processed frame of one session: a list of
+  (t, hands) pairs, stored as one {"t", "hands"} JSON record per line, the
+  way sessions write them with RTC_LANDMARK_TRACE_DIR set.
+- synthetic_trace() builds a student answering given questions, with
+  landmark noise, detection dropouts, hesitations, undone mistakes and
+  looking away, and returns what really happened alongside.
+- replay() runs one trace through a fresh QuizMachine with any thresholds.
+"""
+
+import copy
+import json
+import random
+
+from .landmarks import hand_dict
+from .quiz import QuizMachine
+
+ANSWER_FINGERS = {1: [0, 1, 0, 0, 0], 2: [0, 1, 1, 0, 0], 3: [0, 1, 1, 1, 0], 4: [0, 1, 1, 1, 1],
+                  5: [1, 0, 0, 0, 0]}
+REST_FINGERS = [0, 0, 0, 0, 0]      # A loose fist: no answer
+
+
+def load_trace(path):
+    with open(path, encoding='utf-8') as file:
+        return [(record["t"], record["hands"]) for record in map(json.loads, file) if record]
+
+
+def hand_pose(fingers, cx, cy, hand_type, rng, noise=0.0):
+    """
+    A hand in the HandDetector format around (cx, cy), showing fingers
+    ([thumb, index, middle, ring, pinky], 1 = up) to the tips_up rules,
+    with Gaussian landmark noise of noise pixels.
+    """
+    side = -1 if hand_type == "Right" else 1   # Thumb side on the mirrored frame
+    points = [(0, 60)]                                  # Wrist
+    points += [(25 * side, 45), (40 * side, 30), (50 * side, 15), ((58 if fingers[0] else 44) * side, 10)]
+    for i, x in enumerate((-20, 0, 20, 38)):
+        up = fingers[i + 1]
+        points += [(x * side, 20), (x * side, 0), (x * side, -18 if up else -6), (x * side, -34 if up else 6)]
+    return hand_dict([[round(cx + x + rng.gauss(0, noise)), round(cy + y + rng.gauss(0, noise)), 0]
+                      for x, y in points], hand_type)
+
+
+def synthetic_trace(intended, fps=10, seed=0, noise=1.5, dropout=0.02, hesitation=0.2, mistakes=0.1,
+                    look_away=0.1, read_time=(2.0, 6.0), hold_time=(1.3, 2.2)):
+    """
+    A student answering intended (one answer 1-4 per question) with the
+    right hand while the left one rests in view.
+    :param dropout: Chance that a frame misses one of the hands
+    :param hesitation: Chance per question of briefly showing another gesture first
+    :param mistakes: Chance per question of answering wrong, then undoing it
+    :param look_away: Chance per question of both hands leaving the view for 1-3 s
+    :returns: (trace, truth), truth = {"answers", "unseen"} (seconds both hands were away)
+    """
+    rng = random.Random(seed)
+    trace = []
+    t = 0.0
+    unseen = 0.0
+
+    def show(fingers, seconds, hands_away=False):
+        nonlocal t
+        for _ in range(max(int(seconds * fps), 1)):
+            if hands_away:
+                hands = []
+            else:
+                hands = [hand_pose(REST_FINGERS, 180, 300, "Left", rng, noise),
+                         hand_pose(fingers, 460, 260, "Right", rng, noise)]
+                if rng.random() < dropout:
+                    hands.pop(rng.randrange(2))
+            trace.append((round(t, 4), hands))
+            t += 1 / fps
+
+    def answer(choice):
+        if rng.random() < hesitation:
+            show(ANSWER_FINGERS[rng.choice([a for a in (1, 2, 3, 4) if a != choice])], rng.uniform(0.2, 0.7))
+        show(ANSWER_FINGERS[choice], rng.uniform(*hold_time))
+
+    for choice in intended:
+        show(REST_FINGERS, rng.uniform(*read_time))
+        if rng.random() < look_away:
+            away = rng.uniform(1.0, 3.0)
+            show(REST_FINGERS, away, hands_away=True)
+            unseen += away
+            show(REST_FINGERS, 1.0)
+        if rng.random() < mistakes:
+            answer(rng.choice([a for a in (1, 2, 3, 4) if a != choice]))
+            show(REST_FINGERS, rng.uniform(1.0, 2.0))
+            show(ANSWER_FINGERS[5], rng.uniform(*hold_time))
+            show(REST_FINGERS, rng.uniform(1.0, 2.0))
+        answer(choice)
+    show(REST_FINGERS, 2.0)
+    return trace, {"answers": list(intended), "unseen": unseen}
+
+
+def replay(trace, questions, **params):
+    """
+    Run trace through a QuizMachine over fresh copies of questions.
+    :param params: QuizMachine thresholds (hold, cooldown, debounce)
+    """
+    data = [copy.copy(question) for question in questions]
+    for question in data:
+        question.chosen_answer = None
+    quiz = QuizMachine(data, trace[0][0] if trace else 0.0, **params)
+    events = []
+    finished_at = None
+    for t, hands in trace:
+        for event in quiz.step(t, hands):
+            events.append(event)
+            if event["event"] == 'finished':
+                finished_at = t
+    end = trace[-1][0] if trace else 0.0
+    return {"answers": [data.chosen_answer for data in quiz.data],
+            "finished": quiz.finished,
+            "score": quiz.score if quiz.finished else None,
+            "duration": (finished_at or end) - (trace[0][0] if trace else 0.0),
+            "hands_unseen": quiz.hands_unseen if quiz.finished else quiz.proctoring.unseen(end),
+            "gestures": sum(event["event"] == 'gesture' for event in events),
+            "events": events}
@@ -0,0 +1,103 @@
+"""
+spotcheck.py
+Server-side spot checks of the landmarks a client streams.
+
+- A random, sparse sample of a session's video frames goes through one
+  node-level static-mode HandDetector on its own thread.
+- Each result is compared with the landmarks the client reported for that
+  moment; a session whose stream disagrees too often is flagged.
+- Checks are skipped, not queued, when the checker is busy, so they can
+  never back up into the sessions.
+"""
+
+import asyncio
+import logging
+import random
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .sessions import session_manager
+
+logger = logging.getLogger(__name__)
+
+
+class SpotChecker():
+    """
+    Node-wide detector for spot checks. Static mode: frames come from many
+    sessions, so there is no tracking state to carry from one to the next.
+    """
+
+    def __init__(self, max_pending=4):
+        self.max_pending = max_pending  # Checks waiting beyond this are skipped
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='spotcheck')
+        self.detector = None            # Built on the first check
+        self.pending = 0
+        self.checks = 0
+        self.skipped = 0
+
+    def _detect(self, img):
+        if self.detector is None:
+            from .HandTrackingModule import HandDetector
+            self.detector = HandDetector(staticMode=True, maxHands=2)
+            session_manager.graph_opened()
+        hands, _ = self.detector.findHands(img, draw=False)
+        return hands
+
+    async def detect(self, img):
+        """Hands found in img, or None if the checker is too busy to look."""
+        if self.pending >= self.max_pending:
+            self.skipped += 1
+            return None
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self._detect, img)
+        finally:
+            self.pending -= 1
+            self.checks += 1
+
+    def stats(self):
+        return {"checks": self.checks,
+                "skipped": self.skipped,
+                "pending": self.pending}
+
+
+class LandmarkAudit():
+    """
+    Spot-check record of one session's landmark stream.
+    """
+
+    def __init__(self, rate=0.03, window=8, max_mismatches=3):
+        self.rate = rate                    # Chance that a sampled frame is checked
+        self.results = deque(maxlen=window) # Recent checks, True = disagreed
+        self.max_mismatches = max_mismatches  # Disagreements within the window that flag the stream
+        self.checks = 0
+        self.mismatches = 0
+        self.flagged = False
+
+    def due(self):
+        return random.random() < self.rate
+
+    def record(self, reported, detected):
+        """
+        Compare one check. Returns the reason of a disagreement, or None.
+        """
+        from .landmarks import disagreement     # OpenCV and NumPy, not for the metrics view
+        reason = disagreement(reported, detected)
+        self.checks += 1
+        self.results.append(reason is not None)
+        if reason:
+            self.mismatches += 1
+        if sum(self.results) >= self.max_mismatches and not self.flagged:
+            self.flagged = True
+        return reason
+
+    def summary(self):
+        return {"spot_checks": self.checks,
+                "spot_check_mismatches": self.mismatches,
+                "landmarks_flagged": self.flagged}
+
+
+spot_checker = SpotChecker(getattr(settings, 'RTC_SPOT_CHECK_MAX_PENDING', 4))
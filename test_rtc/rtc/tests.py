@@ -1,3 +1,479 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import random
+import tempfile
 
-# Create your tests here.
+from aiortc import RTCIceServer
+from django.db import OperationalError
+from django.test import SimpleTestCase
+
+from . import landmarks
+from .admission import AdmissionController
+from .gestures import GestureCascade, answer_for, rule_gesture
+from .ice import IceServerCache
+from .proctoring import ProctoringAccumulator
+from .quiz import Data, QuizMachine
+from .simulator import ANSWER_FINGERS, REST_FINGERS, hand_pose
+from .results import ResultWriter, adopt_spools, worker_spool
+
+
+def client_hand(hand_type="Right", x=0.5, y=0.5, z=0.0):
+    return {"type": hand_type, "landmarks": [[x, y, z] for _ in range(landmarks.LANDMARKS_PER_HAND)]}
+
+
+class ClientLandmarksTests(SimpleTestCase):
+    """hands_from_client: what a client may send over the data channel."""
+
+    def test_mirrors_into_pixels(self):
+        hands = landmarks.hands_from_client([client_hand("Right", x=0.25, y=0.5)], 640, 480)
+        self.assertEqual(len(hands), 1)
+        self.assertEqual(hands[0]["type"], "Left")
+        self.assertEqual(hands[0]["lmList"][0], [480, 240, 0])
+
+    def test_rejects_non_finite_and_out_of_range(self):
+        infinity = json.loads('{"type": "Right", "landmarks": [[Infinity, 0, 0]' + ', [0, 0, 0]' * 20 + ']}')
+        for hand in (infinity, client_hand(x=float('nan')), client_hand(y=1e300), client_hand(z=-5)):
+            with self.assertRaises(ValueError):
+                landmarks.hands_from_client([hand], 640, 480)
+
+    def test_rejects_malformed_hands(self):
+        short = client_hand()
+        short["landmarks"] = short["landmarks"][:20]
+        flat = client_hand()
+        flat["landmarks"] = [[0.5, 0.5]] * landmarks.LANDMARKS_PER_HAND
+        for hands in ([client_hand("Up")], [client_hand()] * (landmarks.MAX_CLIENT_HANDS + 1),
+                      [short], [flat], {"type": "Right"}):
+            with self.assertRaises(ValueError):
+                landmarks.hands_from_client(hands, 640, 480)
+
+
+class WorkerSpoolTests(SimpleTestCase):
+    """Under runworkers each worker spools results to a file of its own."""
+
+    def test_worker_spool_names(self):
+        self.assertEqual(worker_spool('spool/results.jsonl', 2), 'spool/results.worker2.jsonl')
+
+    def test_spools_without_a_worker_go_to_worker_0(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.jsonl')
+            spools = {path: '{"session": "single"}\n',
+                      worker_spool(path, 0): '{"session": "w0"}\n',
+                      worker_spool(path, 1): '{"session": "w1"}\n',
+                      worker_spool(path, 3): '{"session": "torn"'}
+            for spool, content in spools.items():
+                with open(spool, 'w') as file:
+                    file.write(content)
+
+            self.assertEqual(adopt_spools(path, 2), 2)
+            self.assertEqual(sorted(os.listdir(directory)), ['results.worker0.jsonl', 'results.worker1.jsonl'])
+            with open(worker_spool(path, 0)) as file:
+                self.assertEqual(file.read().splitlines(),
+                                 ['{"session": "w0"}', '{"session": "single"}', '{"session": "torn"'])
+
+
+class ProctoringAccumulatorTests(SimpleTestCase):
+    """Debounced hand visibility, one sample per processed frame."""
+
+    def feed(self, accumulator, samples):
+        """samples: (timestamp, hands_ok); returns the (timestamp, event) transitions."""
+        events = []
+        for timestamp, hands_ok in samples:
+            event = accumulator.update(timestamp, hands_ok)
+            if event:
+                events.append((timestamp, event))
+        return events
+
+    def test_dropout_shorter_than_debounce_is_ignored(self):
+        accumulator = ProctoringAccumulator(debounce=0.2)
+        events = self.feed(accumulator, [(0.0, True), (0.1, False), (0.2, False), (0.25, True), (0.4, True)])
+        self.assertEqual(events, [])
+        self.assertEqual(accumulator.unseen(1.0), 0.0)
+        self.assertEqual(accumulator.events, 0)
+
+    def test_gap_counts_from_when_the_hands_went_away(self):
+        accumulator = ProctoringAccumulator(debounce=0.2)
+        samples = [(0.0, True), (1.0, False), (1.1, False), (1.3, False), (2.0, False),
+                   (3.0, True), (3.1, True), (3.3, True)]
+        self.assertEqual(self.feed(accumulator, samples), [(1.3, 'hand_unseen'), (3.3, 'hand_seen')])
+        self.assertAlmostEqual(accumulator.total_unseen, 2.0)
+        self.assertAlmostEqual(accumulator.longest_gap, 2.0)
+        self.assertEqual(accumulator.events, 1)
+
+    def test_open_gap_counts_in_snapshot_and_close(self):
+        accumulator = ProctoringAccumulator(debounce=0.2)
+        self.feed(accumulator, [(0.0, False), (0.5, False)])
+        self.assertAlmostEqual(accumulator.snapshot(2.0)["hands_unseen"], 2.0)
+        self.assertFalse(accumulator.snapshot(2.0)["hands_seen"])
+        accumulator.close(3.0)
+        self.assertAlmostEqual(accumulator.total_unseen, 3.0)
+        self.assertIsNone(accumulator.update(4.0, False))
+        self.assertAlmostEqual(accumulator.unseen(10.0), 3.0)
+
+    def test_close_counts_hands_back_within_debounce_from_their_return(self):
+        accumulator = ProctoringAccumulator(debounce=0.5)
+        self.feed(accumulator, [(0.0, False), (1.0, False), (2.0, True)])
+        accumulator.close(2.2)
+        self.assertAlmostEqual(accumulator.total_unseen, 2.0)
+
+
+def question(answer):
+    return Data({"question_text": "?", "question_image": "", "choice_type": "text", "answer": answer,
+                 "choice1": "a", "choice2": "b", "choice3": "c", "choice4": "d"})
+
+
+def both_hands(fingers):
+    """A resting left hand and a right hand showing fingers, as the quiz expects them."""
+    rng = random.Random(0)
+    return [hand_pose(REST_FINGERS, 180, 300, "Left", rng), hand_pose(fingers, 460, 260, "Right", rng)]
+
+
+class QuizMachineTests(SimpleTestCase):
+    """Quiz transitions, hold and cooldown timing, undo and scoring, without any I/O."""
+
+    def setUp(self):
+        self.quiz = QuizMachine([question(1), question(2), question(3)], start=0.0, hold=1.0, cooldown=1.0)
+
+    def show(self, start, end, hands, step=0.1):
+        """Feed the same hands every step seconds over [start, end); returns the events."""
+        events = []
+        for i in range(round((end - start) / step)):
+            events += self.quiz.step(start + i * step, hands)
+        return events
+
+    def answer(self, start, answer):
+        """Hold an answer gesture long enough to validate it, then rest through the cooldown."""
+        events = self.show(start, start + 1.5, both_hands(ANSWER_FINGERS[answer]))
+        return events + self.show(start + 1.5, start + 3.0, both_hands(REST_FINGERS))
+
+    def test_gestures_wait_for_the_start_cooldown(self):
+        self.assertEqual(self.show(0.0, 0.9, both_hands(ANSWER_FINGERS[1])), [])
+        self.assertEqual(self.quiz.qNo, 0)
+
+    def test_a_gesture_held_past_hold_answers_the_question(self):
+        self.show(0.0, 1.0, both_hands(REST_FINGERS))
+        self.assertEqual(self.show(1.0, 2.0, both_hands(ANSWER_FINGERS[2])), [])
+        events = self.show(2.0, 2.3, both_hands(ANSWER_FINGERS[2]))
+        self.assertEqual([event["event"] for event in events], ['gesture', 'question'])
+        self.assertEqual(events[0]["answer"], 2)
+        self.assertEqual(events[1]["qNo"], 1)
+        self.assertEqual(self.quiz.data[0].chosen_answer, 2)
+
+    def test_the_gesture_must_be_the_same_after_hold(self):
+        self.show(0.0, 1.0, both_hands(REST_FINGERS))
+        self.show(1.0, 1.5, both_hands(ANSWER_FINGERS[1]))
+        # The second detection sees another answer: nothing is validated, detection starts over
+        events = self.show(1.5, 2.3, both_hands(ANSWER_FINGERS[3]))
+        self.assertEqual(events, [])
+        self.assertEqual(self.quiz.qNo, 0)
+
+    def test_no_new_gesture_during_cooldown(self):
+        self.show(0.0, 1.0, both_hands(REST_FINGERS))
+        self.show(1.0, 2.3, both_hands(ANSWER_FINGERS[1]))
+        self.assertEqual(self.quiz.qNo, 1)
+        # Same gesture kept up: the cooldown swallows it for a second, then it needs another hold
+        self.assertEqual(self.show(2.3, 3.2, both_hands(ANSWER_FINGERS[1])), [])
+        self.assertEqual(self.quiz.qNo, 1)
+
+    def test_undo_goes_back_and_clears_both_answers(self):
+        self.show(0.0, 1.0, both_hands(REST_FINGERS))
+        self.answer(1.0, 4)
+        self.assertEqual(self.quiz.qNo, 1)
+        events = self.answer(4.0, 5)
+        self.assertEqual([event["event"] for event in events], ['gesture', 'question'])
+        self.assertEqual(events[1]["qNo"], 0)
+        self.assertIsNone(self.quiz.data[0].chosen_answer)
+
+    def test_last_answer_finishes_with_score_and_unseen_time(self):
+        self.show(0.0, 1.0, both_hands(REST_FINGERS))
+        self.answer(1.0, 1)
+        self.show(4.0, 6.0, both_hands(REST_FINGERS)[:1])   # One hand away for two seconds
+        self.answer(6.0, 2)
+        events = self.answer(9.0, 4)
+        finished = events[-1]
+        self.assertEqual(finished["event"], 'finished')
+        self.assertTrue(self.quiz.finished)
+        self.assertEqual(finished["score"], 66.67)
+        self.assertAlmostEqual(finished["hands_unseen"], 2.0)
+        self.assertEqual(self.quiz.answers(), [[1, 1, True], [2, 2, True], [3, 4, False]])
+        self.assertEqual(self.show(12.0, 14.0, both_hands(ANSWER_FINGERS[1])), [])
+
+    def test_hand_visibility_events_are_debounced(self):
+        self.show(0.0, 1.0, both_hands(REST_FINGERS))
+        events = self.show(1.0, 1.5, both_hands(REST_FINGERS)[:1])
+        self.assertEqual([(event["event"], event["hands"]) for event in events], [('hand_unseen', 1)])
+        events = self.show(1.5, 2.0, both_hands(REST_FINGERS))
+        self.assertEqual([event["event"] for event in events], ['hand_seen'])
+
+
+class FixedClassifier():
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+
+    def classify(self, features):
+        self.calls += 1
+        return self.answer, 1.0
+
+
+class GestureCascadeTests(SimpleTestCase):
+    """The cascade's rule stage is the quiz's tips_up; the classifier only sees unclear or changing hands."""
+
+    def test_rules_read_hands_as_tips_up(self):
+        rng = random.Random(0)
+        cascade = GestureCascade()
+        for fingers in [REST_FINGERS, *ANSWER_FINGERS.values()]:
+            for hand_type in ("Left", "Right"):
+                for _ in range(20):
+                    hand = hand_pose(fingers, 320, 240, hand_type, rng, noise=3.0)
+                    self.assertEqual(cascade.classify(hand, 640, 480), answer_for(landmarks.tips_up(hand)))
+        self.assertEqual(cascade.stats()["escalated"], 0)
+
+    def test_margin_is_the_least_clear_finger_over_hand_size(self):
+        hand = hand_pose(ANSWER_FINGERS[2], 320, 240, "Right", random.Random(0))
+        self.assertEqual(rule_gesture(hand), (2, 6 / 40))   # Thumb tip 6 px beside its joint, hand 40 px
+        hand["lmList"][12][1] = hand["lmList"][10][1] - 1   # Middle finger barely up
+        self.assertEqual(rule_gesture(hand), (2, 1 / 40))
+
+    def test_escalates_on_small_margin_or_change(self):
+        rng = random.Random(0)
+        classifier = FixedClassifier(3)
+        cascade = GestureCascade(classifier, margin=0.1)
+        two = hand_pose(ANSWER_FINGERS[2], 320, 240, "Right", rng)
+        self.assertEqual(cascade.classify(two, 640, 480), 3)        # New answer
+        cascade.previous = 2
+        self.assertEqual(cascade.classify(two, 640, 480), 2)        # Same answer, margin 0.15
+        self.assertEqual(classifier.calls, 1)
+        two["lmList"][12][1] = two["lmList"][10][1] - 1
+        self.assertEqual(cascade.classify(two, 640, 480), 3)        # Margin 0.025
+        self.assertEqual(cascade.stats()["escalated"], 2)
+
+
+class AdmissionControllerTests(SimpleTestCase):
+    """Slots, the FIFO join queue and leaving it."""
+
+    def join(self, admission, name, positions):
+        """A queued join as a task, recording (name, position) notifications."""
+        async def on_position(position):
+            positions.append((name, position))
+        return asyncio.ensure_future(admission.acquire(on_position))
+
+    async def test_admits_up_to_capacity_then_queues_in_order(self):
+        admission = AdmissionController(capacity=2)
+        self.assertTrue(await admission.acquire())
+        self.assertTrue(await admission.acquire())
+        positions = []
+        first, second = self.join(admission, 'first', positions), self.join(admission, 'second', positions)
+        await asyncio.sleep(0)
+        self.assertEqual(positions, [('first', 1), ('second', 2)])
+        self.assertEqual(admission.stats()["queued"], 2)
+
+        admission.release()
+        self.assertTrue(await first)
+        self.assertFalse(second.done())
+        await asyncio.sleep(0)
+        self.assertEqual(positions[-1], ('second', 1))
+        self.assertEqual(admission.active, 2)     # The slot moved, it was not freed
+
+        admission.release()
+        self.assertTrue(await second)
+        admission.release()
+        self.assertEqual((admission.active, len(admission.waiting)), (1, 0))
+
+    async def test_full_queue_refuses(self):
+        admission = AdmissionController(capacity=1, max_queue=1)
+        await admission.acquire()
+        queued = self.join(admission, 'queued', [])
+        await asyncio.sleep(0)
+        self.assertFalse(await admission.acquire())
+        self.assertEqual(admission.rejected, 1)
+        queued.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await queued
+
+    async def test_cancel_while_queued_leaves_no_entry(self):
+        admission = AdmissionController(capacity=1)
+        await admission.acquire()
+        positions = []
+        leaving, staying = self.join(admission, 'leaving', positions), self.join(admission, 'staying', positions)
+        await asyncio.sleep(0)
+        leaving.cancel()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        self.assertEqual(len(admission.waiting), 1)
+        self.assertEqual(positions[-1], ('staying', 1))
+
+        admission.release()
+        self.assertTrue(await staying)
+        self.assertEqual(admission.active, 1)
+
+    async def test_cancel_during_first_notification(self):
+        admission = AdmissionController(capacity=1)
+        await admission.acquire()
+        notified = asyncio.Event()
+
+        async def slow_socket(position):
+            notified.set()
+            await asyncio.sleep(3600)
+
+        join = asyncio.ensure_future(admission.acquire(slow_socket))
+        await notified.wait()
+        join.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await join
+        self.assertEqual(len(admission.waiting), 0)
+        admission.release()
+        self.assertEqual(admission.active, 0)
+
+    async def test_slot_handed_to_a_join_that_just_left_is_freed(self):
+        admission = AdmissionController(capacity=1)
+        await admission.acquire()
+        join = self.join(admission, 'join', [])
+        await asyncio.sleep(0)
+        admission.release()         # Slot handed over...
+        join.cancel()               # ...as the join goes away
+        with self.assertRaises(asyncio.CancelledError):
+            await join
+        self.assertEqual((admission.active, len(admission.waiting)), (0, 0))
+        self.assertTrue(await admission.acquire())
+
+
+def result(session, **fields):
+    return {"session": session, "username": "student", "exam_id": 1, "score": 50.0, "hands_unseen": 1.5,
+            "finished_at": 1700000000.0, "answers": [[1, 2, True], [2, 1, False]], **fields}
+
+
+class RecordingWriter(ResultWriter):
+    """ResultWriter with the database replaced: records what it inserts, refuses what it is told to."""
+
+    def __init__(self, *args, refuse=(), unavailable=0, **kwargs):
+        super().__init__(*args, flush_interval=0.01, retry_delay=0, **kwargs)
+        self.inserted = []
+        self.refuse = set(refuse)       # Sessions the "database" always refuses
+        self.unavailable = unavailable  # Inserts that fail as if the database were down
+
+    async def _insert(self, batch):
+        if self.unavailable:
+            self.unavailable -= 1
+            raise OperationalError("database is down")
+        if any(record["session"] in self.refuse for record in batch):
+            raise ValueError("refused")
+        self.inserted += [record["session"] for record in batch]
+
+
+class ResultWriterTests(SimpleTestCase):
+    """Spooling, spool replay and truncation, and dead-lettering."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.spool = os.path.join(directory.name, 'results.jsonl')
+        self.dead_letter = os.path.join(directory.name, 'results.rejected.jsonl')
+
+    def writer(self, **kwargs):
+        writer = RecordingWriter(self.spool, **kwargs)
+        self.addCleanup(lambda: writer.spool_fd is not None and os.close(writer.spool_fd))
+        return writer
+
+    async def finish(self, writer):
+        """Wait for every record and dead-letter write, then stop the flush task."""
+        await writer.flush()
+        while writer.spooling:
+            await asyncio.gather(*writer.spooling)
+        writer.task.cancel()
+
+    def lines(self, path):
+        with open(path, encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    async def test_submitted_records_are_spooled_then_inserted_and_the_spool_truncated(self):
+        writer = self.writer()
+        self.assertTrue(writer.submit(result('a')))
+        self.assertTrue(writer.submit(result('b')))
+        self.assertEqual(writer.unflushed, 2)
+        await self.finish(writer)
+        self.assertEqual(sorted(writer.inserted), ['a', 'b'])     # Spooled concurrently, in any order
+        self.assertEqual(os.path.getsize(self.spool), 0)
+
+    async def test_spool_of_a_previous_run_is_replayed_on_start(self):
+        with open(self.spool, 'w', encoding='utf-8') as file:
+            for record in (result('a'), result('b', score=None)):
+                file.write(json.dumps(record) + "\n")
+            file.write('{"session": "torn')
+        writer = self.writer()
+        with self.assertLogs('rtc.results', 'WARNING'):
+            writer.start()
+            await self.finish(writer)
+        self.assertEqual(writer.inserted, ['a'])
+        self.assertEqual([line["record"]["session"] for line in self.lines(self.dead_letter)], ['b'])
+        self.assertEqual(os.path.getsize(self.spool), 0)
+
+    async def test_malformed_submit_is_dead_lettered(self):
+        writer = self.writer()
+        with self.assertLogs('rtc.results', 'ERROR'):
+            self.assertFalse(writer.submit(result('', answers=[[1]])))
+            await self.finish(writer)
+        self.assertEqual(writer.inserted, [])
+        self.assertEqual(self.lines(self.dead_letter)[0]["error"], "session missing")
+        self.assertEqual(writer.rejected, 1)
+
+    async def test_refused_record_is_isolated_and_dead_lettered(self):
+        writer = self.writer(refuse={'bad'}, max_attempts=2)
+        with self.assertLogs('rtc.results', 'ERROR') as logs:
+            for session in ('a', 'bad', 'b'):
+                writer.submit(result(session))
+            await self.finish(writer)
+        self.assertTrue(any('bad refused, dead-lettered' in line for line in logs.output))
+        self.assertEqual(sorted(writer.inserted), ['a', 'b'])
+        rejected = self.lines(self.dead_letter)
+        self.assertEqual([line["record"]["session"] for line in rejected], ['bad'])
+        self.assertIn('refused', rejected[0]["error"])
+        self.assertEqual(os.path.getsize(self.spool), 0)
+
+    async def test_unavailable_database_is_retried_not_dead_lettered(self):
+        writer = self.writer(unavailable=5, max_attempts=2)
+        with self.assertLogs('rtc.results', 'ERROR') as logs:
+            writer.submit(result('a'))
+            await self.finish(writer)
+        self.assertEqual(len(logs.output), 5)
+        self.assertEqual(writer.inserted, ['a'])
+        self.assertFalse(os.path.exists(self.dead_letter))
+
+
+class AnsweringServers(IceServerCache):
+    """IceServerCache whose probes answer for the given urls only, and remember what was probed."""
+
+    def __init__(self, ice_servers, answering):
+        super().__init__(ice_servers)
+        self.answering = answering
+        self.probed = []
+
+    async def _probe(self, server):
+        self.probed.append(server.urls)
+        return server.urls in self.answering
+
+
+class IceServerCacheTests(SimpleTestCase):
+    """Only STUN servers are filtered by their probe; TURN servers always stay configured."""
+
+    servers = [RTCIceServer("stun:a"), RTCIceServer("turn:relay", "user", "secret"), RTCIceServer("stun:b")]
+
+    async def test_turn_is_kept_and_not_probed(self):
+        cache = AnsweringServers(self.servers, {"stun:b"})
+        await cache.refresh()
+        self.assertEqual(cache.probed, ["stun:a", "stun:b"])
+        self.assertEqual([server.urls for server in cache.configuration().iceServers], ["turn:relay", "stun:b"])
+
+    async def test_round_without_answers_keeps_the_previous_set(self):
+        cache = AnsweringServers(self.servers, {"stun:a"})
+        await cache.refresh()
+        cache.answering = set()
+        with self.assertLogs('rtc.ice', 'WARNING'):
+            await cache.refresh()
+        self.assertEqual([server.urls for server in cache.working], ["stun:a", "turn:relay"])
+
+    async def test_turn_only_needs_no_probe(self):
+        cache = AnsweringServers([RTCIceServer(["turns:relay:443", "turn:relay"])], set())
+        await cache.refresh()
+        self.assertEqual(cache.probed, [])
+        self.assertEqual(len(cache.working), 1)
@@ -0,0 +1,121 @@
+"""
+threads.py
+Node-wide CPU thread budget of the worker processes.
+
+- OpenCV, OpenMP/BLAS (numpy, MediaPipe's TFLite kernels) and TensorFlow each
+  size their thread pools to every core of the machine, in every worker:
+  with one worker per core they oversubscribe the CPU many times over.
+- runworkers gives each worker a share of the cores (RTC_THREADS_PER_WORKER,
+  default cores / workers) through the environment, and with RTC_PIN_WORKERS
+  pins it to its own cores. The pools of the libraries are sized to that share;
+  MediaPipe's graph executors cannot be sized from Python, pinning is what
+  keeps them on the worker's cores.
+- report() counts the threads this process actually runs, by name.
+"""
+
+import os
+import re
+import sys
+import threading
+
+from collections import Counter
+
+from django.conf import settings
+
+# Read by OpenMP, OpenBLAS, MKL, numexpr and TensorFlow when they load
+THREAD_ENV = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'NUMEXPR_NUM_THREADS',
+              'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS')
+
+
+def available_cpus():
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:          # Not on Linux
+        return list(range(os.cpu_count() or 1))
+
+
+def worker_env(workers, threads=0, pin=False):
+    """
+    Environment of each of workers processes: its thread budget and, when
+    pin is set, the cores it is pinned to (RTC_WORKER_CPUS).
+    :param threads: Threads per worker, 0 = its share of the cores
+    """
+    cpus = available_cpus()
+    share = max(len(cpus) // workers, 1)
+    threads = threads or share
+    plans = []
+    for i in range(workers):
+        env = {name: str(threads) for name in THREAD_ENV}
+        env['TF_NUM_INTEROP_THREADS'] = '1'
+        env['RTC_WORKER_THREADS'] = str(threads)
+        if pin:
+            own = [cpus[(i * share + j) % len(cpus)] for j in range(share)]
+            env['RTC_WORKER_CPUS'] = ','.join(map(str, own))
+        plans.append(env)
+    return plans
+
+
+class ThreadBudget():
+    """
+    Thread budget of this process. apply() runs at process start, before
+    numpy or OpenCV are imported; the configure_* methods size the pools
+    of libraries that only read their setting at run time.
+    """
+
+    def __init__(self, threads=0):
+        # runworkers' plan first, then the setting, else the whole machine (a single process)
+        self.threads = int(os.environ.get('RTC_WORKER_THREADS') or threads or len(available_cpus()))
+        cpus = os.environ.get('RTC_WORKER_CPUS')
+        self.cpus = [int(cpu) for cpu in cpus.split(',')] if cpus else None  # Cores to pin to, None = not pinned
+        self.applied = False
+
+    def apply(self):
+        """Export the budget to the libraries yet to load, and pin the process."""
+        if self.applied:
+            return
+        for name in THREAD_ENV:
+            os.environ.setdefault(name, str(self.threads))
+        os.environ.setdefault('TF_NUM_INTEROP_THREADS', '1')
+        if self.cpus and hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, self.cpus)
+        self.applied = True
+
+    def configure_opencv(self):
+        import cv2
+        cv2.setNumThreads(self.threads)
+
+    def configure_tensorflow(self, tf):
+        """Size the pools of an imported TensorFlow (before its first op runs)."""
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(self.threads)
+            tf.config.threading.set_inter_op_parallelism_threads(1)
+        except RuntimeError:
+            pass                        # Already initialized, the environment applied instead
+
+    def report(self):
+        """
+        Threads of this process: native threads by kernel name (digits
+        dropped, so a pool counts as one entry) and Python threads by name.
+        """
+        native = Counter()
+        try:
+            for task in os.listdir('/proc/self/task'):
+                with open(f'/proc/self/task/{task}/comm') as file:
+                    native[re.sub(r'[\d_/-]+$', '', file.read().strip())] += 1
+        except OSError:
+            pass                        # No procfs
+        python = Counter(re.sub(r'[\d_-]+$', '', thread.name) for thread in threading.enumerate())
+        return {"native": sum(native.values()) or None,
+                "native_by_name": dict(native),
+                "python_by_name": dict(python)}
+
+    def stats(self):
+        cv2 = sys.modules.get('cv2')
+        return {"budget": self.threads,
+                "pinned_cpus": self.cpus,
+                "affinity": available_cpus(),
+                "opencv_threads": cv2.getNumThreads() if cv2 else None,
+                **self.report()}
+
+
+thread_budget = ThreadBudget(getattr(settings, 'RTC_THREADS_PER_WORKER', 0))
@@ -0,0 +1,107 @@
+"""
+tracing.py
+Connection-setup timeline of each session, from WebSocket connect to first processed frame.
+
+- mark(): first time a milestone is reached, as an offset from connect.
+- span(): duration of a setup step (login lookup, createAnswer, ICE gathering).
+- Each finished timeline is exported as one JSON record on the 'rtc.trace' logger,
+  and folded into per-phase percentiles kept in memory.
+"""
+
+import json
+import logging
+import time
+
+from collections import deque
+from contextlib import contextmanager
+
+trace_logger = logging.getLogger('rtc.trace')
+
+# Milestones in the order they normally happen
+MILESTONES = [
+    'ws_connect',
+    'ws_accept',
+    'admitted',
+    'offer',
+    'ice_connected',
+    'dtls_connected',
+    'first_dc_sent',            # First data-channel message from the server (on open)
+    'first_frame',
+    'first_inference',
+    'first_dc_received',        # First data-channel message from the client
+    'first_question',
+]
+
+
+def percentile(samples, q):
+    """q-th percentile (0-100) of samples, nearest rank."""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class SessionTrace():
+    """
+    Timeline of one session. All times are seconds on the monotonic clock.
+    """
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.started_at = time.time()       # Wall clock, for correlating with other logs
+        self.start = time.monotonic()
+        self.marks = {}                     # milestone -> offset from start
+        self.spans = {}                     # step -> duration
+        self.exported = False
+
+    def mark(self, name):
+        """Record a milestone, only the first time it is reached."""
+        if name not in self.marks:
+            self.marks[name] = time.monotonic() - self.start
+
+    @contextmanager
+    def span(self, name):
+        """Time a setup step, the first run of it is kept."""
+        begin = time.monotonic()
+        try:
+            yield
+        finally:
+            self.spans.setdefault(name, time.monotonic() - begin)
+
+    def record(self):
+        return {"session": self.session_id,
+                "started_at": self.started_at,
+                "marks": {name: round(value, 4) for name, value in self.marks.items()},
+                "spans": {name: round(value, 4) for name, value in self.spans.items()}}
+
+
+class TraceCollector():
+    """
+    Exports finished timelines and keeps recent samples per phase for percentiles.
+    """
+
+    def __init__(self, max_samples=2000):
+        self.samples = {}                   # phase -> recent values
+        self.max_samples = max_samples
+
+    def export(self, trace):
+        if trace.exported:
+            return
+        trace.exported = True
+        record = trace.record()
+        trace_logger.info(json.dumps(record))
+        for name, value in list(trace.marks.items()) + list(trace.spans.items()):
+            self.samples.setdefault(name, deque(maxlen=self.max_samples)).append(value)
+
+    def percentiles(self, qs=(50, 90, 99)):
+        """{phase: {"count": n, "p50": s, ...}} over the recent samples."""
+        stats = {}
+        for name, values in self.samples.items():
+            stats[name] = {"count": len(values)}
+            for q in qs:
+                stats[name][f"p{q}"] = percentile(values, q)
+        return stats
+
+
+trace_collector = TraceCollector()
@@ -1,3 +1,47 @@
+import os
+import sys
+
+from django.conf import settings
 from django.shortcuts import render
+from django.http import JsonResponse
 
 # Create your views here.
+from .admission import admission
+from .detector_pool import detector_pool
+from . import preload
+from .capture import capture_controller
+from .spotcheck import spot_checker
+from .threads import thread_budget
+from . import motion
+from .sessions import session_manager
+from .tracing import trace_collector
+from .workers import SessionRegistry
+
+registry = SessionRegistry(settings.RTC_SESSION_REGISTRY)
+
+
+def metrics(request):
+    """
+    Metrics of this worker process: live sessions, open graphs, RSS,
+    admission queue, detector pool, heavy imports, capture profile, spot checks,
+    threads, gesture classifier, motion-gate skips and connection-setup percentiles.
+    Under runworkers the router sends each request to one worker; "node" has
+    the live sessions of every worker from the shared registry.
+    """
+    per_worker = registry.counts()
+    # Imported with the media stack (NumPy), never by this view; no classifier is loaded before that
+    gestures = sys.modules.get('rtc.gestures')
+    return JsonResponse({"node": {"worker": os.environ.get('RTC_WORKER_ID', '0'),
+                                  "sessions": sum(per_worker.values()),
+                                  "sessions_per_worker": per_worker,
+                                  "capacity": settings.RTC_MAX_SESSIONS},
+                         "sessions": session_manager.stats(),
+                         "admission": admission.stats(),
+                         "detectors": detector_pool.stats(),
+                         "imports": preload.stats(),
+                         "capture": capture_controller.stats(),
+                         "spot_checks": spot_checker.stats(),
+                         "threads": thread_budget.stats(),
+                         "gestures": gestures.classifier_stats() if gestures else None,
+                         "motion": motion.stats(),
+                         "setup": trace_collector.percentiles()})
@@ -0,0 +1,156 @@
+"""
+workers.py
+Multi-worker mode: several ASGI worker processes behind one front router.
+
+- Each worker is a Daphne process on 127.0.0.1:<base_port + i> with its own
+  event loop, MediaRelay and detectors.
+- The router accepts client TCP connections and pins each one, and so its
+  WebSocket session and peer connection, to the worker with the fewest
+  open connections.
+- Sessions are recorded in a registry shared by the workers of the node,
+  see SessionRegistry.
+- The node's session capacity is split between the workers (session_shares),
+  each enforcing its share in its own AdmissionController.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+
+class Router():
+    """
+    TCP front router with least-connections pinning.
+    Bytes are relayed untouched, so HTTP, WebSocket and TLS all pass through.
+    """
+
+    def __init__(self, backends):
+        self.backends = backends                    # [(host, port)] of the workers
+        self.connections = [0] * len(backends)      # Open client connections per worker
+        self.server = None
+
+    def pick(self):
+        return min(range(len(self.backends)), key=lambda i: self.connections[i])
+
+    async def start(self, host, port):
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    async def handle(self, client_reader, client_writer):
+        index = self.pick()
+        self.connections[index] += 1
+        try:
+            backend_reader, backend_writer = await asyncio.open_connection(*self.backends[index])
+        except OSError:
+            logger.warning(f"Worker {index} at {self.backends[index]} is not reachable")
+            self.connections[index] -= 1
+            client_writer.close()
+            return
+
+        try:
+            await asyncio.gather(self._pipe(client_reader, backend_writer),
+                                 self._pipe(backend_reader, client_writer))
+        finally:
+            self.connections[index] -= 1
+            for writer in (client_writer, backend_writer):
+                writer.close()
+
+    async def _pipe(self, reader, writer):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            if writer.can_write_eof():
+                try:
+                    writer.write_eof()
+                except OSError:
+                    pass
+
+
+def spawn_workers(count, base_port, application='test_rtc.asgi:application', extra_env=None, worker_envs=None):
+    """
+    Start count Daphne worker processes, returns the Popen objects.
+    :param worker_envs: Extra environment of each worker (see threads.worker_env)
+    """
+    processes = []
+    for i in range(count):
+        env = dict(os.environ, RTC_WORKER_ID=str(i), **(extra_env or {}), **(worker_envs[i] if worker_envs else {}))
+        processes.append(subprocess.Popen(
+            [sys.executable, '-m', 'daphne', '-b', '127.0.0.1', '-p', str(base_port + i), application],
+            env=env))
+    return processes
+
+
+def session_shares(total, workers):
+    """Admission capacity of each of workers processes, adding up to total (at least 1 each)."""
+    return [max(total // workers + (1 if i < total % workers else 0), 1) for i in range(workers)]
+
+
+class SessionRegistry():
+    """
+    Node-wide registry of live sessions, shared by all worker processes.
+    Backed by one SQLite file; calls are blocking, run them off the event loop.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.worker = os.environ.get('RTC_WORKER_ID', '0')
+        self.initialized = False
+
+    def _connect(self):
+        if not self.initialized:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        if not self.initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS sessions ("
+                               "session TEXT PRIMARY KEY, worker TEXT, pid INTEGER,"
+                               "username TEXT, exam_id TEXT, started REAL)")
+            self.initialized = True
+        return connection
+
+    def add(self, session_id, username=None, exam_id=None):
+        with closing(self._connect()) as connection:
+            connection.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+                               (session_id, self.worker, os.getpid(), username, exam_id, time.time()))
+
+    def update(self, session_id, username, exam_id):
+        with closing(self._connect()) as connection:
+            connection.execute("UPDATE sessions SET username = ?, exam_id = ? WHERE session = ?",
+                               (username, exam_id, session_id))
+
+    def remove(self, session_id):
+        with closing(self._connect()) as connection:
+            connection.execute("DELETE FROM sessions WHERE session = ?", (session_id,))
+
+    def sessions(self, worker=None):
+        with closing(self._connect()) as connection:
+            query = "SELECT session, worker, pid, username, exam_id, started FROM sessions"
+            rows = connection.execute(query + " WHERE worker = ?", (worker,)) if worker is not None \
+                else connection.execute(query)
+            return [dict(zip(('session', 'worker', 'pid', 'username', 'exam_id', 'started'), row))
+                    for row in rows]
+
+    def counts(self):
+        """Live sessions per worker id."""
+        with closing(self._connect()) as connection:
+            return dict(connection.execute("SELECT worker, COUNT(*) FROM sessions GROUP BY worker"))
+
+    def clear_worker(self, worker):
+        """Drop the sessions of a worker that restarted."""
+        with closing(self._connect()) as connection:
+            connection.execute("DELETE FROM sessions WHERE worker = ?", (worker,))
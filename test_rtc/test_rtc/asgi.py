@@ -12,15 +12,29 @@ import os
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
-import rtc.routing
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_rtc.settings')
 
+# Thread budget and core pinning of this worker, before numpy/OpenCV load
+from rtc.threads import thread_budget
+thread_budget.apply()
+
+django_application = get_asgi_application()
+
+# rtc.routing pulls in aiortc and the media stack, it is imported on the first
+# WebSocket connection (or preloaded) so the server listens right away
+from rtc.preload import LazyApplication, schedule_preload, when_serving
+from rtc.results import result_writer
+
 application = ProtocolTypeRouter({
-    'http': get_asgi_application(),
-    "websocket": AuthMiddlewareStack(
+    'http': django_application,
+    "websocket": LazyApplication('rtc.routing', lambda routing: AuthMiddlewareStack(
         URLRouter(
-            rtc.routing.websocket_urlpatterns
+            routing.websocket_urlpatterns
         )
-    ),
+    )),
 })
+
+schedule_preload()
+# Results spooled before a crash or restart are written now, not with the next finished exam
+when_serving(result_writer.start)
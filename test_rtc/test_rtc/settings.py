@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -87,6 +89,9 @@ DATABASES = {
         'PASSWORD': 'rzryolo86',
         'HOST': '127.0.0.1',
         'PORT': '3306',
+        # Keep connections of the database thread pool open between logins
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -142,4 +147,102 @@ CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels.layers.InMemoryChannelLayer"
      },
-}
\ No newline at end of file
+}
+
+# Admin messages across worker processes (manage.py runworkers) need a shared layer
+if os.environ.get('RTC_CHANNEL_LAYER') == 'redis':
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [os.environ.get('RTC_REDIS_URL', 'redis://127.0.0.1:6379')]},
+        },
+    }
+
+# Live sessions of all worker processes on this node
+RTC_SESSION_REGISTRY = BASE_DIR / 'run' / 'sessions.sqlite3'
+
+# Append-only spool of finished exams waiting for the write-behind result writer
+RTC_RESULT_SPOOL = BASE_DIR / 'spool' / 'results.jsonl'
+
+# Per-session binary proctoring event logs and their per-exam index
+RTC_EVENT_LOG_DIR = BASE_DIR / 'eventlog'
+
+# Session recordings of exams with RecordSessions enabled
+RTC_RECORDING_DIR = BASE_DIR / 'recordings'
+RTC_RECORDING_SEGMENT_SECONDS = 60
+
+# Connection-setup timelines, one JSON record per session (see rtc/tracing.py)
+RTC_TRACE_FILE = BASE_DIR / 'traces.jsonl'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '{message}', 'style': '{'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+        'trace_file': {
+            'class': 'logging.FileHandler',
+            'filename': RTC_TRACE_FILE,
+            'formatter': 'message',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'rtc': {'handlers': ['console'], 'level': 'INFO'},
+        'rtc.trace': {'handlers': ['trace_file'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Admission control: sessions this node's inference can serve, and queued joins beyond that
+RTC_MAX_SESSIONS = 40
+RTC_MAX_JOIN_QUEUE = 500
+
+# Warm HandDetectors kept idle per worker process, and the most returned ones kept for reuse
+RTC_DETECTOR_POOL_SIZE = 4
+RTC_DETECTOR_POOL_MAX_IDLE = 8
+
+# Import the media stack and fill the detector pool as soon as the server listens (runworkers --preload)
+RTC_PRELOAD = os.environ.get('RTC_PRELOAD', '') == '1'
+
+# Clients are asked to capture at a smaller profile from this admission load on (see rtc/capture.py)
+RTC_CAPTURE_LOADED_AT = 0.8
+
+# Landmark-ingest sessions (Exams.ClientLandmarkRate): share of sampled frames spot-checked on the server
+RTC_SPOT_CHECK_RATE = 0.03
+RTC_SPOT_CHECK_MAX_PENDING = 4
+
+# Hand detection runs on every Nth incoming frame, filtered landmarks cover the frames in between
+RTC_DETECT_EVERY = 3
+
+# Quiz gestures: seconds a gesture is held to count, pause after one, hand visibility debounce
+RTC_GESTURE_HOLD = 1.0
+RTC_GESTURE_COOLDOWN = 1.0
+RTC_HAND_DEBOUNCE = 0.2
+
+# Per-session landmark traces for `manage.py simulatequiz`, None = not recorded
+RTC_LANDMARK_TRACE_DIR = None
+
+# CPU threads per worker process for OpenCV, OpenMP/BLAS and TensorFlow (0 = cores / workers),
+# and whether runworkers pins each worker to its own cores
+RTC_THREADS_PER_WORKER = 0
+RTC_PIN_WORKERS = False
+
+# Gesture classifier consulted when the rules are unsure (needs TensorFlow), None = rules only.
+# e.g. BASE_DIR / 'model' / 'gesture_quiz6.h5' with its normalization_mean6.npy / normalization_std6.npy
+RTC_GESTURE_MODEL = None
+RTC_GESTURE_NORMALIZATION = None
+# Names of the model's outputs in order (gesture_quiz5.h5: 'one', 'two', 'three', 'four', 'undo')
+RTC_GESTURE_CLASSES = ('no', 'one', 'two', 'three', 'four', 'undo')
+# Rule margins below this (least clear finger, share of the hand's size) go to the classifier
+RTC_GESTURE_MARGIN = 0.05
+
+# Skip hand detection on frames where nothing moved (see rtc/motion.py), forcing one every N seconds
+RTC_MOTION_GATE = True
+RTC_MOTION_MAX_SKIP = 1.0
+
+# Lobby before quiz_start: hand detections per second on the self-view (0 = no overlay, no detection)
+# and the width frames are converted at
+RTC_LOBBY_DETECT_RATE = 2
+RTC_LOBBY_WIDTH = 320